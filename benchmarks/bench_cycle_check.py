@@ -0,0 +1,95 @@
+"""Compare cycle checking in add_dependency: full DFS vs incremental order.
+
+Wires dependencies into a fresh TaskManager and reports edges per second for
+two shapes: a chain (each task depends on the one created before it, the
+worst case for a DFS from the target) and a random DAG whose tasks are
+created and wired in random order (so the topological order must keep being
+repaired). The old
+DFS is quadratic on chains, so each run stops after ``--budget`` seconds and
+reports how far it got.
+
+    python -m benchmarks.bench_cycle_check
+    python -m benchmarks.bench_cycle_check --edges 10000 --budget 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from todo_mcp.tasks import Task, TaskManager
+
+
+class LegacyTaskManager(TaskManager):
+    """TaskManager with the pre-ordering DFS cycle check, for comparison only."""
+
+    def _creates_cycle(self, task_id: str, depends_on: str) -> bool:
+        visited = set()
+        stack = [depends_on]
+        while stack:
+            cur = stack.pop()
+            if cur == task_id:
+                return True
+            if cur in visited:
+                continue
+            visited.add(cur)
+            task = self.tasks.get(cur)
+            if task is not None:
+                stack.extend(task.dependencies)
+        return False
+
+
+def chain(edges: int) -> Tuple[int, List[Tuple[str, str]]]:
+    return edges + 1, [(f"t{i}", f"t{i - 1}") for i in range(1, edges + 1)]
+
+
+def random_dag(edges: int, seed: int = 1) -> Tuple[int, List[Tuple[str, str]]]:
+    # edges always point from a higher to a lower hidden rank, so no cycles
+    rng = random.Random(seed)
+    n = max(2, edges // 4)
+    pairs = set()
+    while len(pairs) < edges:
+        a, b = rng.randrange(n), rng.randrange(n)
+        if a != b:
+            pairs.add((f"t{max(a, b)}", f"t{min(a, b)}"))
+    wired = list(pairs)
+    rng.shuffle(wired)
+    return n, wired
+
+
+def run(cls, n: int, wired: List[Tuple[str, str]], budget: float, shuffle: bool) -> Tuple[int, float]:
+    mgr = cls()
+    ids = [f"t{i}" for i in range(n)]
+    if shuffle:  # creation order says nothing about the DAG
+        random.Random(2).shuffle(ids)
+    for tid in ids:
+        mgr.add_task(Task(id=tid, title=tid))
+    start = time.perf_counter()
+    done = 0
+    for task_id, depends_on in wired:
+        mgr.add_dependency(task_id, depends_on)
+        done += 1
+        if not done % 1000 and time.perf_counter() - start > budget:
+            break
+    return done, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, default=100_000)
+    parser.add_argument("--budget", type=float, default=20.0, help="seconds per run before giving up")
+    args = parser.parse_args()
+
+    print(f"{'graph':>10}  {'checker':>12}  {'edges':>8}  {'seconds':>8}  {'edges/s':>10}")
+    graphs = (("chain", chain(args.edges), False), ("random", random_dag(args.edges), True))
+    for name, (n, wired), shuffle in graphs:
+        for label, cls in (("dfs", LegacyTaskManager), ("incremental", TaskManager)):
+            done, elapsed = run(cls, n, wired, args.budget, shuffle)
+            partial = "" if done == len(wired) else " (stopped)"
+            print(f"{name:>10}  {label:>12}  {done:>8}  {elapsed:>8.2f}  {done / elapsed:>10.0f}{partial}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Report the memory cost of Task objects at increasing store sizes.
+
+Builds N tasks into a plain ``{id: task}`` dict, every fourth task
+depending on the one before it (roughly the shape of real plans), once
+with the slotted :class:`Task` and once with a replica of the old dataclass
+layout, and prints the traced allocations per task. Ids and titles are
+created before tracing and no TaskManager is involved, so the numbers
+cover only the task objects and their edge and metadata containers.
+
+    python -m benchmarks.bench_task_memory
+    python -m benchmarks.bench_task_memory --sizes 10000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Set
+
+from todo_mcp.tasks import Status, Task
+
+
+@dataclass
+class LegacyTask:
+    """The pre-slots Task layout (same fields), kept here for comparison only."""
+
+    id: str
+    title: str
+    status: Status = Status.PENDING
+    dependencies: Set[str] = field(default_factory=set)
+    dependents: Set[str] = field(default_factory=set)
+    parent: str | None = None
+    subtasks: Set[str] = field(default_factory=set)
+    metadata: Dict[str, object] = field(default_factory=dict)
+    agent_context: Dict[str, object] = field(default_factory=dict)
+    completed_at: float | None = None
+
+
+def build_current(ids: List[str], titles: List[str]) -> Dict[str, Task]:
+    tasks: Dict[str, Task] = {}
+    for i, (tid, title) in enumerate(zip(ids, titles)):
+        tasks[tid] = Task(id=tid, title=title)
+        if i and i % 4 == 0:
+            tasks[tid].add_dependency(ids[i - 1])
+            tasks[ids[i - 1]].add_dependent(tid)
+    return tasks
+
+
+def build_legacy(ids: List[str], titles: List[str]) -> Dict[str, LegacyTask]:
+    tasks: Dict[str, LegacyTask] = {}
+    for i, (tid, title) in enumerate(zip(ids, titles)):
+        tasks[tid] = LegacyTask(id=tid, title=title)
+        if i and i % 4 == 0:
+            tasks[tid].dependencies.add(ids[i - 1])
+            tasks[ids[i - 1]].dependents.add(tid)
+    return tasks
+
+
+def measure(builder: Callable[[List[str], List[str]], Mapping[str, object]], n: int) -> float:
+    ids = [f"task-{i:07d}" for i in range(n)]
+    titles = [f"Task {i}" for i in range(n)]
+    gc.collect()
+    tracemalloc.start()
+    result = builder(ids, titles)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'tasks':>10}  {'slotted B/task':>15}  {'dataclass B/task':>17}")
+    for n in args.sizes:
+        current = measure(build_current, n)
+        legacy = measure(build_legacy, n)
+        print(f"{n:>10}  {current:>15.0f}  {legacy:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Measure the per-call cost of checking tool input against its schema.
+
+Times the compiled validator of a few registered tools on typical inputs,
+and the whole ``call_tool`` path of a read-only tool with and without it
+(the resident manager is warm, so no store I/O is included).
+
+    python -m benchmarks.bench_validation
+    python -m benchmarks.bench_validation --calls 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from todo_mcp import mcp, mcp_tools
+from todo_mcp.storage import FileStorage
+
+INPUTS: Dict[str, Dict[str, Any]] = {
+    "get_task_status": {"task_id": "t1"},
+    "create_task": {"task_id": "t9", "title": "Write docs", "metadata": {"priority": 2}, "depends_on": ["t1", "t2"]},
+    "list_tasks": {"status": "READY", "fields": ["id", "title"], "limit": 50},
+    "apply_batch": {
+        "tasks": [{"task_id": f"b{i}", "title": f"B{i}", "depends_on": [f"b{i - 1}"] if i else []} for i in range(20)],
+    },
+}
+
+
+def per_call(fn: Callable[[], Any], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'tool':>16}  {'validate (us)':>13}")
+    for name, tool_input in INPUTS.items():
+        validate = mcp._registry[name].validate
+        print(f"{name:>16}  {per_call(lambda: validate(tool_input), args.calls):>13.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mcp_tools._storage = FileStorage(Path(tmp) / "tasks.json")
+        mcp.call_tool("create_task", {"task_id": "t1", "title": "First"})
+        spec = mcp._registry["get_task_status"]
+        call = lambda: mcp.call_tool("get_task_status", {"task_id": "t1"})  # noqa: E731
+        with_check = per_call(call, args.calls)
+        validate, spec.validate = spec.validate, lambda tool_input: None
+        try:
+            without_check = per_call(call, args.calls)
+        finally:
+            spec.validate = validate
+    print(f"\ncall_tool get_task_status: {with_check:.2f} us, {without_check:.2f} us unchecked")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,11 @@ setup(
         # minimal dependencies for now
         "typing-extensions>=4.0.0",
     ],
+    extras_require={
+        # optional faster/binary store codecs
+        "fast": ["orjson", "msgpack>=1.0"],
+        "msgpack": ["msgpack>=1.0"],
+    },
     entry_points={
         "console_scripts": [
             "todo-mcp=todo_mcp.cli:main",
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from todo_mcp import mcp, mcp_tools
+from todo_mcp.archive import Archive
+from todo_mcp.storage import FileStorage
+from todo_mcp.tasks import Task, TaskManager
+
+
+def test_archivable_requires_done_dependents():
+    mgr = TaskManager()
+    for tid in ("a", "b", "c"):
+        mgr.add_task(Task(id=tid, title=tid))
+    mgr.add_dependency("b", "a")
+    mgr.mark_complete("a")
+    mgr.mark_complete("c")
+    later = time.time() + 1
+    # b still waits on a, so only c can go
+    assert mgr.archivable(later) == ["c"]
+    assert mgr.archivable(0) == []
+
+    mgr.mark_complete("b")
+    removed = mgr.detach(mgr.archivable(later))
+    assert [t.id for t in removed] == ["a", "b", "c"]
+    assert mgr.tasks == {} and mgr.archived == {"a", "b", "c"}
+
+
+def test_attach_does_not_share_the_archive_ids(tmp_path):
+    archive = Archive(tmp_path / "archive")
+    archive.append([Task(id="old", title="old")])
+    mgr = archive.attach(TaskManager())
+    archive.append([Task(id="new", title="new")])
+    assert mgr.archived == {"old"} and archive.ids() == {"old", "new"}
+
+
+def test_archive_tool_and_search(tmp_path):
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp.call_tool("create_task", {"task_id": "old", "title": "Ship release", "metadata": {"team": "infra"}})
+    mcp.call_tool("create_task", {"task_id": "next", "title": "Next"})
+    mcp.call_tool("mark_task_complete", {"task_id": "old"})
+
+    assert mcp.call_tool("archive", {"older_than_days": 1})["archived"] == []
+    assert mcp.call_tool("archive", {"older_than_days": 0})["archived"] == ["old"]
+
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")  # cold start
+    assert [t["id"] for t in mcp.call_tool("list_tasks", {})] == ["next"]
+    # archived tasks still satisfy new dependencies and keep their ids
+    mcp.call_tool("create_task", {"task_id": "after", "title": "After", "depends_on": ["old"]})
+    assert mcp.call_tool("get_task_status", {"task_id": "after"})["status"] == "READY"
+    with pytest.raises(KeyError):
+        mcp.call_tool("create_task", {"task_id": "old", "title": "again"})
+
+    hits = mcp.call_tool("search_archive", {"query": "INFRA"})
+    assert [h["id"] for h in hits] == ["old"]
+    assert hits[0]["status"] == "COMPLETED"
+
+
+def test_archive_segments_are_append_only(tmp_path):
+    archive = Archive(tmp_path, segment_bytes=1)
+    archive.append([Task(id="a", title="A")])
+    archive.append([Task(id="b", title="B")])
+    assert len(list(tmp_path.glob("segment-*.jsonl.gz"))) == 2
+    assert Archive(tmp_path).ids() == {"a", "b"}
+    assert [t["id"] for t in Archive(tmp_path).search("b")] == ["b"]
+
+
+def test_archive_is_refused_in_atomic_batches_and_appends_once(tmp_path):
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    mcp.call_tool("create_task", {"task_id": "old", "title": "Old"})
+    mcp.call_tool("mark_task_complete", {"task_id": "old"})
+
+    batch = [{"tool": "archive", "input": {"older_than_days": 0}}, {"tool": "get_task_status", "input": {"task_id": "x"}}]
+    with pytest.raises(mcp.BatchAborted, match="cannot run in an atomic batch"):
+        mcp.call_batch(batch, atomic=True)
+    archive = Archive(tmp_path / "archive")
+    assert archive.ids() == set()
+    assert mcp.call_tool("get_task_status", {"task_id": "old"})["status"] == "COMPLETED"
+
+    # replaying an archive step (as a conflict retry does) writes nothing twice
+    archive.append([Task(id="old", title="Old")])
+    archive.append([Task(id="old", title="Old"), Task(id="new", title="New")])
+    assert [t["id"] for t in archive.search("")] == ["old", "new"]
+    assert (tmp_path / "archive" / "ids.txt").read_text().split() == ["old", "new"]
@@ -0,0 +1,84 @@
+import multiprocessing
+
+import pytest
+
+from todo_mcp import mcp, mcp_tools
+from todo_mcp.storage import FileStorage, StoreConflictError, open_storage
+from todo_mcp.tasks import Task
+
+WRITERS = 4
+TASKS_PER_WRITER = 15
+
+
+def _writer(store: str, journal: bool, worker: int) -> None:
+    mcp_tools._storage = open_storage(store, journal=journal)
+    mcp_tools._invalidate()
+    for i in range(TASKS_PER_WRITER):
+        mcp.call_tool("create_task", {"task_id": f"w{worker}-{i}", "title": f"task {i}"})
+        if i:
+            mcp.call_tool("add_dependency", {"task_id": f"w{worker}-{i}", "depends_on": f"w{worker}-{i - 1}"})
+
+
+@pytest.mark.parametrize(
+    "name,journal",
+    [("tasks.json", False), ("tasks.json", True), ("tasks.db", False), ("shards", False)],
+)
+def test_parallel_writers_lose_nothing(tmp_path, name, journal):
+    store = str(tmp_path / name)
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(store, journal, w)) for w in range(WRITERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    mgr = open_storage(store, journal=journal).load()
+    assert len(mgr.tasks) == WRITERS * TASKS_PER_WRITER
+    for w in range(WRITERS):
+        assert mgr.tasks[f"w{w}-1"].dependencies == {f"w{w}-0"}
+        assert f"w{w}-1" in mgr.tasks[f"w{w}-0"].dependents
+
+
+def test_stale_manager_save_conflicts(tmp_path):
+    path = tmp_path / "tasks.json"
+    first, second = FileStorage(path), FileStorage(path)
+    mgr_a, mgr_b = first.load(), second.load()
+    mgr_a.add_task(Task(id="a", title="A"))
+    first.save(mgr_a)
+    mgr_b.add_task(Task(id="b", title="B"))
+    with pytest.raises(StoreConflictError):
+        second.save(mgr_b)
+    # after reloading, the second writer sees and keeps the first one's task
+    mgr_b = second.load()
+    mgr_b.add_task(Task(id="b", title="B"))
+    second.save(mgr_b)
+    assert set(FileStorage(path).load().tasks) == {"a", "b"}
+
+
+def _claimer(store: str, worker: int, out) -> None:
+    mcp_tools._storage = open_storage(store)
+    mcp_tools._invalidate()
+    while True:
+        res = mcp.call_tool("claim_next_task", {"holder": f"w{worker}"})
+        if res["task_id"] is None:
+            return
+        out.put(res["task_id"])
+        mcp.call_tool("mark_task_complete", {"task_id": res["task_id"]})
+
+
+def test_parallel_claims_never_share_a_task(tmp_path):
+    store = str(tmp_path / "tasks.json")
+    mcp_tools._storage = open_storage(store)
+    mcp_tools._invalidate()
+    mcp.call_tool("apply_batch", {"tasks": [{"task_id": f"t{i}", "title": f"T{i}"} for i in range(40)]})
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_claimer, args=(store, w, out)) for w in range(WRITERS)]
+    for p in procs:
+        p.start()
+    claimed = [out.get(timeout=60) for _ in range(40)]
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+    assert sorted(claimed) == sorted(f"t{i}" for i in range(40))
@@ -18,3 +18,26 @@ def test_export_html(tmp_path):
     content = outpath.read_text()
     assert "First" in content and "Second" in content
     assert "<script" in content
+
+
+def test_export_html_shows_rollup_progress(tmp_path):
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    mcp.call_tool(
+        "apply_batch",
+        {
+            "tasks": [
+                {"task_id": "epic", "title": "Epic"},
+                {"task_id": "s1", "title": "S1", "parent": "epic"},
+                {"task_id": "s2", "title": "S2", "parent": "epic"},
+            ]
+        },
+    )
+    mcp.call_tool("mark_task_complete", {"task_id": "s1"})
+    rows = {t["id"]: t for t in mcp.call_tool("list_tasks", {})}
+    assert rows["epic"]["progress"] == {"done": 1, "total": 2, "percent": 50}
+    assert "progress" not in rows["s1"]
+
+    outpath = tmp_path / "out.html"
+    mcp.call_tool("export_html", {"path": str(outpath)})
+    assert '"percent": 50' in outpath.read_text()
@@ -2,7 +2,8 @@ import json
 import sys
 
 from todo_mcp import mcp, mcp_tools
-from todo_mcp.storage import FileStorage
+from todo_mcp.storage import FileStorage, ShardedStorage
+from todo_mcp.tasks import Task
 
 
 def test_tool_registration():
@@ -68,9 +69,10 @@ def test_calling_tools(tmp_path, capsys):
     # status query
     status = mcp.call_tool("get_task_status", {"task_id": "y"})
     assert status["status"] == "READY"
-    # ensure prints emitted
-    captured = capsys.readouterr().out
-    assert "[MCP] created task x" in captured
+    # progress notes go to stderr, clear of the protocol on stdout
+    captured = capsys.readouterr()
+    assert "[MCP] created task x" in captured.err
+    assert "[MCP]" not in captured.out
 
 
 def test_stdin_server(tmp_path):
@@ -101,3 +103,376 @@ def test_stdin_server(tmp_path):
     r2 = json.loads(lines[2])
     assert r1.get("result", {}).get("task_id") == "a"
     assert "a" in r2.get("result", [])
+
+
+def test_manager_cached_until_file_changes(tmp_path, monkeypatch):
+    storage_file = tmp_path / "cache.json"
+    storage = FileStorage(storage_file)
+    mcp_tools._storage = storage
+    mcp.call_tool("create_task", {"task_id": "a", "title": "A"})
+
+    loads = []
+    real_load = storage.load
+    monkeypatch.setattr(storage, "load", lambda: loads.append(1) or real_load())
+    mcp.call_tool("get_ready_tasks", {})
+    mcp.call_tool("get_task_status", {"task_id": "a"})
+    mcp.call_tool("create_task", {"task_id": "b", "title": "B"})
+    assert loads == []
+
+    # an external edit changes the stat signature and forces a reload
+    data = json.loads(storage_file.read_text())
+    data["a"]["status"] = "COMPLETED"
+    storage_file.write_text(json.dumps(data, indent=4))
+    status = mcp.call_tool("get_task_status", {"task_id": "a"})
+    assert status["status"] == "COMPLETED"
+    assert loads == [1]
+
+
+def test_failed_mutation_does_not_leak_into_cache(tmp_path):
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp.call_tool("create_task", {"task_id": "a", "title": "A"})
+    try:
+        mcp.call_tool("create_task", {"task_id": "b", "title": "B", "depends_on": ["missing"]})
+    except KeyError:
+        pass
+    assert mcp.call_tool("get_ready_tasks", {}) == ["a"]
+
+
+def test_dashboard_tool(tmp_path):
+    mcp_tools._storage = ShardedStorage(tmp_path / "shards")
+    mcp.call_tool("create_task", {"task_id": "a", "title": "A", "metadata": {"workspace": "alpha"}})
+    mcp.call_tool("create_task", {"task_id": "b", "title": "B", "depends_on": ["a"]})
+    res = mcp.call_tool("get_dashboard", {})
+    assert res["shards"] == {"alpha": {"READY": 1}, "default": {"BLOCKED": 1}}
+    assert res["totals"] == {"READY": 1, "BLOCKED": 1}
+
+
+def test_cli_import_jsonl(tmp_path, capsys, monkeypatch):
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    backlog = tmp_path / "requests.jsonl"
+    backlog.write_text(
+        "\n".join(
+            json.dumps({"request_id": f"r{i}", "title": f"Request {i}", "body": "details"}) for i in range(3)
+        )
+        + "\n"
+    )
+    monkeypatch.setattr(sys, "argv", ["todo-mcp", "import", str(backlog), "--sequential"])
+    from todo_mcp.cli import main
+
+    assert main() == 0
+    assert "Imported 3 tasks" in capsys.readouterr().out
+    mgr = mcp_tools._storage.load()
+    assert mgr.tasks["r2"].dependencies == {"r1"}
+    assert mgr.tasks["r0"].metadata == {"body": "details"}
+    assert mcp.call_tool("get_ready_tasks", {}) == ["r0"]
+
+
+def test_blocker_and_impact_tools(tmp_path):
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    mcp.call_tool(
+        "apply_batch",
+        {"tasks": [{"task_id": f"t{i}", "title": f"T{i}", "depends_on": [f"t{i - 1}"] if i else []} for i in range(5)]},
+    )
+    res = mcp.call_tool("get_blockers", {"task_id": "t4", "limit": 2})
+    assert [r["id"] for r in res["blockers"]] == ["t3", "t2"] and res["truncated"]
+    res = mcp.call_tool("get_impact", {"task_id": "t0", "depth": 1})
+    assert res["impact"] == [{"id": "t1", "title": "T1", "status": "BLOCKED", "depth": 1}]
+    assert not res["truncated"]
+
+
+def test_list_tasks_filters_projects_and_pages(tmp_path):
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    tasks = [{"task_id": f"t{i:02d}", "title": f"T{i}", "metadata": {"team": "a" if i < 7 else "b"}} for i in range(10)]
+    mcp.call_tool("apply_batch", {"tasks": tasks})
+    assert len(mcp.call_tool("list_tasks", {})) == 10
+
+    rows = mcp.call_tool("list_tasks", {"metadata": {"team": "b"}, "fields": ["title"]})
+    assert rows == [{"id": "t07", "title": "T7"}, {"id": "t08", "title": "T8"}, {"id": "t09", "title": "T9"}]
+
+    seen, cursor = [], None
+    while True:
+        args = {"status": "READY", "metadata": {"team": "a"}, "fields": [], "limit": 3}
+        if cursor:
+            args["cursor"] = cursor
+        page = mcp.call_tool("list_tasks", args)
+        seen += [r["id"] for r in page["tasks"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"t{i:02d}" for i in range(7)]
+
+
+def test_watch_long_polls_local_and_external_changes(tmp_path):
+    import threading
+
+    path = tmp_path / "tasks.json"
+    mcp_tools._storage = FileStorage(path)
+    mcp_tools._invalidate()
+    mcp.call_tool("create_task", {"task_id": "a", "title": "A"})
+    start = mcp.call_tool("watch", {})
+    assert [e["type"] for e in start["events"]] == ["created", "status_changed"] and not start["reset"]
+    assert mcp.call_tool("watch", {"since": start["seq"]})["events"] == []
+
+    timer = threading.Timer(0.1, mcp.call_tool, ("mark_task_complete", {"task_id": "a"}))
+    timer.start()
+    res = mcp.call_tool("watch", {"since": start["seq"], "timeout": 5, "statuses": ["COMPLETED"]})
+    timer.join()
+    assert [(e["task_id"], e["status"]) for e in res["events"]] == [("a", "COMPLETED")]
+
+    # another process writes the store; the watcher notices on its next poll
+    other = FileStorage(path)
+    mgr = other.load()
+    mgr.add_task(Task(id="b", title="B"))
+    threading.Timer(0.1, other.save, (mgr,)).start()
+    res = mcp.call_tool("watch", {"since": res["seq"], "timeout": 5, "task_ids": ["b"]})
+    assert [e["type"] for e in res["events"]] == ["created", "status_changed"]
+
+
+def test_watch_cursor_misses_no_write_after_its_read(tmp_path, monkeypatch):
+    from contextlib import contextmanager
+
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    mcp.call_tool("create_task", {"task_id": "a", "title": "A"})
+    read = mcp.state_lock.read
+    writes = [("create_task", {"task_id": "b", "title": "B"})]
+
+    @contextmanager
+    def read_then_write():
+        with read():
+            yield
+        while writes:  # lands after the watcher's read, before it answers
+            mcp.call_tool(*writes.pop())
+
+    monkeypatch.setattr(mcp.state_lock, "read", read_then_write)
+    first = mcp.call_tool("watch", {})
+    assert {e["task_id"] for e in first["events"]} == {"a"}
+    monkeypatch.undo()
+    second = mcp.call_tool("watch", {"since": first["seq"]})
+    assert [e["task_id"] for e in second["events"]] == ["b", "b"]
+
+
+def test_write_landing_right_after_our_save_is_reloaded(tmp_path, monkeypatch):
+    path = tmp_path / "tasks.json"
+    mcp_tools._storage = FileStorage(path)
+    mcp_tools._invalidate()
+    save = FileStorage.save
+
+    def save_then_other_writer(self, mgr):
+        signature = save(self, mgr)
+        if self is mcp_tools._storage:  # another process, just after our lock
+            other = FileStorage(path)
+            theirs = other.load()
+            theirs.add_task(Task(id="theirs", title="T"))
+            other.save(theirs)
+        return signature
+
+    monkeypatch.setattr(FileStorage, "save", save_then_other_writer)
+    mcp.call_tool("create_task", {"task_id": "ours", "title": "O"})
+    monkeypatch.undo()
+    assert {t["id"] for t in mcp.call_tool("list_tasks", {})} == {"ours", "theirs"}
+
+
+def test_watch_sees_no_events_from_rolled_back_changes(tmp_path):
+    path = tmp_path / "tasks.json"
+    mcp_tools._storage = FileStorage(path)
+    mcp_tools._invalidate()
+    mcp.call_tool("create_task", {"task_id": "a", "title": "A"})
+    mcp.call_tool("create_task", {"task_id": "b", "title": "B"})
+    seq = mcp.call_tool("watch", {})["seq"]
+
+    aborted = [
+        {"tool": "mark_task_complete", "input": {"task_id": "a"}},
+        {"tool": "add_dependency", "input": {"task_id": "b", "depends_on": "zz"}},
+    ]
+    try:
+        mcp.call_batch(aborted, atomic=True)
+    except mcp.BatchAborted:
+        pass
+    assert mcp.call_tool("watch", {"since": seq})["events"] == []
+    assert mcp.call_tool("get_task_status", {"task_id": "a"})["status"] == "READY"
+
+    # another process saves between our load and save: the retry reloads and
+    # reports only the other write and the replayed change
+    attempts = []
+
+    def complete(mgr):
+        if not attempts:
+            other = FileStorage(path)
+            theirs = other.load()
+            theirs.add_task(Task(id="x", title="X"))
+            other.save(theirs)
+        attempts.append(1)
+        mgr.mark_complete("a")
+
+    mcp_tools._apply(complete)
+    assert len(attempts) == 2
+    events = mcp.call_tool("watch", {"since": seq})["events"]
+    assert [(e["task_id"], e["type"], e.get("status")) for e in events] == [
+        ("x", "created", None),
+        ("x", "status_changed", "READY"),
+        ("a", "status_changed", "COMPLETED"),
+    ]
+
+
+def test_async_server_answers_out_of_order_with_ids(tmp_path):
+    from io import StringIO
+
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    seq = mcp.call_tool("watch", {})["seq"]
+    requests = [
+        # the watch blocks until the create lands, so its answer comes last
+        {"id": 1, "tool": "watch", "input": {"since": seq, "timeout": 5}},
+        {"id": 2, "tool": "create_task", "input": {"task_id": "a", "title": "A"}},
+        {"id": 3, "tool": "no_such_tool", "input": {}},
+    ]
+    out_stream = StringIO()
+    mcp.serve_async(stdout=out_stream, stdin=StringIO("".join(json.dumps(r) + "\n" for r in requests)))
+    lines = [json.loads(line) for line in out_stream.getvalue().splitlines()]
+    assert lines[0]["info"] == "tools"
+    by_id = {r["id"]: r for r in lines[1:]}
+    assert sorted(by_id) == [1, 2, 3]
+    assert by_id[2]["result"]["task_id"] == "a"
+    assert "error" in by_id[3]
+    assert [e["task_id"] for e in by_id[1]["result"]["events"]] == ["a", "a"]
+    assert [r["id"] for r in lines[1:]].index(1) > [r["id"] for r in lines[1:]].index(2)
+
+
+def test_batch_line_runs_calls_on_one_load_and_saves_once(tmp_path, monkeypatch):
+    from io import StringIO
+
+    storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._storage = storage
+    mcp_tools._invalidate()
+    saves = []
+    real_save = storage.save
+    monkeypatch.setattr(storage, "save", lambda mgr: saves.append(1) or real_save(mgr))
+
+    batch = [
+        {"id": 1, "tool": "create_task", "input": {"task_id": "a", "title": "A"}},
+        {"id": 2, "tool": "create_task", "input": {"task_id": "b", "title": "B", "depends_on": ["a"]}},
+        # fails half way (the task is added, the dependency is not); dropped
+        {"id": 3, "tool": "create_task", "input": {"task_id": "c", "title": "C", "depends_on": ["nope"]}},
+        {"id": 4, "tool": "get_ready_tasks", "input": {}},
+    ]
+    atomic = {
+        "id": "t",
+        "atomic": True,
+        "batch": [
+            {"tool": "mark_task_complete", "input": {"task_id": "a"}},
+            {"tool": "get_task_status", "input": {"task_id": "missing"}},
+        ],
+    }
+    out_stream = StringIO()
+    mcp.serve_stdin(stdout=out_stream, stdin=StringIO(json.dumps(batch) + "\n" + json.dumps(atomic) + "\n"))
+    lines = [json.loads(line) for line in out_stream.getvalue().splitlines()]
+
+    entries = lines[1]
+    assert [e["id"] for e in entries] == [1, 2, 3, 4]
+    assert entries[1]["result"]["task_id"] == "b"
+    assert "nope" in entries[2]["error"]
+    assert entries[3]["result"] == ["a"]
+    assert len(saves) == 1
+    assert lines[2]["id"] == "t" and "call 1 failed" in lines[2]["error"]
+    assert len(saves) == 1
+
+    mgr = FileStorage(tmp_path / "tasks.json").load()
+    assert sorted(mgr.tasks) == ["a", "b"]
+    assert mgr.tasks["a"].status.name == "READY"
+
+
+def test_socket_daemon_shares_state_between_clients(tmp_path):
+    import socket
+    import threading
+    import time
+    from io import StringIO
+
+    import pytest
+
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("no Unix domain sockets")
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    path = str(tmp_path / "mcp.sock")
+    stop = threading.Event()
+    daemon = threading.Thread(target=mcp.serve_socket, args=(path,), kwargs={"stop": stop})
+    daemon.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not (tmp_path / "mcp.sock").exists():
+            assert time.monotonic() < deadline, "daemon did not start"
+            time.sleep(0.01)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn, conn.makefile("rw") as f:
+            conn.connect(path)
+            assert json.loads(f.readline())["info"] == "tools"
+            f.write(json.dumps({"id": 1, "tool": "create_task", "input": {"task_id": "a", "title": "A"}}) + "\n")
+            f.flush()
+            assert json.loads(f.readline()) == {"id": 1, "result": {"task_id": "a"}}
+
+            # a second client, attached through the stdio proxy, sees the task
+            out_stream = StringIO()
+            mcp.proxy_stdio(path, stdout=out_stream, stdin=StringIO(
+                json.dumps({"tool": "get_ready_tasks", "input": {}}) + "\n"
+                + json.dumps({"tool": "mark_task_complete", "input": {"task_id": "a"}}) + "\n"
+            ))
+            lines = [json.loads(line) for line in out_stream.getvalue().splitlines()]
+            assert lines[0]["info"] == "tools"
+            assert lines[1] == {"result": ["a"]}
+            assert "result" in lines[2]
+    finally:
+        stop.set()
+        daemon.join(5)
+    assert not daemon.is_alive()
+    assert FileStorage(tmp_path / "tasks.json").load().tasks["a"].status.name == "COMPLETED"
+
+
+def test_socket_daemon_only_replaces_stale_sockets(tmp_path):
+    import socket
+    import threading
+    import time
+
+    import pytest
+
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("no Unix domain sockets")
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+
+    # a regular file (say, the task store) is never deleted
+    store = tmp_path / "tasks.json"
+    store.write_text("{}")
+    with pytest.raises(FileExistsError, match="not a socket"):
+        mcp.serve_socket(str(store))
+    assert store.read_text() == "{}"
+
+    # a socket left behind by a daemon that died is replaced
+    path = str(tmp_path / "mcp.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as dead:
+        dead.bind(path)
+    stop = threading.Event()
+    daemon = threading.Thread(target=mcp.serve_socket, args=(path,), kwargs={"stop": stop})
+    daemon.start()
+    try:
+        deadline = time.monotonic() + 5
+        while True:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                try:
+                    conn.connect(path)
+                    break
+                except ConnectionRefusedError:
+                    assert time.monotonic() < deadline, "daemon did not start"
+                    time.sleep(0.01)
+
+        # a live daemon is not taken over
+        with pytest.raises(FileExistsError, match="already serving"):
+            mcp.serve_socket(path)
+    finally:
+        stop.set()
+        daemon.join(5)
+    assert not daemon.is_alive()
+    assert not (tmp_path / "mcp.sock").exists()
@@ -0,0 +1,46 @@
+from todo_mcp import mcp, mcp_tools, metrics
+from todo_mcp.storage import FileStorage
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = metrics.Histogram(buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 3.0):
+        hist.observe(value)
+    assert hist.to_dict() == {"count": 4, "sum": 3.065, "buckets": {"0.01": 2, "0.1": 3, "+Inf": 4}}
+
+
+def test_call_tool_records_phases_and_storage_io(tmp_path):
+    path = tmp_path / "tasks.json"
+    mcp_tools._storage = FileStorage(path)
+    mcp_tools._invalidate()
+    metrics.reset()
+
+    mcp.call_tool("create_task", {"task_id": "a", "title": "A"})
+    mcp_tools._invalidate()  # the next call has to load the store again
+    mcp.call_tool("get_task_status", {"task_id": "a"})
+    for bad in ({"task_id": "missing"}, {}):
+        try:
+            mcp.call_tool("get_task_status", bad)
+        except Exception:
+            pass
+
+    snap = mcp.call_tool("get_metrics", {})
+    create, status = snap["tools"]["create_task"], snap["tools"]["get_task_status"]
+    assert (create["calls"], create["errors"]) == (1, 0)
+    assert set(create["latency"]) == {"total", "load", "handler", "save"}
+    assert (status["calls"], status["errors"]) == (3, 2)
+    assert status["latency"]["load"]["count"] == 1
+    # the schema rejected the last call before the handler ran
+    assert status["latency"]["handler"]["count"] == 2
+    assert snap["counters"]["storage_bytes_written"] == path.stat().st_size
+    assert snap["counters"]["storage_bytes_read"] == path.stat().st_size
+    assert snap["histograms"]["storage_parse"]["count"] == 1
+
+    out = tmp_path / "metrics.prom"
+    metrics.write_prometheus(out)
+    text = out.read_text()
+    assert 'todo_mcp_tool_calls_total{tool="get_task_status"} 3' in text
+    assert 'todo_mcp_tool_errors_total{tool="get_task_status"} 2' in text
+    assert 'todo_mcp_tool_seconds_count{tool="create_task",phase="save"} 1' in text
+    assert 'todo_mcp_tool_seconds_bucket{tool="create_task",phase="total",le="+Inf"} 1' in text
+    assert "todo_mcp_storage_parse_seconds_count 1" in text
@@ -0,0 +1,73 @@
+import json
+from io import StringIO
+
+import pytest
+
+from todo_mcp import mcp, mcp_tools
+from todo_mcp.schema import ToolInputError, compile_schema
+from todo_mcp.storage import FileStorage
+
+
+def test_compiled_schema_names_the_failing_field():
+    validate = compile_schema(
+        {
+            "type": "object",
+            "properties": {
+                "limit": {"type": "integer", "minimum": 1},
+                "tasks": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"task_id": {"type": "string"}, "mode": {"enum": ["a", "b"]}},
+                        "required": ["task_id"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["tasks"],
+        }
+    )
+    validate({"tasks": [{"task_id": "x", "mode": "a"}], "limit": 3, "extra": "ok"})
+    cases = [
+        ([], "", "expected object, got list"),
+        ({}, "tasks", "is required"),
+        ({"tasks": [{"task_id": "x"}, {"task_id": 2}]}, "tasks[1].task_id", "expected string, got int"),
+        ({"tasks": [{"task_id": "x", "other": 1}]}, "tasks[0].other", "is not allowed"),
+        ({"tasks": [{"task_id": "x", "mode": "c"}]}, "tasks[0].mode", "must be one of ['a', 'b']"),
+        ({"tasks": [], "limit": True}, "limit", "expected integer, got bool"),
+        ({"tasks": [], "limit": 0}, "limit", "must be at least 1"),
+    ]
+    for value, field, message in cases:
+        with pytest.raises(ToolInputError) as err:
+            validate(value)
+        assert (err.value.field, err.value.message) == (field, message)
+
+
+def test_bad_input_is_rejected_before_the_store_loads(tmp_path, monkeypatch):
+    storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._storage = storage
+    mcp_tools._invalidate()
+    monkeypatch.setattr(storage, "load", lambda: pytest.fail("store loaded for bad input"))
+
+    with pytest.raises(ToolInputError) as err:
+        mcp.call_tool("create_task", {"task_id": "a", "title": 5})
+    assert err.value.field == "title"
+
+    lines = [
+        {"id": 1, "tool": "create_task", "input": {"task_id": "a"}},
+        {"atomic": True, "batch": [{"tool": "get_ready_tasks", "input": {}}, {"tool": "next_tasks", "input": {"limit": "3"}}]},
+    ]
+    out_stream = StringIO()
+    mcp.serve_stdin(stdout=out_stream, stdin=StringIO("".join(json.dumps(line) + "\n" for line in lines)))
+    replies = [json.loads(line) for line in out_stream.getvalue().splitlines()[1:]]
+    assert replies[0] == {"id": 1, "error": "title: is required", "field": "title"}
+    assert replies[1]["index"] == 1 and replies[1]["field"] == "limit"
+
+
+def test_every_limit_is_at_least_one():
+    limited = [spec for spec in mcp.list_tools() if "limit" in spec.input_schema.get("properties", {})]
+    assert len(limited) >= 6
+    for spec in limited:
+        with pytest.raises(ToolInputError) as err:
+            mcp.call_tool(spec.name, {"limit": -1, "task_id": "a", "query": "x"})
+        assert (err.value.field, err.value.message) == ("limit", "must be at least 1")
@@ -0,0 +1,60 @@
+import sys
+
+from todo_mcp import mcp, mcp_tools
+from todo_mcp.search import SearchIndex, tokenize
+from todo_mcp.storage import FileStorage
+from todo_mcp.tasks import Task, TaskManager
+
+
+def test_tokenize_and_prefix_ranking():
+    assert tokenize("Fix the HTML-export, v2!") == ["fix", "the", "html", "export", "v2"]
+    index = SearchIndex()
+    index.update("a", "Export tasks to HTML")
+    index.update("b", "Import tasks", {"notes": "html export later", "n": 3})
+    index.update("c", "Exporter cleanup")
+    # title hits outrank metadata hits, exact tokens outrank prefixes
+    assert [tid for tid, _ in index.search("export")] == ["a", "c", "b"]
+    assert [tid for tid, _ in index.search("html exp")] == ["a", "b"]
+    assert index.search("tasks nothing") == []
+
+    index.update("c", "Renamed")
+    index.remove("a")
+    assert [tid for tid, _ in index.search("export")] == ["b"]
+    assert index._vocab == sorted(index._postings)
+
+
+def test_manager_keeps_index_current():
+    mgr = TaskManager()
+    mgr.add_task(Task(id="a", title="Write docs"))
+    assert [t.id for t, _ in mgr.search("doc")] == ["a"]
+    mgr.add_task(Task(id="b", title="Review", metadata={"area": "docs"}))
+    mgr.apply_batch([Task(id="c", title="Docstring lint")])
+    # the rarer token ranks higher
+    assert [t.id for t, _ in mgr.search("doc")] == ["c", "a", "b"]
+    mgr.tasks["a"].title = "Write tests"
+    mgr.touch("a")
+    mgr.mark_complete("c")
+    mgr.detach(["c"])
+    assert [t.id for t, _ in mgr.search("doc")] == ["b"]
+
+
+def test_search_tool_persists_index(tmp_path, monkeypatch, capsys):
+    mcp_tools._storage = FileStorage(tmp_path / "tasks.json")
+    mcp_tools._invalidate()
+    mcp.call_tool("create_task", {"task_id": "a", "title": "Parse config files"})
+    mcp.call_tool("create_task", {"task_id": "b", "title": "Ship", "metadata": {"notes": "after config"}})
+    assert [r["id"] for r in mcp.call_tool("search_tasks", {"query": "config"})] == ["a", "b"]
+    assert (tmp_path / "tasks.json.search.json").exists()
+
+    # a fresh process reuses the saved index instead of rebuilding it
+    mcp_tools._invalidate()
+
+    def no_build(tasks):
+        raise AssertionError("index rebuilt")
+
+    monkeypatch.setattr(SearchIndex, "build", staticmethod(no_build))
+    monkeypatch.setattr(sys, "argv", ["todo-mcp", "search", "pars"])
+    from todo_mcp.cli import main
+
+    assert main() == 0
+    assert "a  [READY] Parse config files" in capsys.readouterr().out
@@ -1,11 +1,10 @@
-import os
 import json
-from pathlib import Path
+import sys
 
 import pytest
 
-from todo_mcp.tasks import Task, TaskManager, Status
-from todo_mcp.storage import FileStorage
+from todo_mcp.tasks import Task, TaskManager, Status, CircularDependencyError, TaskNotFoundError
+from todo_mcp.storage import FileStorage, JournalStorage, ShardedStorage, SqliteStorage, StoreConflictError
 
 
 def test_storage_roundtrip(tmp_path):
@@ -28,3 +27,333 @@ def test_storage_roundtrip(tmp_path):
     assert mgr2.tasks["a"].title == "A"
     assert mgr2.tasks["b"].dependencies == {"a"}
     assert mgr2.tasks["a"].metadata.get("foo") == "bar"
+
+
+def test_journal_appends_and_replays(tmp_path):
+    storage_file = tmp_path / "tasks.json"
+    storage = JournalStorage(storage_file)
+    mgr = TaskManager()
+    mgr.add_task(Task(id="a", title="A"))
+    mgr.add_task(Task(id="b", title="B"))
+    storage.save(mgr)  # first save of a fresh manager writes a snapshot
+    assert not storage.journal_path.exists()
+
+    mgr = storage.load()
+    mgr.add_dependency("b", "a")
+    storage.save(mgr)
+    mgr.mark_complete("a")
+    storage.save(mgr)
+
+    # snapshot untouched, only the changed tasks went to the journal
+    assert json.loads(storage_file.read_text())["b"]["dependencies"] == []
+    records = [json.loads(line) for line in storage.journal_path.read_text().splitlines()]
+    assert [r["task"]["id"] for r in records] == ["a", "b", "a", "b"]
+
+    # a torn trailing record from an interrupted append is ignored
+    with storage.journal_path.open("a") as f:
+        f.write('{"op": "put", "task": {"id"')
+    mgr2 = JournalStorage(storage_file).load()
+    assert mgr2.tasks["a"].status == Status.COMPLETED
+    assert mgr2.tasks["b"].status == Status.READY
+    assert mgr2.tasks["b"].dependencies == {"a"}
+
+
+def test_journal_compaction(tmp_path):
+    storage_file = tmp_path / "tasks.json"
+    storage = JournalStorage(storage_file, compact_after=3)
+    mgr = storage.load()
+    for i in range(3):
+        mgr.add_task(Task(id=f"t{i}", title=f"T{i}"))
+        storage.save(mgr)
+    storage.compact_in_background().join()
+
+    assert not storage.journal_path.exists()
+    data = json.loads(storage_file.read_text())
+    assert sorted(data) == ["t0", "t1", "t2"]
+    assert sorted(JournalStorage(storage_file).load().tasks) == ["t0", "t1", "t2"]
+
+
+def test_sqlite_roundtrip_and_incremental_save(tmp_path):
+    db = SqliteStorage(tmp_path / "tasks.db")
+    assert db._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    mgr = TaskManager()
+    for tid in ("a", "b", "p"):
+        mgr.add_task(Task(id=tid, title=tid.upper()))
+    mgr.add_dependency("b", "a")
+    mgr.add_subtask("p", "a")
+    mgr.tasks["a"].metadata["foo"] = "bar"
+    db.save(mgr)
+
+    mgr2 = db.load()
+    assert mgr2.tasks["b"].dependencies == {"a"}
+    assert mgr2.tasks["a"].dependents == {"b"}
+    assert mgr2.tasks["p"].subtasks == {"a"} and mgr2.tasks["a"].parent == "p"
+    assert mgr2.tasks["a"].metadata == {"foo": "bar"}
+
+    version = db.signature()
+    mgr2.mark_complete("a")
+    assert mgr2.dirty == {"a", "b", "p"}  # p rolls up, b unblocks
+    db.save(mgr2)
+    assert db.signature() == version + 1
+    assert db.ready_task_ids() == ["b"]
+    assert db.get_task("a").status == Status.COMPLETED
+
+
+def test_sqlite_targeted_add_dependency(tmp_path):
+    db = SqliteStorage(tmp_path / "tasks.db")
+    mgr = TaskManager()
+    for tid in ("a", "b", "c"):
+        mgr.add_task(Task(id=tid, title=tid))
+    db.save(mgr)
+
+    db.add_dependency("b", "a")
+    db.add_dependency("c", "b")
+    assert db.get_task("b").status == Status.BLOCKED
+    assert db.get_task("a").dependents == {"b"}
+    with pytest.raises(CircularDependencyError):
+        db.add_dependency("a", "c")
+    with pytest.raises(TaskNotFoundError):
+        db.add_dependency("a", "missing")
+    assert db.load().tasks["c"].dependencies == {"b"}
+
+
+def test_tools_use_sqlite_queries_without_a_resident_manager(tmp_path, monkeypatch):
+    from todo_mcp import mcp, mcp_tools
+
+    db = SqliteStorage(tmp_path / "tasks.db")
+    mgr = TaskManager()
+    for tid in ("a", "b"):
+        mgr.add_task(Task(id=tid, title=tid))
+    db.save(mgr)
+
+    mcp_tools._storage = SqliteStorage(tmp_path / "tasks.db")  # cold start
+    monkeypatch.setattr(SqliteStorage, "load", lambda self: pytest.fail("full load"))
+    assert mcp.call_tool("get_ready_tasks", {}) == ["a", "b"]
+    assert mcp.call_tool("add_dependency", {"task_id": "b", "depends_on": "a"}) == {"task_id": "b", "depends_on": "a"}
+    assert mcp.call_tool("get_task_status", {"task_id": "b"})["status"] == "BLOCKED"
+    assert mcp.call_tool("get_ready_tasks", {}) == ["a"]
+    with pytest.raises(TaskNotFoundError):
+        mcp.call_tool("get_task_status", {"task_id": "missing"})
+    with pytest.raises(TaskNotFoundError):
+        mcp.call_tool("add_dependency", {"task_id": "a", "depends_on": "missing"})
+
+
+def test_migrate_sqlite_cli(tmp_path, monkeypatch, capsys):
+    src = tmp_path / "tasks.json"
+    mgr = TaskManager()
+    mgr.add_task(Task(id="a", title="A"))
+    FileStorage(src).save(mgr)
+    dest = tmp_path / "tasks.db"
+    monkeypatch.setattr(sys, "argv", ["todo-mcp", "migrate-sqlite", str(src), str(dest)])
+    from todo_mcp.cli import main
+
+    assert main() == 0
+    assert "Migrated 1 tasks" in capsys.readouterr().out
+    assert list(SqliteStorage(dest).load().tasks) == ["a"]
+
+    # changes still only in a journal are migrated too
+    journaled = JournalStorage(src)
+    mgr = journaled.load()
+    mgr.add_task(Task(id="b", title="B"))
+    journaled.save(mgr)
+    assert journaled.journal_path.exists()
+    dest = tmp_path / "journaled.db"
+    monkeypatch.setattr(sys, "argv", ["todo-mcp", "migrate-sqlite", str(src), str(dest)])
+    assert main() == 0
+    assert sorted(SqliteStorage(dest).load().tasks) == ["a", "b"]
+
+
+def test_file_storage_reencodes_only_dirty_tasks(tmp_path, monkeypatch):
+    storage_file = tmp_path / "tasks.json"
+    storage = FileStorage(storage_file)
+    mgr = TaskManager()
+    for tid in ("a", "b", "c"):
+        mgr.add_task(Task(id=tid, title=tid.upper()))
+    storage.save(mgr)
+
+    mgr = storage.load()
+    storage.save(mgr)  # first save after load encodes everything once
+    encoded = []
+    real_encode = storage.codec.encode_entry
+    monkeypatch.setattr(storage.codec, "encode_entry", lambda tid, d: encoded.append(tid) or real_encode(tid, d))
+    mgr.add_dependency("c", "b")
+    mgr.tasks["a"].metadata["note"] = "line1\nline2"
+    mgr.touch("a")
+    storage.save(mgr)
+
+    assert sorted(encoded) == ["a", "b", "c"]
+    # spliced output is byte-for-byte what json.dump(indent=2) would write
+    expected = {tid: t.to_dict() for tid, t in mgr.tasks.items()}
+    assert storage_file.read_text() == json.dumps(expected, indent=2)
+    assert storage.load().tasks["a"].metadata["note"] == "line1\nline2"
+
+
+@pytest.mark.parametrize("codec", ["json", "compact-json", "msgpack"])
+def test_codecs_roundtrip_and_autodetect(tmp_path, codec):
+    if codec == "msgpack":
+        pytest.importorskip("msgpack")
+    storage_file = tmp_path / "tasks.json"
+    storage = FileStorage(storage_file, codec=codec)
+    mgr = TaskManager()
+    for i in range(20):  # enough entries to need a 16-bit msgpack map header
+        mgr.add_task(Task(id=f"t{i}", title=f"T{i}"))
+    mgr.add_dependency("t1", "t0")
+    storage.save(mgr)
+
+    # a default storage detects the format from the content
+    mgr2 = FileStorage(storage_file).load()
+    assert len(mgr2.tasks) == 20
+    assert mgr2.tasks["t1"].dependencies == {"t0"}
+    if codec == "compact-json":
+        assert b"\n" not in storage_file.read_bytes()
+
+
+def test_convert_store_cli(tmp_path, monkeypatch, capsys):
+    pytest.importorskip("msgpack")
+    src = tmp_path / "tasks.json"
+    mgr = TaskManager()
+    mgr.add_task(Task(id="a", title="A"))
+    FileStorage(src).save(mgr)
+    dest = tmp_path / "tasks.msgpack"
+    monkeypatch.setattr(sys, "argv", ["todo-mcp", "convert-store", str(src), str(dest)])
+    from todo_mcp.cli import main
+
+    assert main() == 0
+    assert "Converted 1 tasks" in capsys.readouterr().out
+    assert FileStorage(dest).codec.name == "msgpack"
+    assert list(FileStorage(dest).load().tasks) == ["a"]
+
+
+def test_forward_edges_mode_derives_dependents(tmp_path):
+    storage_file = tmp_path / "tasks.json"
+    storage = FileStorage(storage_file, forward_edges=True)
+    mgr = TaskManager()
+    for tid in ("a", "b", "c"):
+        mgr.add_task(Task(id=tid, title=tid))
+    mgr.add_dependency("b", "a")
+    mgr.add_dependency("c", "a")
+    storage.save(mgr)
+
+    data = json.loads(storage_file.read_text())
+    assert all("dependents" not in t for t in data.values())
+    mgr2 = FileStorage(storage_file).load()
+    assert mgr2.tasks["a"].dependents == {"b", "c"}
+    assert mgr2.check_edges() == []
+
+
+def test_check_edges_cli_repairs_hand_edits(tmp_path, monkeypatch, capsys):
+    storage_file = tmp_path / "tasks.json"
+    mgr = TaskManager()
+    for tid in ("a", "b", "c"):
+        mgr.add_task(Task(id=tid, title=tid))
+    mgr.add_dependency("b", "a")
+    FileStorage(storage_file).save(mgr)
+    data = json.loads(storage_file.read_text())
+    data["a"]["dependents"].append("c")  # c does not depend on a
+    data["b"]["dependencies"].append("ghost")
+    storage_file.write_text(json.dumps(data))
+
+    from todo_mcp.cli import main
+
+    monkeypatch.setattr(sys, "argv", ["todo-mcp", "--store", str(storage_file), "check-edges"])
+    assert main() == 1
+    out = capsys.readouterr().out
+    assert "a lists dependent c but c does not depend on it" in out
+    assert "b depends on missing task ghost" in out
+
+    monkeypatch.setattr(sys, "argv", ["todo-mcp", "--store", str(storage_file), "check-edges", "--repair"])
+    assert main() == 0
+    mgr2 = FileStorage(storage_file).load()
+    assert mgr2.check_edges() == []
+    assert mgr2.tasks["a"].dependents == {"b"}
+    assert mgr2.tasks["b"].dependencies == {"a"}
+
+
+def test_sharded_storage_routes_by_workspace(tmp_path):
+    root = tmp_path / "shards"
+    storage = ShardedStorage(root)
+    mgr = TaskManager()
+    for tid, ws in (("a1", "alpha"), ("a2", "alpha"), ("b1", "beta"), ("loose", None)):
+        task = Task(id=tid, title=tid)
+        if ws:
+            task.metadata["workspace"] = ws
+        mgr.add_task(task)
+    mgr.add_dependency("b1", "a1")  # crosses shards
+    storage.save(mgr)
+
+    assert sorted(p.name for p in root.iterdir()) == ["alpha.json", "beta.json", "default.json", "index.json", "index.json.lock"]
+    assert storage.dashboard() == {"alpha": {"READY": 2}, "beta": {"BLOCKED": 1}, "default": {"READY": 1}}
+
+    # a single workspace loads only its shard and sees a1 through the index
+    beta = storage.workspace("beta")
+    mgr_b = beta.load()
+    assert list(mgr_b.tasks) == ["b1"]
+    assert mgr_b.external == {"a1": Status.READY}
+
+    # completing a1 elsewhere unblocks b1 on its next load
+    mgr_a = storage.workspace("alpha").load()
+    mgr_a.mark_complete("a1")
+    storage.workspace("alpha").save(mgr_a)
+    assert beta.load().tasks["b1"].status == Status.READY
+
+    full = ShardedStorage(root).load()
+    assert full.tasks["a1"].dependents == {"b1"}
+    assert full.tasks["b1"].status == Status.READY
+
+
+def test_sharded_save_only_rewrites_changed_shards(tmp_path):
+    storage = ShardedStorage(tmp_path)
+    mgr = TaskManager()
+    for tid, ws in (("a", "alpha"), ("b", "beta")):
+        mgr.add_task(Task(id=tid, title=tid, metadata={"workspace": ws}))
+    storage.save(mgr)
+    mgr = storage.load()
+    beta_file = tmp_path / "beta.json"
+    beta_file.write_text(beta_file.read_text())  # restamp so a rewrite would show
+    stamp = beta_file.stat().st_mtime_ns
+
+    mgr.mark_complete("a")
+    storage.save(mgr)
+    assert beta_file.stat().st_mtime_ns == stamp
+    assert storage.dashboard()["alpha"] == {"COMPLETED": 1}
+
+
+def test_sharded_counts_follow_cross_shard_edges(tmp_path):
+    storage = ShardedStorage(tmp_path)
+    mgr = TaskManager()
+    for tid, ws in (("a", "alpha"), ("b", "beta"), ("c", "beta")):
+        mgr.add_task(Task(id=tid, title=tid, metadata={"workspace": ws}))
+    mgr.add_dependency("b", "a")
+    mgr.add_dependency("c", "b")  # same shard, stays blocked on b
+    storage.save(mgr)
+    assert storage.dashboard()["beta"] == {"BLOCKED": 2}
+
+    # alpha alone cannot see b, but the index still has to move it to READY
+    alpha = storage.workspace("alpha")
+    mgr_a = alpha.load()
+    mgr_a.mark_complete("a")
+    alpha.save(mgr_a)
+    assert storage.dashboard() == {"alpha": {"COMPLETED": 1}, "beta": {"READY": 1, "BLOCKED": 1}}
+
+    full = ShardedStorage(tmp_path).load()
+    assert {tid: t.status for tid, t in full.tasks.items()} == {
+        "a": Status.COMPLETED, "b": Status.READY, "c": Status.BLOCKED,
+    }
+
+
+def test_sqlite_lock_timeout_is_a_store_conflict(tmp_path):
+    import sqlite3
+
+    db = SqliteStorage(tmp_path / "tasks.db", busy_timeout=0.05)
+    mgr = db.load()
+    mgr.add_task(Task(id="a", title="a"))
+    holder = sqlite3.connect(str(tmp_path / "tasks.db"), isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(StoreConflictError):
+            db.save(mgr)
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    db.save(mgr)  # the retry goes through once the lock is gone
+    assert list(SqliteStorage(tmp_path / "tasks.db").load().tasks) == ["a"]
@@ -36,3 +36,353 @@ def test_subtasks_complete_parent():
     assert mgr.tasks["p"].status != Status.COMPLETED
     mgr.mark_complete("s2")
     assert mgr.tasks["p"].status == Status.COMPLETED
+
+
+def test_dirty_tracking_covers_propagated_changes():
+    mgr = TaskManager()
+    for tid in ("a", "b", "c", "p"):
+        mgr.add_task(Task(id=tid, title=tid))
+    mgr.add_dependency("b", "a")
+    mgr.add_subtask("p", "a")
+    mgr.dirty.clear()
+
+    mgr.mark_complete("a")
+    # b unblocked and p rolled up, c untouched
+    assert mgr.dirty == {"a", "b", "p"}
+    mgr.dirty.clear()
+    mgr.touch("c")
+    assert mgr.dirty == {"c"}
+
+
+def test_task_is_compact_and_roundtrips():
+    a = Task(id="a", title="A")
+    b = Task(id="b", title="B")
+    assert not hasattr(a, "__dict__")
+    # untouched containers are shared placeholders, not per-task objects
+    assert a.dependencies is b.dependencies
+    assert a._metadata is None
+
+    a.add_dependency("b")
+    a.metadata["k"] = "v"
+    assert a.dependencies == {"b"} and b.dependencies == frozenset()
+
+    data = a.to_dict()
+    assert data["dependencies"] == ["b"] and data["metadata"] == {"k": "v"}
+    assert data["dependents"] == [] and data["agent_context"] == {}
+    clone = Task.from_dict(data)
+    assert clone == a
+    assert Task.from_dict(Task(id="x", title="X").to_dict())._dependents is b._dependents
+
+    # edge sets are read-only whether or not they were ever written
+    for task in (a, b):
+        with pytest.raises(AttributeError):
+            task.dependencies.add("c")
+    assert a.dependencies == {"b"} and not b.dependencies
+
+
+def test_ready_index_tracks_full_scan():
+    import random
+
+    rng = random.Random(7)
+    mgr = TaskManager()
+    ids = []
+    for i in range(200):
+        tid = f"t{i}"
+        mgr.add_task(Task(id=tid, title=tid))
+        ids.append(tid)
+        for dep in rng.sample(ids[:-1], min(len(ids) - 1, rng.randint(0, 3))):
+            mgr.add_dependency(tid, dep)  # edges only point backwards, so no cycles
+        if rng.random() < 0.4:
+            mgr.mark_complete(rng.choice(ids))
+        scanned = {t.id for t in mgr.tasks.values() if t.status == Status.READY}
+        assert {t.id for t in mgr.get_ready_tasks()} == scanned
+    for tid, task in mgr.tasks.items():
+        if task.status != Status.COMPLETED:
+            blocked = any(mgr.tasks[d].status != Status.COMPLETED for d in task.dependencies)
+            assert task.status == (Status.BLOCKED if blocked else Status.READY)
+
+    def chain(tid):
+        task = mgr.tasks[tid]
+        if task.status == Status.COMPLETED:
+            return 0
+        return 1 + max((chain(d) for d in task.dependents), default=0)
+
+    ranked = [t.id for t in mgr.next_tasks(len(mgr.tasks))]
+    assert sorted(ranked) == sorted(t.id for t in mgr.get_ready_tasks())
+    assert [mgr.critical_path(tid) for tid in ranked] == sorted((chain(tid) for tid in ranked), reverse=True)
+
+    # a manager filled directly (as storage backends do) indexes lazily
+    clone = TaskManager()
+    clone.tasks = {tid: Task.from_dict(t.to_dict()) for tid, t in mgr.tasks.items()}
+    assert [t.id for t in clone.get_ready_tasks()] == [t.id for t in clone.tasks.values() if t.status == Status.READY]
+
+
+def test_parent_rollup_unblocks_its_dependents():
+    mgr = TaskManager()
+    for tid in ("p", "s", "after"):
+        mgr.add_task(Task(id=tid, title=tid))
+    mgr.add_subtask("p", "s")
+    mgr.add_dependency("after", "p")
+    mgr.mark_complete("s")
+    assert mgr.tasks["p"].status == Status.COMPLETED
+    assert [t.id for t in mgr.get_ready_tasks()] == ["after"]
+
+
+def test_cycle_check_matches_full_search():
+    import random
+
+    def reaches(mgr, start, goal):
+        stack, seen = [start], set()
+        while stack:
+            cur = stack.pop()
+            if cur == goal:
+                return True
+            if cur not in seen:
+                seen.add(cur)
+                stack.extend(mgr.tasks[cur].dependencies)
+        return False
+
+    rng = random.Random(12)
+    mgr = TaskManager()
+    ids = [f"t{i}" for i in range(60)]
+    for tid in ids:
+        mgr.add_task(Task(id=tid, title=tid))
+    for _ in range(400):
+        a, b = rng.choice(ids), rng.choice(ids)
+        if reaches(mgr, b, a):
+            with pytest.raises(CircularDependencyError):
+                mgr.add_dependency(a, b)
+        else:
+            mgr.add_dependency(a, b)
+        order = mgr._topo_order()
+        assert all(order[d] < order[tid] for tid in ids for d in mgr.tasks[tid].dependencies)
+
+
+def test_apply_batch_is_atomic():
+    mgr = TaskManager()
+    mgr.add_task(Task(id="a", title="A"))
+    mgr.dirty.clear()
+    tasks = [Task(id="b", title="B", dependencies={"a"}), Task(id="c", title="C")]
+    # c -> b -> a plus a -> c closes a loop through an existing task
+    with pytest.raises(CircularDependencyError):
+        mgr.apply_batch(tasks, [("c", "b"), ("a", "c")])
+    assert list(mgr.tasks) == ["a"] and not mgr.dirty and mgr.tasks["a"].dependents == set()
+
+    mgr.apply_batch(tasks, [("c", "b")], [("b", "c")])
+    assert mgr.tasks["a"].dependents == {"b"} and mgr.tasks["b"].dependents == {"c"}
+    assert mgr.tasks["c"].parent == "b"
+    assert [t.id for t in mgr.get_ready_tasks()] == ["a"]
+    assert mgr.dirty == {"a", "b", "c"}
+    # the order rebuilt after the batch still rejects cycles
+    with pytest.raises(CircularDependencyError):
+        mgr.add_dependency("a", "c")
+    mgr.mark_complete("a")
+    assert [t.id for t in mgr.get_ready_tasks()] == ["b"]
+
+
+def test_next_tasks_ranks_ready_queue():
+    mgr = TaskManager()
+    for tid, meta in [
+        ("low", {"priority": 1}),
+        ("high", {"priority": 5}),
+        ("soon", {"priority": 1, "due": "2026-01-01"}),
+        ("later", {"priority": 1, "due": "2026-06-01"}),
+        ("head", {}),
+        ("mid", {}),
+        ("tail", {}),
+        ("plain", {}),
+    ]:
+        mgr.add_task(Task(id=tid, title=tid, metadata=meta))
+    # head unblocks a two-task chain, so it outranks plain
+    mgr.add_dependency("mid", "head")
+    mgr.add_dependency("tail", "mid")
+    assert mgr.critical_path("head") == 3
+    assert [t.id for t in mgr.next_tasks(10)] == ["high", "soon", "later", "low", "head", "plain"]
+    assert [t.id for t in mgr.next_tasks(2)] == ["high", "soon"]
+
+    mgr.mark_complete("high")
+    mgr.mark_complete("head")
+    assert mgr.critical_path("head") == 0 and mgr.critical_path("mid") == 2
+    assert [t.id for t in mgr.next_tasks(10)] == ["soon", "later", "low", "mid", "plain"]
+
+    mgr.tasks["plain"].metadata["priority"] = 9
+    mgr.touch("plain")
+    mgr.add_dependency("low", "later")
+    assert [t.id for t in mgr.next_tasks(3)] == ["plain", "soon", "later"]
+    assert mgr.critical_path("later") == 2
+
+
+def test_rollup_cascades_up_the_parent_chain():
+    mgr = TaskManager()
+    for tid in ("epic", "story", "other", "t1", "t2"):
+        mgr.add_task(Task(id=tid, title=tid))
+    mgr.add_subtask("epic", "story")
+    mgr.add_subtask("epic", "other")
+    mgr.add_subtask("story", "t1")
+    mgr.add_subtask("story", "t2")
+    mgr.mark_complete("other")
+    mgr.mark_complete("t1")
+    assert mgr.progress("story") == (1, 2) and mgr.progress("epic") == (1, 2)
+    assert mgr.progress("t1") == (0, 0)
+
+    mgr.mark_complete("t2")
+    assert mgr.tasks["story"].status == Status.COMPLETED
+    assert mgr.tasks["epic"].status == Status.COMPLETED
+    assert mgr.progress("epic") == (2, 2)
+    assert mgr.tasks["epic"].completed_at == mgr.tasks["t2"].completed_at
+
+
+def test_completing_again_keeps_the_completion_time():
+    mgr = TaskManager()
+    mgr.add_task(Task(id="a", title="a"))
+    mgr.mark_complete("a")
+    mgr.tasks["a"].completed_at = 1.0  # long ago
+    mgr.dirty.clear()
+    mgr.mark_complete("a")
+    assert mgr.tasks["a"].completed_at == 1.0
+    assert not mgr.dirty
+
+
+def test_blockers_and_impact_are_memoized_per_subgraph():
+    mgr = TaskManager()
+    for tid in ("a", "b", "c", "d", "x", "y"):
+        mgr.add_task(Task(id=tid, title=tid))
+    mgr.add_dependency("b", "a")
+    mgr.add_dependency("c", "b")
+    mgr.add_dependency("d", "c")
+    mgr.add_dependency("y", "x")
+    assert mgr.blockers("d") == {"c": 1, "b": 2, "a": 3}
+    assert mgr.blockers("d", depth=2) == {"c": 1, "b": 2}
+    assert mgr.impact("a", limit=2) == {"b": 1, "c": 2}
+    assert mgr.impact("x") == {"y": 1}
+
+    mgr.mark_complete("a")
+    # walks that reached a are gone; walks that did not keep their entries
+    assert set(mgr._closure_cache[0]) == {("blockers", "d", 2, None), ("impact", "x", None, None)}
+    assert mgr.blockers("d") == {"c": 1, "b": 2}
+    mgr.add_dependency("c", "x")
+    assert mgr.blockers("d") == {"c": 1, "b": 2, "x": 2}
+    assert mgr.impact("x") == {"y": 1, "c": 1, "d": 2}
+
+
+def test_claim_renew_release_and_reclaim():
+    from todo_mcp.tasks import LeaseError
+
+    mgr = TaskManager()
+    for tid in ("a", "b", "c"):
+        mgr.add_task(Task(id=tid, title=tid))
+    mgr.add_dependency("c", "a")
+    first = mgr.claim("w1", 10, now=100)
+    second = mgr.claim("w2", 10, now=100)
+    assert (first.id, second.id) == ("a", "b")
+    assert first.status == Status.IN_PROGRESS and first.agent_context["lease"] == {"holder": "w1", "expires": 110}
+    assert mgr.claim("w3", 10, now=100) is None and mgr.get_ready_tasks() == []
+
+    with pytest.raises(LeaseError):
+        mgr.renew("a", "w2", 10)
+    assert mgr.renew("a", "w1", 50, now=105) == 155
+    # b's lease ran out, a's was renewed
+    assert mgr.reclaim_expired(now=120) == ["b"]
+    assert mgr.tasks["b"].status == Status.READY and not mgr.tasks["b"].agent_context
+    assert mgr.claim("w3", 10, now=120).id == "b"
+
+    mgr.release("b", "w3")
+    assert [t.id for t in mgr.get_ready_tasks()] == ["b"]
+    mgr.mark_complete("a")
+    assert mgr.tasks["a"].agent_context == {} and mgr.tasks["c"].status == Status.READY
+    assert mgr.reclaim_expired(now=1000) == []
+
+
+def test_query_uses_secondary_indexes():
+    mgr = TaskManager()
+    for i in range(6):
+        mgr.add_task(Task(id=f"t{i}", title=f"T{i}", metadata={"owner": "ann" if i % 2 else "bob", "n": i % 3}))
+    mgr.add_task(Task(id="p", title="P"))
+    mgr.add_subtask("p", "t1")
+    mgr.add_subtask("p", "t2")
+    mgr.add_dependency("t5", "t4")
+    mgr.add_dependency("t5", "t3")
+    assert mgr.query(metadata={"owner": "ann"}) == ["t1", "t3", "t5"]
+    assert mgr.query(status=Status.BLOCKED) == ["t5"]
+    assert mgr.query(parent="p", metadata={"owner": "bob"}) == ["t2"]
+    assert mgr.query(dependency_of="t5", metadata={"owner": "ann"}) == ["t3"]
+    # 1 and True are different values
+    assert mgr.query(metadata={"n": 1}) == ["t1", "t4"] and mgr.query(metadata={"n": True}) == []
+
+    mgr.mark_complete("t3")
+    mgr.mark_complete("t4")
+    mgr.tasks["t0"].metadata["owner"] = "ann"
+    mgr.touch("t0")
+    mgr.add_subtask("p", "t0")
+    assert mgr.query(status=Status.READY, metadata={"owner": "ann"}) == ["t0", "t1", "t5"]
+    assert mgr.query(parent="p") == ["t0", "t1", "t2"]
+    mgr.detach(["t3"])
+    assert mgr.query(status=Status.COMPLETED) == ["t4"]
+
+
+def test_change_feed_and_carry_over():
+    mgr = TaskManager()
+    mgr.add_task(Task(id="a", title="A"))
+    mgr.add_task(Task(id="b", title="B"))
+    mgr.add_dependency("b", "a")
+    events, reset = mgr.events_since(0)
+    assert not reset
+    assert [(e["type"], e["task_id"]) for e in events] == [
+        ("created", "a"),
+        ("status_changed", "a"),
+        ("created", "b"),
+        ("status_changed", "b"),
+        ("edge_added", "b"),
+        ("status_changed", "b"),
+    ]
+    assert [e["seq"] for e in events] == list(range(1, 7)) and mgr.seq == 6
+    mgr.mark_complete("a")
+    ready, _ = mgr.events_since(6, statuses={"READY"})
+    assert [(e["task_id"], e["old"]) for e in ready] == [("b", "BLOCKED")]
+    assert mgr.events_since(99) == (events + mgr.events_since(6)[0], True)
+
+    # a reloaded copy continues the numbering and reports what differs
+    fresh = TaskManager()
+    fresh.tasks = {tid: Task.from_dict(t.to_dict()) for tid, t in mgr.tasks.items()}
+    fresh.tasks["c"] = Task(id="c", title="C", status=Status.READY, dependencies={"b"})
+    fresh.tasks["b"].status = Status.COMPLETED
+    fresh.carry_events(mgr)
+    news, _ = fresh.events_since(mgr.seq)
+    assert [(e["type"], e["task_id"], e.get("status")) for e in news] == [
+        ("status_changed", "b", "COMPLETED"),
+        ("created", "c", None),
+        ("edge_added", "c", None),
+        ("status_changed", "c", "READY"),
+    ]
+    fresh.rewind_events(mgr.seq)
+    assert fresh.seq == mgr.seq and fresh.events_since(mgr.seq) == ([], False)
+
+
+def test_lazy_indexes_are_complete_for_concurrent_readers():
+    import threading
+
+    mgr = TaskManager()
+    for i in range(50_000):
+        mgr.add_task(Task(id=f"t{i}", title="T", metadata={"kind": "k"}))
+    cases = [
+        ("_pending", lambda: len(mgr.get_ready_tasks())),
+        ("_by_status", lambda: len(mgr.query(status=Status.READY))),
+    ]
+    for attr, read in cases:
+        mgr.reindex()
+        unset = getattr(mgr, attr)
+        seen = []
+
+        def follow():
+            # read as soon as the builder publishes the index
+            while getattr(mgr, attr) is unset:
+                pass
+            seen.append(read())
+
+        followers = [threading.Thread(target=follow) for _ in range(4)]
+        for t in followers:
+            t.start()
+        seen.append(read())
+        for t in followers:
+            t.join()
+        assert seen == [50_000] * 5, attr
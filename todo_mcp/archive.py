@@ -0,0 +1,98 @@
+"""Cold, append-only archive for completed tasks."""
+
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+from typing import Dict, List, Set
+
+from .tasks import Task, TaskManager
+
+
+class Archive:
+    """Compressed, append-only store for tasks moved out of the hot store.
+
+    Tasks are written as JSON lines into numbered gzip segments
+    (``segment-000001.jsonl.gz``). Every append adds a new gzip member, so
+    existing bytes are never rewritten; a segment is closed once it grows past
+    ``segment_bytes``. ``ids.txt`` lists archived ids one per line, which is
+    all a load needs: archived tasks themselves are only read by :meth:`search`.
+    """
+
+    def __init__(self, directory: Path | str, segment_bytes: int = 8 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.ids_path = self.directory / "ids.txt"
+        self._ids: Set[str] = set()
+        self._ids_size = 0
+
+    def ids(self) -> Set[str]:
+        """Return the archived ids, re-reading only lines appended since last time."""
+        if not self.ids_path.exists():
+            return self._ids
+        size = self.ids_path.stat().st_size
+        if size < self._ids_size:  # replaced underneath us; start over
+            self._ids, self._ids_size = set(), 0
+        if size > self._ids_size:
+            with self.ids_path.open("rb") as f:
+                f.seek(self._ids_size)
+                chunk = f.read(size - self._ids_size)
+            # stop at the last complete line; a partial one is read next time
+            end = chunk.rfind(b"\n") + 1
+            self._ids.update(line.decode("utf-8") for line in chunk[:end].split(b"\n") if line)
+            self._ids_size += end
+        return self._ids
+
+    def attach(self, mgr: TaskManager) -> TaskManager:
+        """Let ``mgr`` resolve archived ids as completed dependencies."""
+        # a copy, so later appends do not change the manager behind its back
+        mgr.archived = frozenset(self.ids())
+        return mgr
+
+    def append(self, tasks: List[Task]) -> None:
+        """Write ``tasks`` to the current segment, then record their ids.
+
+        Tasks already archived are skipped, so replaying an archive step
+        (e.g. after a save conflict) does not duplicate them. Archived ids
+        cannot be reused by new tasks, so a listed id is always the same task.
+        """
+        archived = self.ids()
+        tasks = [t for t in tasks if t.id not in archived]
+        if not tasks:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(t.to_dict()) + "\n" for t in tasks)
+        with gzip.open(self._current_segment(), "ab") as f:
+            f.write(lines.encode("utf-8"))
+        # ids go last so an id never points at data that was not written
+        with self.ids_path.open("a", encoding="utf-8") as f:
+            f.write("".join(t.id + "\n" for t in tasks))
+
+    def search(self, query: str, limit: int = 50) -> List[Dict[str, object]]:
+        """Return archived tasks whose id, title or string metadata contain ``query``.
+
+        Matching is case-insensitive; exact id matches rank first and later
+        archive records of the same id replace earlier ones.
+        """
+        needle = query.lower()
+        hits: Dict[str, Dict[str, object]] = {}
+        for segment in self._segments():
+            with gzip.open(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    tdict = json.loads(line)
+                    haystack = [tdict["id"], tdict.get("title", "")]
+                    haystack += [v for v in (tdict.get("metadata") or {}).values() if isinstance(v, str)]
+                    if any(needle in str(h).lower() for h in haystack):
+                        hits[tdict["id"]] = tdict
+        ranked = sorted(hits.values(), key=lambda t: str(t["id"]).lower() != needle)
+        return ranked[:limit]
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob("segment-*.jsonl.gz"))
+
+    def _current_segment(self) -> Path:
+        segments = self._segments()
+        if segments and segments[-1].stat().st_size < self.segment_bytes:
+            return segments[-1]
+        return self.directory / f"segment-{len(segments) + 1:06d}.jsonl.gz"
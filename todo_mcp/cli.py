@@ -3,10 +3,12 @@
 import argparse
 import sys
 import json
+from pathlib import Path
 
 from .tasks import TaskManager, Task
-from . import mcp
+from . import mcp, metrics
 from . import mcp_tools  # ensure tools registered
+from .storage import CODECS, SqliteStorage, open_storage
 
 
 def add_ci_githooks():
@@ -48,8 +50,66 @@ def add_ci_githooks():
     return 0
 
 
+# JSONL keys that become task fields; all others go into metadata
+_ID_KEYS = ("task_id", "id", "request_id")
+_TASK_KEYS = set(_ID_KEYS) | {"title", "depends_on", "dependencies", "parent"}
+
+
+def read_import_lines(path, sequential=False):
+    """Turn a JSONL file into ``apply_batch`` task entries.
+
+    The id comes from ``task_id``, ``id`` or ``request_id`` and dependencies
+    from ``depends_on`` or ``dependencies``; any other key is kept as
+    metadata. With ``sequential`` each task also depends on the previous one.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            task_id = next((record[k] for k in _ID_KEYS if k in record), None)
+            if task_id is None:
+                raise ValueError(f"{path}:{lineno}: no task_id, id or request_id")
+            entry = {
+                "task_id": str(task_id),
+                "title": record.get("title", str(task_id)),
+                "depends_on": list(record.get("depends_on", record.get("dependencies", []))),
+                "metadata": {k: v for k, v in record.items() if k not in _TASK_KEYS},
+            }
+            if record.get("parent"):
+                entry["parent"] = record["parent"]
+            if sequential and entries:
+                entry["depends_on"].append(entries[-1]["task_id"])
+            entries.append(entry)
+    return entries
+
+
+def _open_source(path, journal=False):
+    """Open a store to copy from, with the factory ``serve`` uses.
+
+    A journal next to a file store holds changes that are not in the
+    snapshot yet, so it is replayed even without ``--journal``.
+    """
+    journal = journal or Path(path).with_suffix(".journal.jsonl").exists()
+    return open_storage(path, journal=journal)
+
+
 def main():
     parser = argparse.ArgumentParser(prog="todo-mcp")
+    parser.add_argument("--store", help="Task store path (default .todo-mcp/tasks.json)")
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="Append changes to a JSONL journal next to the store instead of rewriting it",
+    )
+    parser.add_argument("--codec", choices=sorted(CODECS), help="File format used when writing the store")
+    parser.add_argument(
+        "--forward-edges",
+        action="store_true",
+        help="Store only dependencies and rebuild dependents on load",
+    )
+    parser.add_argument("--workspace", help="Only load this workspace's shard of a sharded (directory) store")
     subparsers = parser.add_subparsers(dest="command")
 
     create_parser = subparsers.add_parser("create", help="Create a new task")
@@ -58,15 +118,63 @@ def main():
     create_parser.add_argument("--metadata", help="JSON metadata for the task")
     create_parser.add_argument("--depends-on", action="append", help="Dependencies")
 
+    p_import = subparsers.add_parser("import", help="Create tasks from a JSONL file in one batch")
+    p_import.add_argument("path")
+    p_import.add_argument("--sequential", action="store_true", help="Make each task depend on the previous line")
+
     subparsers.add_parser("tasks", help="Show dashboard of all tasks")
+    subparsers.add_parser("dashboard", help="Show task counts per workspace")
+    p_search = subparsers.add_parser("search", help="Full-text search over task titles and metadata")
+    p_search.add_argument("query")
+    p_search.add_argument("--limit", type=int, default=20)
     p_export = subparsers.add_parser("export-html", help="Export tasks to HTML file")
     p_export.add_argument("path")
 
-    subparsers.add_parser("serve", help="Start MCP stdin/stdout server")
+    p_serve = subparsers.add_parser("serve", help="Start MCP stdin/stdout server")
+    p_serve.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Handle requests concurrently and answer them as they finish (requests should carry an id)",
+    )
+    p_serve.add_argument(
+        "--workers", type=int, default=8, help="Threads for read-only calls with --async or --socket"
+    )
+    p_serve.add_argument("--metrics-file", help="Keep Prometheus text-format metrics in this file")
+    p_serve.add_argument("--metrics-interval", type=float, default=10.0, help="Seconds between metrics file rewrites")
+    serve_mode = p_serve.add_mutually_exclusive_group()
+    serve_mode.add_argument("--socket", help="Run as a daemon serving many clients on this Unix socket")
+    serve_mode.add_argument("--connect", help="Relay stdin/stdout to a daemon started with --socket")
+
+    p_archive = subparsers.add_parser("archive", help="Move old completed tasks into the cold archive")
+    p_archive.add_argument("--days", type=float, default=7, help="Only archive tasks completed this many days ago")
+    p_search_archive = subparsers.add_parser("search-archive", help="Search archived tasks")
+    p_search_archive.add_argument("query")
+    p_search_archive.add_argument("--limit", type=int, default=50)
+
+    p_convert = subparsers.add_parser("convert-store", help="Copy a store into another path, format or backend")
+    p_convert.add_argument("source")
+    p_convert.add_argument("dest", help="Target path; the extension picks the backend and default format")
+    p_convert.add_argument("--format", choices=sorted(CODECS), help="File format for the target store")
+
+    p_edges = subparsers.add_parser("check-edges", help="Report (and optionally fix) inconsistent task edges")
+    p_edges.add_argument("--repair", action="store_true", help="Rewrite the store with consistent edges")
+
+    p_migrate = subparsers.add_parser("migrate-sqlite", help="Convert a tasks.json store into a SQLite database")
+    p_migrate.add_argument("source", help="Existing JSON store, e.g. .todo-mcp/tasks.json")
+    p_migrate.add_argument("dest", help="SQLite database to create, e.g. .todo-mcp/tasks.db")
 
     subparsers.add_parser("add-ci-githooks", help="Install git hooks from hooks/")
 
     args = parser.parse_args()
+    if args.store or args.journal or args.codec or args.forward_edges or args.workspace:
+        mcp_tools._storage = open_storage(
+            args.store,
+            journal=args.journal,
+            codec=args.codec,
+            forward_edges=args.forward_edges,
+            workspace=args.workspace,
+        )
     if args.command == "create":
         payload = {"task_id": args.id, "title": args.title}
         if args.metadata:
@@ -80,18 +188,94 @@ def main():
         res = mcp.call_tool("create_task", payload)
         print(f"Created task {res['task_id']}")
         return 0
+    elif args.command == "import":
+        try:
+            entries = read_import_lines(args.path, sequential=args.sequential)
+        except (OSError, ValueError) as exc:
+            print(f"Error: {exc}")
+            return 1
+        res = mcp.call_tool("apply_batch", {"tasks": entries})
+        print(f"Imported {len(res['created'])} tasks")
+        return 0
     elif args.command == "tasks":
         tasks = mcp.call_tool("list_tasks", {})
         for t in tasks:
+            progress = f"  {t['progress']['percent']}%" if "progress" in t else ""
+            print(f"{t['id']}  [{t['status']}] {t['title']}{progress}")
+        return 0
+    elif args.command == "search":
+        for t in mcp.call_tool("search_tasks", {"query": args.query, "limit": args.limit}):
             print(f"{t['id']}  [{t['status']}] {t['title']}")
         return 0
+    elif args.command == "dashboard":
+        res = mcp.call_tool("get_dashboard", {})
+        for name, counts in sorted(res["shards"].items()):
+            summary = ", ".join(f"{status} {n}" for status, n in sorted(counts.items()))
+            print(f"{name}: {summary or 'no tasks'}")
+        print("total: " + ", ".join(f"{status} {n}" for status, n in sorted(res["totals"].items())))
+        return 0
     elif args.command == "export-html":
         res = mcp.call_tool("export_html", {"path": args.path})
         print(f"Exported to {res['path']}")
         return 0
+    elif args.command == "archive":
+        res = mcp.call_tool("archive", {"older_than_days": args.days})
+        print(f"Archived {len(res['archived'])} tasks")
+        return 0
+    elif args.command == "search-archive":
+        for t in mcp.call_tool("search_archive", {"query": args.query, "limit": args.limit}):
+            print(f"{t['id']}  [{t['status']}] {t['title']}")
+        return 0
     elif args.command == "serve":
-        print("Starting MCP server (type JSON lines to interact)")
-        mcp.serve_stdin()
+        if args.connect:
+            # stdout belongs to the daemon's responses, so no banner here
+            mcp.proxy_stdio(args.connect)
+            return 0
+        stop_metrics = None
+        if args.metrics_file:
+            stop_metrics = metrics.start_prometheus_writer(args.metrics_file, args.metrics_interval)
+        try:
+            if args.socket:
+                print(f"Serving MCP clients on {args.socket}")
+                try:
+                    mcp.serve_socket(args.socket, workers=args.workers)
+                except FileExistsError as exc:
+                    print(f"Error: {exc}")
+                    return 1
+                return 0
+            print("Starting MCP server (type JSON lines to interact)")
+            if args.use_async:
+                mcp.serve_async(workers=args.workers)
+            else:
+                mcp.serve_stdin()
+        finally:
+            if stop_metrics is not None:
+                stop_metrics.set()
+                metrics.write_prometheus(args.metrics_file)
+        return 0
+    elif args.command == "convert-store":
+        mgr = _open_source(args.source, journal=args.journal).load()
+        open_storage(args.dest, codec=args.format).save(mgr)
+        print(f"Converted {len(mgr.tasks)} tasks to {args.dest}")
+        return 0
+    elif args.command == "check-edges":
+        storage = mcp_tools._storage
+        mgr = storage.load()
+        problems = mgr.repair_edges() if args.repair else mgr.check_edges()
+        for problem in problems:
+            print(problem)
+        if args.repair and problems:
+            storage.save(mgr)
+            print(f"Repaired {len(problems)} edge problems")
+        elif not problems:
+            print("All edges consistent")
+        return 1 if problems and not args.repair else 0
+    elif args.command == "migrate-sqlite":
+        mgr = _open_source(args.source, journal=args.journal).load()
+        db = SqliteStorage(args.dest)
+        db.save(mgr)
+        db.close()
+        print(f"Migrated {len(mgr.tasks)} tasks to {args.dest}")
         return 0
     elif args.command == "add-ci-githooks":
         return add_ci_githooks()
@@ -8,10 +8,20 @@ pulling in an external dependency.
 
 from __future__ import annotations
 
+import asyncio
 import json
+import os
+import socket
+import stat
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, Iterator, List
+
+from . import metrics
+from .schema import ToolInputError, compile_schema
 
 
 @dataclass
@@ -20,6 +30,58 @@ class ToolSpec:
     description: str
     input_schema: Dict[str, Any]
     handler: Callable[[Dict[str, Any]], Any]
+    # tools that change state run alone; the others may run side by side
+    mutates: bool = False
+    # False for tools that take ``state_lock`` themselves (e.g. to wait without it)
+    locks: bool = True
+    # False for tools with effects outside the task store that a rolled-back
+    # batch cannot undo; they are refused in atomic batches
+    reversible: bool = True
+    # ``input_schema`` compiled by register_tool; raises ToolInputError
+    validate: Callable[[Any], None] = field(default=lambda args: None, repr=False)
+
+
+class RWLock:
+    """Many readers or one writer; waiting writers go before new readers."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+# guards the tools' shared state when calls arrive from several threads
+state_lock = RWLock()
 
 
 # registry holds all tools registered via register_tool
@@ -30,15 +92,61 @@ class ToolNotFoundError(KeyError):
     pass
 
 
-def register_tool(name: str, description: str, input_schema: Dict[str, Any]):
+class BatchAborted(Exception):
+    """An all-or-nothing batch stopped at a failing call; nothing was kept."""
+
+    def __init__(self, index: int, error: Exception) -> None:
+        super().__init__(f"call {index} failed: {error}; batch rolled back")
+        self.index = index
+        self.error = error
+
+
+class BatchStateLost(Exception):
+    """Raised by a tool when a call failed inside a batch after it may have
+    changed the shared state; the batch restarts from the saved state
+    without that call."""
+
+
+def _run_directly(body: Callable[[], Any]) -> Any:
+    return body()
+
+
+# runs a batch body against one loaded state; the tools install the real one
+_transaction: Callable[[Callable[[], Any]], Any] = _run_directly
+
+
+def set_transaction(runner: Callable[[Callable[[], Any]], Any]) -> None:
+    """Install the function that wraps a batch in a single load and save."""
+    global _transaction
+    _transaction = runner
+
+
+def register_tool(
+    name: str,
+    description: str,
+    input_schema: Dict[str, Any],
+    mutates: bool = False,
+    locks: bool = True,
+    reversible: bool = True,
+):
     """Decorator to register a function as an MCP tool.
 
     The decorated function must accept a single dict argument and return any
-    JSON-serializable result.
+    JSON-serializable result. ``mutates`` marks tools that change tasks and
+    ``reversible=False`` those whose changes a rolled-back batch cannot undo.
     """
 
     def _decorator(func: Callable[[Dict[str, Any]], Any]):
-        spec = ToolSpec(name=name, description=description, input_schema=input_schema, handler=func)
+        spec = ToolSpec(
+            name=name,
+            description=description,
+            input_schema=input_schema,
+            handler=func,
+            mutates=mutates,
+            locks=locks,
+            reversible=reversible,
+            validate=compile_schema(input_schema),
+        )
         _registry[name] = spec
         return func
 
@@ -53,11 +161,149 @@ def list_tools() -> List[ToolSpec]:
 def call_tool(name: str, args: Dict[str, Any]) -> Any:
     """Invoke a registered tool by name with arguments.
 
-    Raises ToolNotFoundError if the tool is unknown.
+    Raises ToolNotFoundError if the tool is unknown and ToolInputError,
+    before anything is loaded, if ``args`` does not match its schema. Calls
+    are safe from several threads: mutating tools hold ``state_lock``
+    exclusively, the rest share it. Each call is timed in :mod:`metrics`.
     """
     if name not in _registry:
         raise ToolNotFoundError(name)
-    return _registry[name].handler(args)
+    spec = _registry[name]
+    with metrics.call(name):
+        spec.validate(args)
+        if not spec.locks:
+            with metrics.phase("handler"):
+                return spec.handler(args)
+        with state_lock.write() if spec.mutates else state_lock.read():
+            with metrics.phase("handler"):
+                return spec.handler(args)
+
+
+def call_batch(calls: List[Dict[str, Any]], atomic: bool = False) -> List[Dict[str, Any]]:
+    """Run several ``{"tool", "input"}`` calls against one loaded state.
+
+    Calls run in order and the state is saved once at the end if any of them
+    changed it. Each call gets a ``{"result": ...}`` or ``{"error": ...}``
+    entry, in order. With ``atomic`` the first failure raises
+    :class:`BatchAborted` and none of the batch's changes are kept.
+    """
+    specs = [_spec_of(call) for call in calls]
+    failed: Dict[int, Exception] = {}
+    # reject bad calls before the state is loaded
+    for index, (call, spec) in enumerate(zip(calls, specs)):
+        try:
+            if spec is None:
+                raise ToolNotFoundError(call.get("tool") if isinstance(call, dict) else call)
+            if not spec.locks:
+                raise ValueError(f"{spec.name} cannot be batched")
+            if atomic and not spec.reversible:
+                raise ValueError(f"{spec.name} cannot be rolled back, so it cannot run in an atomic batch")
+            spec.validate(call.get("input", {}))
+        except Exception as exc:
+            if atomic:
+                raise BatchAborted(index, exc) from exc
+            failed[index] = exc
+
+    def body() -> List[Dict[str, Any]]:
+        out = []
+        for index, (call, spec) in enumerate(zip(calls, specs)):
+            try:
+                if index in failed or spec is None:
+                    raise failed[index]
+                out.append({"result": spec.handler(call.get("input", {}))})
+            except BatchStateLost as exc:
+                cause = exc.__cause__
+                failed[index] = cause if isinstance(cause, Exception) else exc
+                if atomic:
+                    raise BatchAborted(index, failed[index]) from exc
+                raise
+            except Exception as exc:
+                if atomic:
+                    raise BatchAborted(index, exc) from exc
+                out.append(_error(exc))
+        return out
+
+    mutates = any(spec is not None and spec.mutates for spec in specs)
+    # timed as one call of the pseudo-tool "batch"
+    with metrics.call("batch"), state_lock.write() if mutates else state_lock.read():
+        with metrics.phase("handler"):
+            while True:
+                try:
+                    return _transaction(body)
+                except BatchStateLost:
+                    continue  # run again from the saved state, skipping the failed call
+
+
+def _error(exc: Exception) -> Dict[str, Any]:
+    # the error payload, naming the bad field for schema errors
+    if isinstance(exc, BatchAborted):
+        payload = {"error": str(exc), "index": exc.index}
+        if isinstance(exc.error, ToolInputError):
+            payload["field"] = exc.error.field
+        return payload
+    if isinstance(exc, ToolInputError):
+        return {"error": str(exc), "field": exc.field}
+    return {"error": str(exc)}
+
+
+def _respond(req: Any, payload: Dict[str, Any]) -> str:
+    # echo the request id so clients can match out-of-order responses
+    if isinstance(req, dict) and "id" in req:
+        payload = {"id": req["id"], **payload}
+    return json.dumps(payload) + "\n"
+
+
+def _batch_calls(req: Any) -> List[Dict[str, Any]] | None:
+    # a JSON array, or {"batch": [...], "atomic": bool}, is a batch request
+    if isinstance(req, list):
+        return req
+    if isinstance(req, dict) and isinstance(req.get("batch"), list):
+        return req["batch"]
+    return None
+
+
+def _batch_mutates(calls: List[Dict[str, Any]]) -> bool:
+    return any(
+        isinstance(call, dict) and call.get("tool") in _registry and _registry[call["tool"]].mutates
+        for call in calls
+    )
+
+
+def _mutates(req: Any) -> bool:
+    # whether a decoded request has to go to the single writer thread
+    calls = _batch_calls(req)
+    if calls is not None:
+        return _batch_mutates(calls)
+    spec = _spec_of(req)
+    return spec is not None and spec.mutates
+
+
+def _spec_of(call: Any) -> ToolSpec | None:
+    # the tool a decoded call names, if it names a registered one
+    tool = call.get("tool") if isinstance(call, dict) else None
+    return _registry.get(tool) if isinstance(tool, str) else None
+
+
+def _tools_info() -> str:
+    return json.dumps({"info": "tools", "names": [t.name for t in list_tools()]}) + "\n"
+
+
+def _handle(req: Any) -> str:
+    """Run one decoded request line and return its response line."""
+    calls = _batch_calls(req)
+    if calls is None:
+        try:
+            return _respond(req, {"result": call_tool(req.get("tool"), req.get("input", {}))})
+        except Exception as e:
+            return _respond(req, _error(e))
+    try:
+        entries = call_batch(calls, atomic=isinstance(req, dict) and bool(req.get("atomic")))
+    except Exception as e:
+        return _respond(req, _error(e))
+    if isinstance(req, dict):
+        return _respond(req, {"result": entries})
+    # a bare array answers with an array, each entry echoing its call's id
+    return "[" + ", ".join(_respond(call, entry).rstrip("\n") for call, entry in zip(calls, entries)) + "]\n"
 
 
 def serve_stdin(stdout=sys.stdout, stdin=sys.stdin):
@@ -67,10 +313,14 @@ def serve_stdin(stdout=sys.stdout, stdin=sys.stdin):
         {"tool": "tool_name", "input": { ... }}
 
     The response is written as a single-line JSON object with either
-    {"result": ...} or {"error": "..."}.
+    {"result": ...} or {"error": "..."}, plus the request's "id" if it had one.
+
+    A line may also hold a JSON array of such calls, answered with an array
+    of responses in the same order, or {"batch": [...], "atomic": true} to
+    keep none of the calls' changes if one fails (see :func:`call_batch`).
     """
     # debug output: list available tools at startup
-    stdout.write(json.dumps({"info": "tools", "names": [t.name for t in list_tools()]}) + "\n")
+    stdout.write(_tools_info())
     stdout.flush()
     for line in stdin:
         line = line.strip()
@@ -78,14 +328,169 @@ def serve_stdin(stdout=sys.stdout, stdin=sys.stdin):
             continue
         try:
             req = json.loads(line)
-            tool = req.get("tool")
-            args = req.get("input", {})
-            result = call_tool(tool, args)
-            stdout.write(json.dumps({"result": result}) + "\n")
-        except Exception as e:
-            stdout.write(json.dumps({"error": str(e)}) + "\n")
+        except ValueError as e:
+            stdout.write(_respond(None, {"error": str(e)}))
+        else:
+            stdout.write(_handle(req))
+        stdout.flush()
+
+
+def serve_async(stdout=sys.stdout, stdin=sys.stdin, workers: int = 8) -> None:
+    """Like :func:`serve_stdin`, but with several requests in flight at once.
+
+    Read-only tools run concurrently on a pool of ``workers`` threads and
+    mutating tools one at a time on a single writer thread, in arrival order.
+    Responses are written as calls finish, so they may come back out of
+    order; send an "id" with each request to match them up.
+    """
+    asyncio.run(_serve_async(stdout, stdin, workers))
+
+
+async def _serve_async(stdout, stdin, workers: int) -> None:
+    loop = asyncio.get_running_loop()
+    readers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcp-read")
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcp-write")
+    pending = set()
+
+    def emit(text: str) -> None:
+        stdout.write(text)
         stdout.flush()
 
+    async def handle(line: str) -> None:
+        try:
+            req = json.loads(line)
+        except ValueError as e:
+            emit(_respond(None, {"error": str(e)}))
+            return
+        pool = writer if _mutates(req) else readers
+        emit(await loop.run_in_executor(pool, _handle, req))
+
+    emit(_tools_info())
+    try:
+        while True:
+            # a thread keeps the loop free while waiting on a blocking stdin
+            line = await loop.run_in_executor(None, stdin.readline)
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.ensure_future(handle(line.strip()))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+    finally:
+        readers.shutdown(wait=True)
+        writer.shutdown(wait=True)
+
+
+# longest request line a socket client may send (large batches included)
+_SOCKET_LINE_LIMIT = 64 * 1024 * 1024
+
+
+def serve_socket(path: str, workers: int = 8, stop: threading.Event | None = None) -> None:
+    """Serve the line protocol to many clients over a Unix domain socket.
+
+    One process keeps the tasks in memory for every client and persists
+    their writes. Each connection gets the tools info line and then one
+    response per request line, in order; requests from different clients
+    run concurrently like in :func:`serve_async`. Runs until ``stop`` is set
+    (or forever). A socket left at ``path`` by a daemon that is gone is
+    replaced; anything else there raises :class:`FileExistsError`.
+    """
+    asyncio.run(_serve_socket(path, workers, stop))
+
+
+async def _serve_socket(path: str, workers: int, stop: threading.Event | None) -> None:
+    loop = asyncio.get_running_loop()
+    readers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcp-read")
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcp-write")
+
+    async def client(reader: asyncio.StreamReader, out: asyncio.StreamWriter) -> None:
+        try:
+            out.write(_tools_info().encode())
+            await out.drain()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    req = json.loads(line)
+                except ValueError as e:
+                    text = _respond(None, {"error": str(e)})
+                else:
+                    text = await loop.run_in_executor(writer if _mutates(req) else readers, _handle, req)
+                out.write(text.encode())
+                await out.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        finally:
+            out.close()
+
+    _remove_stale_socket(path)
+    server = await asyncio.start_unix_server(client, path=path, limit=_SOCKET_LINE_LIMIT)
+    bound = os.stat(path)
+    try:
+        async with server:
+            if stop is None:
+                await server.serve_forever()
+            else:
+                await loop.run_in_executor(None, stop.wait)
+    finally:
+        readers.shutdown(wait=True)
+        writer.shutdown(wait=True)
+        try:
+            current = os.lstat(path)
+        except FileNotFoundError:
+            pass
+        else:
+            # leave it alone if another daemon has replaced it since
+            if (current.st_dev, current.st_ino) == (bound.st_dev, bound.st_ino):
+                os.unlink(path)
+
+
+def _remove_stale_socket(path: str) -> None:
+    # only a socket nobody answers on is ours to remove
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise FileExistsError(f"a daemon is already serving on {path}")
+
+
+def proxy_stdio(path: str, stdout=sys.stdout, stdin=sys.stdin) -> None:
+    """Relay stdin/stdout to a :func:`serve_socket` daemon at ``path``.
+
+    Lets a client that only speaks the stdio protocol share the daemon.
+    Returns once the daemon has answered everything sent before stdin ended.
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(path)
+
+    def send() -> None:
+        for line in stdin:
+            if line.strip():
+                conn.sendall(line.rstrip("\n").encode() + b"\n")
+        conn.shutdown(socket.SHUT_WR)
+
+    sender = threading.Thread(target=send, daemon=True)
+    sender.start()
+    with conn, conn.makefile("r", encoding="utf-8") as replies:
+        for line in replies:
+            stdout.write(line)
+            stdout.flush()
+    sender.join()
+
 
 # ensure the built-in tools are registered during import
 # importing the module has side effects of registering via decorator
@@ -2,23 +2,188 @@
 
 from __future__ import annotations
 
+import bisect
+import random
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, TypeVar
 
-from . import mcp
-from .storage import FileStorage
-from .tasks import Task, TaskManager, TaskNotFoundError
+from . import mcp, metrics
+from .archive import Archive
+from .search import SearchIndex
+from .storage import DEFAULT_WORKSPACE, FileStorage, StoreConflictError
+from .tasks import Status, Task, TaskManager, TaskNotFoundError
 
 # helper to load/save manager
 _storage = FileStorage()
 
+# resident manager shared by all tool calls; it is reused until the storage
+# object is swapped or the file's stat signature changes underneath us.
+# ``feed`` is the last manager loaded from ``storage``, whose change feed a
+# reloaded manager continues even after the cache was dropped, together with
+# the task state last loaded or saved: a rolled-back mutation leaves the
+# manager itself half-changed, so reloads diff against that state instead.
+_cache: Dict[str, Any] = {"storage": None, "signature": None, "mgr": None, "feed": None}
+
+# notified after every save so long-polling ``watch`` calls wake up
+_changed = threading.Condition()
+# one reload at a time, so concurrent readers do not both continue the feed
+_reload_lock = threading.Lock()
+# while a batch runs on this thread, ``mgr`` is the manager its calls share
+# and ``dirty`` says whether one of them changed it
+_batch = threading.local()
+
+
+# cold archives live in an ``archive`` folder next to each store
+_archives: Dict[Path, Archive] = {}
+
+
+def _archive() -> Archive:
+    directory = Path(_storage.path).parent / "archive"
+    if directory not in _archives:
+        _archives[directory] = Archive(directory)
+    return _archives[directory]
+
+
+def _invalidate() -> None:
+    _cache.update(storage=None, signature=None, mgr=None)
+
 
 def _load_mgr() -> TaskManager:
-    return _storage.load()
+    batch_mgr = getattr(_batch, "mgr", None)
+    if batch_mgr is not None:
+        return batch_mgr
+    # take the signature before loading so a concurrent external write can
+    # only make us reload once more, never keep stale data
+    sig = _storage.signature()
+    mgr = _cache["mgr"]
+    if mgr is not None and _cache["storage"] is _storage and _cache["signature"] == sig:
+        return mgr
+    with _reload_lock:
+        mgr = _cache["mgr"]
+        if mgr is not None and _cache["storage"] is _storage and _cache["signature"] == sig:
+            return mgr  # another thread reloaded meanwhile
+        with metrics.phase("load"):
+            mgr = _archive().attach(_storage.load())
+        feed = _cache["feed"]
+        if feed is not None and feed[0] is _storage:
+            mgr.carry_events(feed[1], feed[2])
+        _cache.update(storage=_storage, signature=sig, mgr=mgr, feed=(_storage, mgr, mgr.feed_state()))
+    return mgr
+
+
+def _targeted(op: str) -> Callable[..., Any] | None:
+    """Return the store's own ``op`` (e.g. ``SqliteStorage.get_task``) when
+    answering from the store beats loading all of it.
+
+    That is the case while no current manager is resident, e.g. in a fresh
+    process; once one is, it answers faster than a query. Batches always
+    use their shared manager.
+    """
+    fn = getattr(_storage, op, None)
+    if fn is None or getattr(_batch, "mgr", None) is not None:
+        return None
+    if _cache["mgr"] is not None and _cache["storage"] is _storage and _cache["signature"] == _storage.signature():
+        return None
+    return fn
+
+
+def _task_row(mgr: TaskManager, task: Task) -> Dict[str, Any]:
+    """``task.to_dict()`` plus subtask rollup progress for parents."""
+    row = task.to_dict()
+    done, total = mgr.progress(task.id)
+    if total:
+        row["progress"] = {"done": done, "total": total, "percent": round(100 * done / total)}
+    return row
 
 
 def _save_mgr(mgr: TaskManager) -> None:
-    _storage.save(mgr)
+    feed = _cache["feed"]
+    changed = set(mgr.dirty)
+    with metrics.phase("save"):
+        # taken under the store's lock; a signature read afterwards could
+        # already include another process's write that we never loaded
+        signature = _storage.save(mgr)
+    if feed is not None and feed[0] is _storage and feed[1] is mgr:
+        state = feed[2]  # only the saved changes need refreshing
+        for tid in changed:
+            state.pop(tid, None)
+        state.update(mgr.feed_state(changed))
+    else:
+        state = mgr.feed_state()
+    _cache.update(storage=_storage, signature=signature, mgr=mgr, feed=(_storage, mgr, state))
+    with _changed:
+        _changed.notify_all()
+
+
+T = TypeVar("T")
+
+# how often a mutation is replayed when another process saved first
+_CONFLICT_RETRIES = 20
+
+
+def _apply(mutation: Callable[[TaskManager], T]) -> T:
+    """Run ``mutation`` on the resident manager and save the result.
+
+    A failing mutation may leave the manager half-updated, so its events are
+    rewound, the cache is dropped and the next call starts again from the
+    last saved state. When
+    another process saved in between, the save raises
+    :class:`StoreConflictError`; the store is then reloaded and the mutation
+    replayed on the fresh state after a short random backoff.
+
+    Inside a batch the mutation only changes the batch's manager, which is
+    saved once when the batch ends.
+    """
+    batch_mgr = getattr(_batch, "mgr", None)
+    if batch_mgr is None:
+        return _transact(lambda mgr: (mutation(mgr), True))
+    try:
+        result = mutation(batch_mgr)
+    except Exception as exc:
+        raise mcp.BatchStateLost(str(exc)) from exc
+    _batch.dirty = True
+    return result
+
+
+def _run_batch(body: Callable[[], T]) -> T:
+    # every call in ``body`` shares one loaded manager; save once if needed
+    def run(mgr: TaskManager) -> tuple:
+        _batch.mgr, _batch.dirty = mgr, False
+        try:
+            return body(), _batch.dirty
+        finally:
+            _batch.mgr = None
+
+    return _transact(run)
+
+
+mcp.set_transaction(_run_batch)
+
+
+def _transact(run: Callable[[TaskManager], tuple]) -> Any:
+    # ``run`` returns (result, changed); see _apply for the retry rules
+    for attempt in range(_CONFLICT_RETRIES):
+        mgr = _load_mgr()
+        seq = mgr.seq
+        try:
+            result, changed = run(mgr)
+            if changed:
+                _save_mgr(mgr)
+            return result
+        except StoreConflictError:
+            mgr.rewind_events(seq)
+            _invalidate()
+            if attempt == _CONFLICT_RETRIES - 1:
+                raise
+            time.sleep(random.uniform(0, 0.002 * (attempt + 1)))
+        except BaseException:
+            mgr.rewind_events(seq)
+            _invalidate()
+            raise
+    raise AssertionError("unreachable")
 
 
 @mcp.register_tool(
@@ -34,16 +199,19 @@ def _save_mgr(mgr: TaskManager) -> None:
         },
         "required": ["task_id", "title"],
     },
+    mutates=True,
 )
 def tool_create_task(args: Dict[str, Any]) -> Dict[str, Any]:
-    mgr = _load_mgr()
-    task = Task(id=args["task_id"], title=args["title"])
-    task.metadata.update(args.get("metadata", {}))
-    mgr.add_task(task)
-    for dep in args.get("depends_on", []):
-        mgr.add_dependency(task.id, dep)
-    _save_mgr(mgr)
-    print(f"[MCP] created task {task.id}")
+    def create(mgr: TaskManager) -> Task:
+        task = Task(id=args["task_id"], title=args["title"])
+        task.metadata.update(args.get("metadata", {}))
+        mgr.add_task(task)
+        for dep in args.get("depends_on", []):
+            mgr.add_dependency(task.id, dep)
+        return task
+
+    task = _apply(create)
+    print(f"[MCP] created task {task.id}", file=sys.stderr)
     return {"task_id": task.id}
 
 
@@ -53,10 +221,79 @@ def tool_create_task(args: Dict[str, Any]) -> Dict[str, Any]:
     input_schema={"type": "object", "properties": {}},
 )
 def tool_get_ready(args: Dict[str, Any]) -> List[str]:
+    ready_task_ids = _targeted("ready_task_ids")
+    if ready_task_ids is not None:
+        return ready_task_ids()
     mgr = _load_mgr()
     return [t.id for t in mgr.get_ready_tasks()]
 
 
+@mcp.register_tool(
+    name="next_tasks",
+    description="Return the most urgent ready tasks by priority, due date and critical path",
+    input_schema={
+        "type": "object",
+        "properties": {"limit": {"type": "integer", "minimum": 1}},
+    },
+    # pops and re-pushes the shared ready heap, so it runs with the writers
+    mutates=True,
+)
+def tool_next_tasks(args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    mgr = _load_mgr()
+    return [
+        {
+            "id": t.id,
+            "title": t.title,
+            "priority": t.metadata.get("priority"),
+            "due": t.metadata.get("due"),
+            "critical_path": mgr.critical_path(t.id),
+        }
+        for t in mgr.next_tasks(args.get("limit", 5))
+    ]
+
+
+_CLOSURE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "task_id": {"type": "string"},
+        "depth": {"type": "integer"},
+        "limit": {"type": "integer", "minimum": 1},
+    },
+    "required": ["task_id"],
+}
+
+
+def _closure_result(mgr: TaskManager, key: str, args: Dict[str, Any], walk) -> Dict[str, Any]:
+    limit = args.get("limit", 100)
+    # ask for one extra task to tell whether the cap cut the walk short
+    found = walk(args["task_id"], depth=args.get("depth"), limit=limit + 1)
+    rows = [
+        {"id": tid, "title": mgr.tasks[tid].title, "status": mgr.tasks[tid].status.name, "depth": depth}
+        for tid, depth in list(found.items())[:limit]
+    ]
+    return {"task_id": args["task_id"], key: rows, "truncated": len(found) > limit}
+
+
+@mcp.register_tool(
+    name="get_blockers",
+    description="List incomplete tasks that transitively block a task, nearest first",
+    input_schema=_CLOSURE_SCHEMA,
+)
+def tool_get_blockers(args: Dict[str, Any]) -> Dict[str, Any]:
+    mgr = _load_mgr()
+    return _closure_result(mgr, "blockers", args, mgr.blockers)
+
+
+@mcp.register_tool(
+    name="get_impact",
+    description="List incomplete tasks that transitively wait on a task, nearest first",
+    input_schema=_CLOSURE_SCHEMA,
+)
+def tool_get_impact(args: Dict[str, Any]) -> Dict[str, Any]:
+    mgr = _load_mgr()
+    return _closure_result(mgr, "impact", args, mgr.impact)
+
+
 @mcp.register_tool(
     name="add_dependency",
     description="Add a dependency between tasks",
@@ -68,13 +305,26 @@ def tool_get_ready(args: Dict[str, Any]) -> List[str]:
         },
         "required": ["task_id", "depends_on"],
     },
+    mutates=True,
 )
 def tool_add_dependency(args: Dict[str, Any]) -> Dict[str, Any]:
-    mgr = _load_mgr()
-    mgr.add_dependency(args["task_id"], args["depends_on"])
-    _save_mgr(mgr)
-    print(f"[MCP] added dependency {args['task_id']} -> {args['depends_on']}")
-    return {"task_id": args["task_id"], "depends_on": args["depends_on"]}
+    task_id, depends_on = args["task_id"], args["depends_on"]
+    add_dependency = _targeted("add_dependency")
+    # archived dependencies are only known to the manager (via the archive)
+    if add_dependency is not None and depends_on not in _archive().ids():
+        try:
+            # one edge insert; the next load picks it up (and reports it to watchers)
+            add_dependency(task_id, depends_on)
+        except StoreConflictError:
+            # the store stayed locked; the manager path retries
+            _apply(lambda mgr: mgr.add_dependency(task_id, depends_on))
+        else:
+            with _changed:
+                _changed.notify_all()
+    else:
+        _apply(lambda mgr: mgr.add_dependency(task_id, depends_on))
+    print(f"[MCP] added dependency {task_id} -> {depends_on}", file=sys.stderr)
+    return {"task_id": task_id, "depends_on": depends_on}
 
 
 @mcp.register_tool(
@@ -85,15 +335,141 @@ def tool_add_dependency(args: Dict[str, Any]) -> Dict[str, Any]:
         "properties": {"task_id": {"type": "string"}},
         "required": ["task_id"],
     },
+    mutates=True,
 )
 def tool_mark_complete(args: Dict[str, Any]) -> Dict[str, Any]:
-    mgr = _load_mgr()
-    mgr.mark_complete(args["task_id"])
-    _save_mgr(mgr)
-    print(f"[MCP] marked complete {args['task_id']}")
+    _apply(lambda mgr: mgr.mark_complete(args["task_id"]))
+    print(f"[MCP] marked complete {args['task_id']}", file=sys.stderr)
     return {"task_id": args["task_id"]}
 
 
+# allowed values of status filters in tool input
+_STATUS_NAMES = [status.name for status in Status]
+
+# default lease length for claimed tasks, in seconds
+DEFAULT_LEASE_SECONDS = 300
+
+
+@mcp.register_tool(
+    name="claim_next_task",
+    description="Atomically take the most urgent ready task and mark it in progress under a lease",
+    input_schema={
+        "type": "object",
+        "properties": {"holder": {"type": "string"}, "lease_seconds": {"type": "number"}},
+        "required": ["holder"],
+    },
+    mutates=True,
+)
+def tool_claim_next_task(args: Dict[str, Any]) -> Dict[str, Any]:
+    lease_seconds = args.get("lease_seconds", DEFAULT_LEASE_SECONDS)
+    task = _apply(lambda mgr: mgr.claim(args["holder"], lease_seconds))
+    if task is None:
+        return {"task_id": None}
+    lease = task.agent_context.get("lease")
+    print(f"[MCP] {args['holder']} claimed {task.id}", file=sys.stderr)
+    return {"task_id": task.id, "title": task.title, "expires": lease["expires"] if isinstance(lease, dict) else None}
+
+
+@mcp.register_tool(
+    name="renew_lease",
+    description="Extend the lease on a claimed task",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "task_id": {"type": "string"},
+            "holder": {"type": "string"},
+            "lease_seconds": {"type": "number"},
+        },
+        "required": ["task_id", "holder"],
+    },
+    mutates=True,
+)
+def tool_renew_lease(args: Dict[str, Any]) -> Dict[str, Any]:
+    lease_seconds = args.get("lease_seconds", DEFAULT_LEASE_SECONDS)
+    expires = _apply(lambda mgr: mgr.renew(args["task_id"], args["holder"], lease_seconds))
+    return {"task_id": args["task_id"], "expires": expires}
+
+
+@mcp.register_tool(
+    name="release_task",
+    description="Give a claimed task back so another worker can claim it",
+    input_schema={
+        "type": "object",
+        "properties": {"task_id": {"type": "string"}, "holder": {"type": "string"}},
+        "required": ["task_id", "holder"],
+    },
+    mutates=True,
+)
+def tool_release_task(args: Dict[str, Any]) -> Dict[str, Any]:
+    _apply(lambda mgr: mgr.release(args["task_id"], args["holder"]))
+    print(f"[MCP] {args['holder']} released {args['task_id']}", file=sys.stderr)
+    return {"task_id": args["task_id"]}
+
+
+@mcp.register_tool(
+    name="apply_batch",
+    description="Create many tasks, dependencies and subtask links in one atomic step",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "tasks": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "task_id": {"type": "string"},
+                        "title": {"type": "string"},
+                        "metadata": {"type": "object"},
+                        "depends_on": {"type": "array", "items": {"type": "string"}},
+                        "parent": {"type": "string"},
+                    },
+                    "required": ["task_id", "title"],
+                },
+            },
+            "dependencies": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"task_id": {"type": "string"}, "depends_on": {"type": "string"}},
+                    "required": ["task_id", "depends_on"],
+                },
+            },
+            "subtasks": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"parent_id": {"type": "string"}, "subtask_id": {"type": "string"}},
+                    "required": ["parent_id", "subtask_id"],
+                },
+            },
+        },
+    },
+    mutates=True,
+)
+def tool_apply_batch(args: Dict[str, Any]) -> Dict[str, Any]:
+    specs = args.get("tasks", [])
+    dependencies = [(d["task_id"], d["depends_on"]) for d in args.get("dependencies", [])]
+    subtasks = [(s["parent_id"], s["subtask_id"]) for s in args.get("subtasks", [])]
+    subtasks += [(spec["parent"], spec["task_id"]) for spec in specs if spec.get("parent")]
+
+    def apply(mgr: TaskManager) -> None:
+        # fresh Task objects on every attempt, a conflict replays the batch
+        tasks = []
+        for spec in specs:
+            task = Task(id=spec["task_id"], title=spec["title"], dependencies=set(spec.get("depends_on", [])))
+            task.metadata.update(spec.get("metadata", {}))
+            tasks.append(task)
+        mgr.apply_batch(tasks, dependencies, subtasks)
+
+    _apply(apply)
+    print(f"[MCP] applied batch of {len(specs)} tasks", file=sys.stderr)
+    return {
+        "created": [spec["task_id"] for spec in specs],
+        "dependencies": len(dependencies) + sum(len(spec.get("depends_on", [])) for spec in specs),
+        "subtasks": len(subtasks),
+    }
+
+
 @mcp.register_tool(
     name="get_task_status",
     description="Return status of a specific task",
@@ -104,13 +480,55 @@ def tool_mark_complete(args: Dict[str, Any]) -> Dict[str, Any]:
     },
 )
 def tool_get_status(args: Dict[str, Any]) -> Dict[str, Any]:
-    mgr = _load_mgr()
-    task = mgr.tasks.get(args["task_id"])
+    get_task = _targeted("get_task")
+    task = get_task(args["task_id"]) if get_task is not None else _load_mgr().tasks.get(args["task_id"])
     if not task:
         raise TaskNotFoundError(args["task_id"])
     return {"id": task.id, "status": task.status.name, "metadata": task.metadata}
 
 
+# longest a single watch call may block, in seconds
+WATCH_MAX_TIMEOUT = 60.0
+# how often a blocked watch checks the store for writes by other processes
+_WATCH_POLL = 0.25
+
+
+@mcp.register_tool(
+    name="watch",
+    description="Return task events after a sequence number, optionally waiting for new ones",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "since": {"type": "integer"},
+            "timeout": {"type": "number"},
+            "task_ids": {"type": "array", "items": {"type": "string"}},
+            "statuses": {"type": "array", "items": {"type": "string", "enum": _STATUS_NAMES}},
+            "limit": {"type": "integer", "minimum": 1},
+        },
+    },
+    # takes the state lock only while reading, never while waiting
+    locks=False,
+)
+def tool_watch(args: Dict[str, Any]) -> Dict[str, Any]:
+    since = args.get("since", 0)
+    task_ids = set(args["task_ids"]) if "task_ids" in args else None
+    statuses = set(args["statuses"]) if "statuses" in args else None
+    deadline = time.monotonic() + min(float(args.get("timeout", 0)), WATCH_MAX_TIMEOUT)
+    while True:
+        with mcp.state_lock.read():
+            mgr = _load_mgr()
+            events, reset = mgr.events_since(since, task_ids, statuses, limit=args.get("limit", 1000))
+            seq = mgr.seq  # a write after the lock is released is for the next call
+        remaining = deadline - time.monotonic()
+        if events or reset or remaining <= 0:
+            break
+        with _changed:
+            _changed.wait(min(remaining, _WATCH_POLL))
+    # resume from the last event returned, or from the end of the feed
+    cursor = events[-1]["seq"] if events and len(events) == args.get("limit", 1000) else seq
+    return {"events": events, "seq": cursor, "reset": reset}
+
+
 # ---------------------------------------------------------------------------
 # export utilities
 # ---------------------------------------------------------------------------
@@ -129,15 +547,18 @@ def tool_export_html(args: Dict[str, Any]) -> Dict[str, Any]:
     mgr = _load_mgr()
     path = Path(args["path"])
     # simple HTML viewer: embed JSON and use JS to render
-    tasks_list = [t.to_dict() for t in mgr.tasks.values()]
+    tasks_list = [_task_row(mgr, t) for t in mgr.tasks.values()]
     import json as _json
     tasks_json = _json.dumps(tasks_list)
     html = """<!doctype html><html><head><meta charset=\"utf-8\"><title>Tasks</title></head><body>"""
     html += """<h1>Tasks</h1><div id=\"tasks\"></div>"""
     html += """<script>const tasks = %s;""" % tasks_json
     html += """\nfunction render(){
-  let tbl='<table border=1><tr><th>ID</th><th>Title</th><th>Status</th></tr>';
-  for(const t of tasks){tbl += `<tr><td>${t.id}</td><td>${t.title}</td><td>${t.status}</td></tr>`;}
+  let tbl='<table border=1><tr><th>ID</th><th>Title</th><th>Status</th><th>Progress</th></tr>';
+  for(const t of tasks){
+    const p = t.progress ? `${t.progress.percent}% (${t.progress.done}/${t.progress.total})` : '';
+    tbl += `<tr><td>${t.id}</td><td>${t.title}</td><td>${t.status}</td><td>${p}</td></tr>`;
+  }
   tbl+='</table>'; document.getElementById('tasks').innerHTML=tbl;
 }
 render();
@@ -152,12 +573,164 @@ render();
 
 @mcp.register_tool(
     name="list_tasks",
-    description="Return a list of all tasks with details",
+    description=(
+        "Return tasks with details, optionally filtered by status, parent, metadata or "
+        "dependency_of, projected to some fields and paged with cursor/limit"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "status": {"type": "string", "enum": _STATUS_NAMES},
+            "parent": {"type": "string"},
+            "metadata": {"type": "object"},
+            "dependency_of": {"type": "string"},
+            "fields": {"type": "array", "items": {"type": "string"}},
+            "cursor": {"type": "string"},
+            "limit": {"type": "integer", "minimum": 1},
+        },
+    },
+)
+def tool_list_tasks(args: Dict[str, Any]) -> List[Dict[str, Any]] | Dict[str, Any]:
+    mgr = _load_mgr()
+    fields = args.get("fields")
+
+    def row(tid: str) -> Dict[str, Any]:
+        full = _task_row(mgr, mgr.tasks[tid])
+        return full if fields is None else {"id": tid, **{f: full[f] for f in fields if f in full}}
+
+    filters = ("status", "parent", "metadata", "dependency_of")
+    paged = "cursor" in args or "limit" in args
+    if not paged and not any(k in args for k in filters):
+        return [row(tid) for tid in mgr.tasks]
+    ids = mgr.query(
+        status=Status[args["status"]] if "status" in args else None,
+        parent=args.get("parent"),
+        metadata=args.get("metadata"),
+        dependency_of=args.get("dependency_of"),
+    )
+    if not paged:
+        return [row(tid) for tid in ids]
+    # ids come back sorted, so the cursor is simply the last id already seen
+    start = bisect.bisect_right(ids, args["cursor"]) if "cursor" in args else 0
+    page = ids[start : start + args.get("limit", 100)]
+    more = start + len(page) < len(ids)
+    return {"tasks": [row(tid) for tid in page], "next_cursor": page[-1] if more and page else None}
+
+
+@mcp.register_tool(
+    name="get_dashboard",
+    description="Return task counts by status for each workspace and in total",
+    input_schema={"type": "object", "properties": {}},
+)
+def tool_get_dashboard(args: Dict[str, Any]) -> Dict[str, Any]:
+    if hasattr(_storage, "dashboard"):
+        # sharded stores answer from their index without loading any shard
+        shards = _storage.dashboard()
+    else:
+        counts: Dict[str, int] = {}
+        for t in _load_mgr().tasks.values():
+            counts[t.status.name] = counts.get(t.status.name, 0) + 1
+        shards = {DEFAULT_WORKSPACE: counts}
+    totals: Dict[str, int] = {}
+    for counts in shards.values():
+        for status, n in counts.items():
+            totals[status] = totals.get(status, 0) + n
+    return {"shards": shards, "totals": totals}
+
+
+@mcp.register_tool(
+    name="get_metrics",
+    description=(
+        "Return per-tool call and error counts, latency histograms for the load, handler and "
+        "save phases, and storage bytes read/written and parse times"
+    ),
     input_schema={"type": "object", "properties": {}},
+    # metrics have their own lock; no need to wait for writers
+    locks=False,
+)
+def tool_get_metrics(args: Dict[str, Any]) -> Dict[str, Any]:
+    return metrics.snapshot()
+
+
+@mcp.register_tool(
+    name="archive",
+    description="Move old completed tasks whose dependents are all done into the cold archive",
+    input_schema={
+        "type": "object",
+        "properties": {"older_than_days": {"type": "number"}},
+    },
+    mutates=True,
+    # archive segments are written before the save and stay if a batch rolls back
+    reversible=False,
+)
+def tool_archive(args: Dict[str, Any]) -> Dict[str, Any]:
+    cutoff = time.time() - float(args.get("older_than_days", 7)) * 86400
+
+    def archive(mgr: TaskManager) -> List[Task]:
+        removed = mgr.detach(mgr.archivable(cutoff))
+        # write the archive before the hot store is saved: a crash or conflict
+        # in between leaves a task in both places, never in neither (a replay
+        # after a conflict skips the ids already archived)
+        _archive().append(removed)
+        return removed
+
+    removed = _apply(archive)
+    print(f"[MCP] archived {len(removed)} tasks", file=sys.stderr)
+    return {"archived": [t.id for t in removed]}
+
+
+_search_lock = threading.Lock()
+
+
+def _search_index(mgr: TaskManager) -> SearchIndex:
+    # a saved index is reused while it matches the store; otherwise rebuild
+    # once and save it for the next process
+    with _search_lock:
+        return _attach_search_index(mgr)
+
+
+def _attach_search_index(mgr: TaskManager) -> SearchIndex:
+    if mgr.search_index is None:
+        store = Path(_storage.path)
+        path = store.with_name(store.name + ".search.json")
+        signature = _cache["signature"]
+        mgr.search_index = SearchIndex.load(path, signature)
+        if mgr.search_index is None:
+            mgr.search_index = SearchIndex.build(mgr.tasks.values())
+            if signature is not None:
+                mgr.search_index.save(path, signature)
+    return mgr.search_index
+
+
+@mcp.register_tool(
+    name="search_tasks",
+    description="Full-text search over task titles and metadata, best matches first",
+    input_schema={
+        "type": "object",
+        "properties": {"query": {"type": "string"}, "limit": {"type": "integer", "minimum": 1}},
+        "required": ["query"],
+    },
 )
-def tool_list_tasks(args: Dict[str, Any]) -> List[Dict[str, Any]]:
+def tool_search_tasks(args: Dict[str, Any]) -> List[Dict[str, Any]]:
     mgr = _load_mgr()
-    return [t.to_dict() for t in mgr.tasks.values()]
+    _search_index(mgr)
+    return [
+        {"id": t.id, "title": t.title, "status": t.status.name, "score": round(score, 3)}
+        for t, score in mgr.search(args["query"], limit=args.get("limit", 20))
+    ]
+
+
+@mcp.register_tool(
+    name="search_archive",
+    description="Search archived tasks by id, title or metadata text",
+    input_schema={
+        "type": "object",
+        "properties": {"query": {"type": "string"}, "limit": {"type": "integer", "minimum": 1}},
+        "required": ["query"],
+    },
+)
+def tool_search_archive(args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return _archive().search(args["query"], limit=args.get("limit", 50))
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,218 @@
+"""Process-wide call counters and latency histograms.
+
+``mcp.call_tool`` times every call with :func:`call`. Within a call, the
+tools mark the time spent loading and saving the store with :func:`phase`,
+so each tool gets histograms for its ``total`` latency and for the ``load``,
+``handler`` and ``save`` phases (``handler`` excludes the other two).
+Storage backends report bytes read and written and the time spent decoding
+with :func:`add` and :func:`observe`.
+
+:func:`snapshot` returns everything as plain data for the ``get_metrics``
+tool; :func:`render_prometheus` and :func:`write_prometheus` produce the
+Prometheus text format, and :func:`start_prometheus_writer` rewrites such a
+file periodically.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+# upper bounds in seconds, from 100 microseconds to 10 seconds
+BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+PHASES = ("total", "load", "handler", "save")
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their count and sum."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        # a handful of buckets, so a linear scan beats bisect's call overhead
+        i = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """``(upper bound, observations at or below it)`` pairs, ending with +Inf."""
+        out, running = [], 0
+        for bound, n in zip(self.buckets + (math.inf,), self.counts):
+            running += n
+            out.append((bound, running))
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_le(bound): n for bound, n in self.cumulative()},
+        }
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+_lock = threading.Lock()
+_calls: Dict[str, int] = {}
+_errors: Dict[str, int] = {}
+_latency: Dict[Tuple[str, str], Histogram] = {}
+_counters: Dict[str, float] = {}
+_histograms: Dict[str, Histogram] = {}
+
+# seconds spent per phase by the call running on this thread
+_current = threading.local()
+
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+    with _lock:
+        for table in (_calls, _errors, _latency, _counters, _histograms):
+            table.clear()
+
+
+@contextmanager
+def call(tool: str) -> Iterator[None]:
+    """Time one tool call and record it, as an error if it raises."""
+    outer = getattr(_current, "phases", None)
+    phases = _current.phases = {}
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        total = time.perf_counter() - start
+        _current.phases = outer
+        if "handler" in phases:  # load and save happen inside the handler
+            phases["handler"] -= phases.get("load", 0.0) + phases.get("save", 0.0)
+        phases["total"] = total
+        with _lock:
+            _calls[tool] = _calls.get(tool, 0) + 1
+            if failed:
+                _errors[tool] = _errors.get(tool, 0) + 1
+            for name, seconds in phases.items():
+                _hist(tool, name).observe(seconds)
+
+
+def _hist(tool: str, phase: str) -> Histogram:
+    hist = _latency.get((tool, phase))
+    if hist is None:
+        hist = _latency[(tool, phase)] = Histogram()
+    return hist
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to ``name`` for the current call."""
+    phases = getattr(_current, "phases", None)
+    if phases is None:  # not inside a call
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def add(name: str, amount: float = 1) -> None:
+    """Increase the counter ``name``."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record ``seconds`` in the histogram ``name``."""
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(seconds)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return all metrics as JSON-serializable data."""
+    with _lock:
+        tools: Dict[str, Any] = {}
+        for tool in sorted(_calls):
+            tools[tool] = {
+                "calls": _calls[tool],
+                "errors": _errors.get(tool, 0),
+                "latency": {p: _latency[(tool, p)].to_dict() for p in PHASES if (tool, p) in _latency},
+            }
+        return {
+            "tools": tools,
+            "counters": dict(sorted(_counters.items())),
+            "histograms": {name: hist.to_dict() for name, hist in sorted(_histograms.items())},
+        }
+
+
+def render_prometheus(prefix: str = "todo_mcp") -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    with _lock:
+        lines.append(f"# TYPE {prefix}_tool_calls_total counter")
+        lines += [f'{prefix}_tool_calls_total{{tool="{t}"}} {n}' for t, n in sorted(_calls.items())]
+        lines.append(f"# TYPE {prefix}_tool_errors_total counter")
+        lines += [f'{prefix}_tool_errors_total{{tool="{t}"}} {_errors.get(t, 0)}' for t in sorted(_calls)]
+        lines.append(f"# TYPE {prefix}_tool_seconds histogram")
+        for (tool, name), hist in sorted(_latency.items()):
+            lines += _histogram_lines(f"{prefix}_tool_seconds", f'tool="{tool}",phase="{name}"', hist)
+        for name, value in sorted(_counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value:g}")
+        for name, hist in sorted(_histograms.items()):
+            lines.append(f"# TYPE {prefix}_{name}_seconds histogram")
+            lines += _histogram_lines(f"{prefix}_{name}_seconds", "", hist)
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(metric: str, labels: str, hist: Histogram) -> List[str]:
+    sep = "," if labels else ""
+    lines = [f'{metric}_bucket{{{labels}{sep}le="{_le(bound)}"}} {n}' for bound, n in hist.cumulative()]
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {hist.sum:.6f}")
+    lines.append(f"{metric}_count{suffix} {hist.count}")
+    return lines
+
+
+def write_prometheus(path: Path | str) -> None:
+    """Atomically replace ``path`` with :func:`render_prometheus` output."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(render_prometheus(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def start_prometheus_writer(path: Path | str, interval: float = 10.0) -> threading.Event:
+    """Rewrite ``path`` every ``interval`` seconds on a daemon thread.
+
+    Set the returned event to stop it.
+    """
+    stop = threading.Event()
+
+    def run() -> None:
+        while not stop.wait(interval):
+            write_prometheus(path)
+
+    threading.Thread(target=run, name="todo-mcp-metrics", daemon=True).start()
+    return stop
@@ -0,0 +1,153 @@
+"""Compile tool input schemas into validators.
+
+Supports the JSON Schema subset the tool registry uses: ``type`` (a name or
+a list of names), ``properties``, ``required``, ``additionalProperties``
+(``false`` only), ``items``, ``enum``, ``minimum`` and ``maximum``. Other
+keywords are ignored. Each schema is turned into nested closures once, so
+a check costs a few ``isinstance`` calls per field rather than a walk over
+the schema. Field paths are only put together when a check fails.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List
+
+# raises ToolInputError (with a field relative to the value) on a mismatch
+Check = Callable[[Any], None]
+
+_TYPES: Dict[str, tuple] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+
+class ToolInputError(ValueError):
+    """Tool input that does not match the tool's schema.
+
+    ``field`` names the offending value as a path such as ``tasks[2].title``
+    (empty for the input as a whole).
+    """
+
+    def __init__(self, field: str, message: str) -> None:
+        super().__init__(f"{field or 'input'}: {message}")
+        self.field = field
+        self.message = message
+
+    def within(self, part: str) -> "ToolInputError":
+        """The same error for the value under ``part`` (a key or ``[index]``)."""
+        if not self.field:
+            return ToolInputError(part, self.message)
+        sep = "" if self.field.startswith("[") else "."
+        return ToolInputError(f"{part}{sep}{self.field}", self.message)
+
+
+def compile_schema(schema: Dict[str, Any]) -> Check:
+    """Return ``validate(value)``, raising :class:`ToolInputError` on a mismatch."""
+    return _compile(schema)
+
+
+def _noop(value: Any) -> None:
+    return None
+
+
+def _compile(schema: Dict[str, Any]) -> Check:
+    checks: List[Check] = []
+
+    kind = schema.get("type")
+    if kind is not None:
+        names = [kind] if isinstance(kind, str) else list(kind)
+        types = tuple(t for name in names for t in _TYPES[name])
+        # bool is an int subclass but only counts where "boolean" is allowed
+        no_bool = "boolean" not in names and int in types
+        expected = " or ".join(names)
+
+        def check_type(value: Any) -> None:
+            if not isinstance(value, types) or (no_bool and isinstance(value, bool)):
+                raise ToolInputError("", f"expected {expected}, got {type(value).__name__}")
+
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value: Any) -> None:
+            if value not in allowed:
+                raise ToolInputError("", f"must be one of {allowed}")
+
+        checks.append(check_enum)
+
+    if "minimum" in schema or "maximum" in schema:
+        low, high = schema.get("minimum"), schema.get("maximum")
+
+        def check_bounds(value: Any) -> None:
+            if isinstance(value, (int, float)):
+                if low is not None and value < low:
+                    raise ToolInputError("", f"must be at least {low}")
+                if high is not None and value > high:
+                    raise ToolInputError("", f"must be at most {high}")
+
+        checks.append(check_bounds)
+
+    required = list(schema.get("required", ()))
+    properties = {key: _compile(sub) for key, sub in schema.get("properties", {}).items()}
+    properties = {key: check for key, check in properties.items() if check is not _noop}
+    closed = schema.get("additionalProperties") is False
+    if required or properties or closed:
+        known = set(schema.get("properties", {}))
+
+        def check_object(value: Any) -> None:
+            if not isinstance(value, dict):
+                return  # only the type check speaks about non-objects
+            for key in required:
+                if key not in value:
+                    raise ToolInputError(key, "is required")
+            for key, check in properties.items():
+                if key in value:
+                    try:
+                        check(value[key])
+                    except ToolInputError as err:
+                        raise err.within(key) from None
+            if closed:
+                for key in value:
+                    if key not in known:
+                        raise ToolInputError(key, "is not allowed")
+
+        checks.append(check_object)
+
+    if "items" in schema:
+        item_check = _compile(schema["items"])
+        if item_check is not _noop:
+
+            def check_items(value: Any) -> None:
+                if isinstance(value, list):
+                    for i, item in enumerate(value):
+                        try:
+                            item_check(item)
+                        except ToolInputError as err:
+                            raise err.within(f"[{i}]") from None
+
+            checks.append(check_items)
+
+    if not checks:
+        return _noop
+    if len(checks) == 1:
+        return checks[0]
+    if len(checks) == 2:
+        first, second = checks
+
+        def check_both(value: Any) -> None:
+            first(value)
+            second(value)
+
+        return check_both
+
+    def check_all(value: Any) -> None:
+        for check in checks:
+            check(value)
+
+    return check_all
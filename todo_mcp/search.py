@@ -0,0 +1,133 @@
+"""In-memory full-text index over task titles and metadata."""
+
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .tasks import Task
+
+_TOKEN = re.compile(r"\w+")
+
+# a title hit counts this many metadata hits
+TITLE_WEIGHT = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Split ``text`` into lowercase word tokens."""
+    return _TOKEN.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index from tokens to task ids, kept up to date per task.
+
+    Titles and string metadata values are tokenized; each posting holds a
+    weighted term count. Every query token must match, either exactly or as
+    a prefix of an indexed token (prefix hits score half), and results are
+    ranked by the sum of ``weight * idf`` over the query tokens. The sorted
+    vocabulary makes a prefix lookup a bisect plus a scan of the matches.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._docs: Dict[str, Dict[str, int]] = {}
+        self._vocab: List[str] = []
+
+    @classmethod
+    def build(cls, tasks: Iterable["Task"]) -> "SearchIndex":
+        index = cls()
+        for task in tasks:
+            index.update(task.id, task.title, task._metadata)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def update(self, task_id: str, title: str, metadata: Mapping[str, object] | None = None) -> None:
+        """(Re)index one task from its title and string metadata values."""
+        terms: Dict[str, int] = {}
+        for token in tokenize(title):
+            terms[token] = terms.get(token, 0) + TITLE_WEIGHT
+        for value in (metadata or {}).values():
+            if isinstance(value, str):
+                for token in tokenize(value):
+                    terms[token] = terms.get(token, 0) + 1
+        if self._docs.get(task_id) == terms:
+            return
+        self.remove(task_id)
+        self._docs[task_id] = terms
+        for token, weight in terms.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                bisect.insort(self._vocab, token)
+            posting[task_id] = weight
+
+    def remove(self, task_id: str) -> None:
+        for token in self._docs.pop(task_id, {}):
+            posting = self._postings[token]
+            del posting[task_id]
+            if not posting:
+                del self._postings[token]
+                del self._vocab[bisect.bisect_left(self._vocab, token)]
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """Return up to ``limit`` ``(task_id, score)`` pairs, best first."""
+        scores: Dict[str, float] | None = None
+        total = max(len(self._docs), 1)
+        for term in dict.fromkeys(tokenize(query)):
+            hits: Dict[str, float] = {}
+            for token in self._expand(term):
+                posting = self._postings[token]
+                idf = math.log(1 + total / len(posting))
+                factor = idf if token == term else idf / 2
+                for tid, weight in posting.items():
+                    hits[tid] = max(hits.get(tid, 0.0), weight * factor)
+            if scores is None:
+                scores = hits
+            else:
+                scores = {tid: score + hits[tid] for tid, score in scores.items() if tid in hits}
+            if not scores:
+                return []
+        ranked = sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def _expand(self, term: str) -> List[str]:
+        start = bisect.bisect_left(self._vocab, term)
+        end = start
+        while end < len(self._vocab) and self._vocab[end].startswith(term):
+            end += 1
+        return self._vocab[start:end]
+
+    # -- persistence --------------------------------------------------------
+
+    def save(self, path: Path | str, signature: object) -> None:
+        """Write the index with the store ``signature`` it matches."""
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"signature": signature, "docs": self._docs}), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path | str, signature: object) -> "SearchIndex | None":
+        """Read a saved index, or ``None`` if it is missing or the store changed since."""
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        # signatures are tuples in memory and lists once written
+        if data.get("signature") != json.loads(json.dumps(signature)):
+            return None
+        index = cls()
+        index._docs = data["docs"]
+        for tid, terms in index._docs.items():
+            for token, weight in terms.items():
+                index._postings.setdefault(token, {})[tid] = weight
+        index._vocab = sorted(index._postings)
+        return index
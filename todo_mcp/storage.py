@@ -1,39 +1,957 @@
-"""JSON-based storage for todo-mcp tasks."""
+"""Storage backends for todo-mcp tasks (JSON/msgpack file, journal, SQLite, shards)."""
 
 from __future__ import annotations
 
 import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict
+from types import ModuleType
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
 
-from .tasks import Task, TaskManager
+from . import metrics
+from .tasks import CircularDependencyError, Status, Task, TaskManager, TaskNotFoundError
+
+try:  # optional fast JSON
+    import orjson as _orjson
+
+    orjson: ModuleType | None = _orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+try:  # optional binary format
+    import msgpack
+except ImportError:  # pragma: no cover - depends on environment
+    msgpack = None
+
+try:  # advisory locks on POSIX
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+
+class StoreConflictError(Exception):
+    """Raised by ``save`` when another writer saved since the manager was loaded."""
+
+
+# ---------------------------------------------------------------------------
+# locking and atomic writes
+# ---------------------------------------------------------------------------
+
+
+@contextmanager
+def _locked(path: Path, shared: bool = False) -> Iterator[int]:
+    """Hold an advisory lock on ``path`` and yield its descriptor.
+
+    The lock file's content is the store version, read and bumped with
+    :func:`_read_version` / :func:`_write_version` while the lock is held.
+    Windows has no shared locks, so readers lock exclusively there.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield fd
+    finally:
+        if fcntl is None:  # pragma: no cover - Windows
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)  # also releases the flock
+
+
+def _read_version(fd: int) -> int:
+    os.lseek(fd, 0, os.SEEK_SET)
+    return int(os.read(fd, 32) or 0)
+
+
+def _write_version(fd: int, version: int) -> None:
+    os.ftruncate(fd, 0)
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, str(version).encode("ascii"))
+    os.lseek(fd, 0, os.SEEK_SET)
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data`` so readers see the old or new file, never a mix."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    metrics.add("storage_bytes_written", len(data))
+
+
+def _stat_signature(path: Path) -> Tuple[int, int, int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# ---------------------------------------------------------------------------
+# codecs
+# ---------------------------------------------------------------------------
+
+
+class JsonCodec:
+    """Indented JSON, the default; easy to read and edit by hand.
+
+    Codecs encode one ``id -> task`` entry at a time and join the encoded
+    entries into a document, which lets :class:`FileStorage` cache entries
+    and re-encode only changed tasks. orjson is used when installed.
+    """
+
+    name = "json"
+
+    def decode(self, raw: bytes) -> Dict[str, dict]:
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    def encode_entry(self, tid: str, tdict: dict) -> bytes:
+        if orjson is not None:
+            body = orjson.dumps(tdict, option=orjson.OPT_INDENT_2)
+        else:
+            body = json.dumps(tdict, indent=2).encode("utf-8")
+        return b"  " + json.dumps(tid).encode("utf-8") + b": " + body.replace(b"\n", b"\n  ")
+
+    def join(self, entries: List[bytes]) -> bytes:
+        # same layout as json.dump(data, indent=2)
+        return b"{\n" + b",\n".join(entries) + b"\n}" if entries else b"{}"
+
+
+class CompactJsonCodec(JsonCodec):
+    """JSON without whitespace; roughly half the size of the indented form."""
+
+    name = "compact-json"
+
+    def encode_entry(self, tid: str, tdict: dict) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(tid) + b":" + orjson.dumps(tdict)
+        return json.dumps({tid: tdict}, separators=(",", ":"))[1:-1].encode("utf-8")
+
+    def join(self, entries: List[bytes]) -> bytes:
+        return b"{" + b",".join(entries) + b"}"
+
+
+class MsgpackCodec:
+    """Binary MessagePack map; needs the optional ``msgpack`` package."""
+
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("the msgpack codec requires the 'msgpack' package")
+
+    def decode(self, raw: bytes) -> Dict[str, dict]:
+        return msgpack.unpackb(raw, raw=False)
+
+    def encode_entry(self, tid: str, tdict: dict) -> bytes:
+        return msgpack.packb(tid) + msgpack.packb(tdict)
+
+    def join(self, entries: List[bytes]) -> bytes:
+        # a msgpack map is a length header followed by the packed pairs
+        n = len(entries)
+        if n < 16:
+            header = struct.pack("B", 0x80 | n)
+        elif n < 1 << 16:
+            header = struct.pack(">BH", 0xDE, n)
+        else:
+            header = struct.pack(">BI", 0xDF, n)
+        return header + b"".join(entries)
+
+
+CODECS: Dict[str, Any] = {c.name: c for c in (JsonCodec, CompactJsonCodec, MsgpackCodec)}
+MSGPACK_SUFFIXES = (".msgpack", ".mpk")
+
+
+def get_codec(name: str | None = None, path: Path | str | None = None):
+    """Return a codec by name, or by file extension when no name is given."""
+    if name is None:
+        name = MsgpackCodec.name if path is not None and Path(path).suffix in MSGPACK_SUFFIXES else JsonCodec.name
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise ValueError(f"unknown codec {name!r}; choose from {', '.join(CODECS)}") from None
+
+
+def detect_codec(raw: bytes):
+    """Guess the codec of existing file contents (JSON starts with ``{``)."""
+    if raw.lstrip()[:1] in (b"{", b""):
+        return JsonCodec()
+    return MsgpackCodec()
 
 
 class FileStorage:
-    """Loads and saves a TaskManager from a JSON file."""
+    """Loads and saves a TaskManager from a JSON (or msgpack) file.
+
+    Each task's encoded entry is cached after it is first written. Saving a
+    manager that was loaded from (or last saved to) this file re-encodes only
+    the tasks in ``mgr.dirty`` and splices the cached bytes for the rest, so
+    serialization is O(changed) even though the whole file is rewritten.
+
+    ``codec`` names the write format (see :data:`CODECS`); by default it
+    follows the file extension. Loading detects the format from the content.
+    With ``forward_edges`` only ``dependencies`` are written and
+    ``dependents`` is rebuilt in a single pass on load; files from either
+    mode load in both.
 
-    def __init__(self, path: Path | str | None = None):
+    Several processes may share one file. Saves hold an advisory lock on
+    ``tasks.json.lock``, which also stores a version bumped by every save,
+    and replace the file atomically. Saving a manager loaded at an older
+    version raises :class:`StoreConflictError` instead of losing the other
+    writer's changes; reload and re-apply the mutation to recover. ``save``
+    returns the :meth:`signature` of the file it wrote, taken before the lock
+    is released, so a later write by another process never passes for ours.
+    """
+
+    def __init__(self, path: Path | str | None = None, codec: str | None = None, forward_edges: bool = False):
         # default to .todo-mcp/tasks.json in current working directory
         if path is None:
             path = Path(".todo-mcp") / "tasks.json"
         self.path = Path(path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.codec = get_codec(codec, self.path)
+        self.forward_edges = forward_edges
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        # the manager whose state matches the file, the store version it was
+        # read at, and the encoded entries that are valid for it
+        self._synced: weakref.ref[TaskManager] | None = None
+        self._version = 0
+        self._fragments: Dict[str, bytes] = {}
+
+    def signature(self) -> Tuple[int, int, int] | None:
+        """Return a cheap ``(mtime_ns, size, inode)`` fingerprint of the file.
+
+        Callers keeping a manager in memory compare signatures to notice that
+        the file was rewritten by someone else. ``None`` means no file yet.
+        """
+        return _stat_signature(self.path)
 
     def load(self) -> TaskManager:
+        with _locked(self.lock_path, shared=True) as fd:
+            version = _read_version(fd)
+            mgr = self._build(self._read_data()) if self.path.exists() else TaskManager()
+        self._synced = weakref.ref(mgr)
+        self._version = version
+        self._fragments = {}
+        return mgr
+
+    def save(self, mgr: TaskManager) -> Tuple[int, int, int] | None:
+        synced = self._synced() if self._synced is not None else None
+        with _locked(self.lock_path) as fd:
+            version = self._check_version(fd, synced is mgr)
+            self._write_tasks(mgr.tasks.values(), mgr.dirty, reuse=synced is mgr)
+            _write_version(fd, version + 1)
+            signature = self.signature()
+        mgr.dirty.clear()
+        self._synced = weakref.ref(mgr)
+        self._version = version + 1
+        return signature
+
+    def _check_version(self, fd: int, synced: bool) -> int:
+        # a manager from elsewhere (e.g. a migration) overwrites unconditionally
+        version = _read_version(fd)
+        if synced and version != self._version:
+            raise StoreConflictError(f"{self.path} is at version {version}, expected {self._version}")
+        return version
+
+    def _write_tasks(self, tasks: Iterable[Task], changed: Set[str], reuse: bool) -> None:
+        # cached entries stay valid only for the tasks that did not change
+        if not reuse:
+            self._fragments = {}
+        else:
+            for tid in changed:
+                self._fragments.pop(tid, None)
+        fragments = self._fragments
+        encode = self.codec.encode_entry
+        parts: List[bytes] = []
+        for task in tasks:
+            frag = fragments.get(task.id)
+            if frag is None:
+                frag = fragments[task.id] = encode(task.id, self._task_dict(task))
+            parts.append(frag)
+        _atomic_write(self.path, self.codec.join(parts))
+
+    def _read_data(self) -> Dict[str, dict]:
+        raw = self.path.read_bytes()
+        start = time.perf_counter()
+        data = detect_codec(raw).decode(raw)
+        metrics.observe("storage_parse", time.perf_counter() - start)
+        metrics.add("storage_bytes_read", len(raw))
+        return data
+
+    def _encode_all(self, data: Dict[str, dict]) -> bytes:
+        return self.codec.join([self.codec.encode_entry(tid, tdict) for tid, tdict in data.items()])
+
+    def _task_dict(self, task: Task) -> dict:
+        return task.to_dict(include_dependents=not self.forward_edges)
+
+    def _dump(self, mgr: TaskManager) -> Dict[str, dict]:
+        data: Dict[str, dict] = {}
+        for tid, task in mgr.tasks.items():
+            data[tid] = self._task_dict(task)
+        return data
+
+    @staticmethod
+    def _build(data: Dict[str, dict]) -> TaskManager:
         mgr = TaskManager()
-        if not self.path.exists():
-            return mgr
-        with self.path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
+        derive = False
         # data expected to be dict of id->task-dict
         for tid, tdict in data.items():
             task = Task.from_dict(tdict)
             mgr.tasks[tid] = task
+            derive = derive or "dependents" not in tdict
+        if derive:
+            mgr.rebuild_dependents()
         return mgr
 
-    def save(self, mgr: TaskManager) -> None:
-        data: Dict[str, dict] = {}
+
+class JournalStorage(FileStorage):
+    """FileStorage variant that appends changes to a JSONL journal.
+
+    ``tasks.json`` keeps its usual format and acts as the snapshot. A save
+    appends one line per changed task to ``tasks.journal.jsonl`` next to it::
+
+        {"op": "put", "task": {...}}
+        {"op": "del", "id": "..."}
+
+    so a mutation costs O(changed tasks) instead of rewriting the whole store.
+    ``load`` replays the journal over the snapshot. Once the journal holds
+    ``compact_after`` records it is folded into a new snapshot on a background
+    thread; records are idempotent, so a crash mid-compaction only means some
+    of them get replayed twice. Appends and the final compaction swap take the
+    same inter-process lock and version check as :class:`FileStorage`.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        compact_after: int = 1000,
+        codec: str | None = None,
+        forward_edges: bool = False,
+    ):
+        super().__init__(path, codec=codec, forward_edges=forward_edges)
+        self.journal_path = self.path.with_suffix(".journal.jsonl")
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._records = self._count_records()
+        self._compactor: threading.Thread | None = None
+
+    def signature(self) -> Tuple[object, object]:  # type: ignore[override]
+        return (_stat_signature(self.path), _stat_signature(self.journal_path))
+
+    def load(self) -> TaskManager:
+        with self._lock, _locked(self.lock_path, shared=True) as fd:
+            version = _read_version(fd)
+            data = self._read_data() if self.path.exists() else {}
+            self._replay(data)
+        mgr = self._build(data)
+        self._synced = weakref.ref(mgr)
+        self._version = version
+        return mgr
+
+    def save(self, mgr: TaskManager) -> Tuple[object, object]:  # type: ignore[override]
+        # only the manager matching snapshot + journal may append its dirty
+        # set; anything else is written out as a full snapshot
+        synced = self._synced() if self._synced is not None else None
+        with self._lock, _locked(self.lock_path) as fd:
+            version = self._check_version(fd, synced is mgr)
+            if synced is not mgr:
+                _atomic_write(self.path, self._encode_all(self._dump(mgr)))
+                self.journal_path.unlink(missing_ok=True)
+                self._records = 0
+            elif mgr.dirty:
+                lines = []
+                for tid in sorted(mgr.dirty):
+                    task = mgr.tasks.get(tid)
+                    if task is None:
+                        lines.append(json.dumps({"op": "del", "id": tid}))
+                    else:
+                        lines.append(json.dumps({"op": "put", "task": self._task_dict(task)}))
+                text = "\n".join(lines) + "\n"
+                with self.journal_path.open("a", encoding="utf-8") as f:
+                    f.write(text)
+                metrics.add("storage_bytes_written", len(text.encode("utf-8")))
+                self._records += len(lines)
+            _write_version(fd, version + 1)
+            signature = self.signature()
+        mgr.dirty.clear()
+        self._synced = weakref.ref(mgr)
+        self._version = version + 1
+        if self._records >= self.compact_after:
+            self.compact_in_background()
+        return signature
+
+    def compact_in_background(self) -> threading.Thread:
+        """Start :meth:`compact` on a daemon thread unless one is running."""
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self.compact, name="todo-mcp-compact", daemon=True)
+                self._compactor.start()
+            return self._compactor
+
+    def compact(self) -> None:
+        """Fold the current journal into a fresh snapshot.
+
+        Only the final swap holds the locks; records appended while the new
+        snapshot is being written are carried over into the new journal. The
+        result is dropped if another thread or process replaced the snapshot
+        or journal in the meantime. Compaction does not change the store's
+        content, so it leaves the version alone.
+        """
+        with self._lock, _locked(self.lock_path, shared=True):
+            snapshot = _stat_signature(self.path)
+            journal = _stat_signature(self.journal_path)
+            if journal is None or not journal[1]:
+                return
+            offset = journal[1]
+            data = self._read_data() if self.path.exists() else {}
+        self._replay(data, limit=offset)
+        encoded = self._encode_all(data)
+        with self._lock, _locked(self.lock_path):
+            current = _stat_signature(self.journal_path)
+            if _stat_signature(self.path) != snapshot or current is None or current[2] != journal[2]:
+                return
+            with self.journal_path.open("rb") as f:
+                f.seek(offset)
+                tail = f.read()
+            _atomic_write(self.path, encoded)
+            if tail:
+                _atomic_write(self.journal_path, tail)
+            else:
+                self.journal_path.unlink(missing_ok=True)
+            self._records = tail.count(b"\n")
+
+    def _count_records(self) -> int:
+        if not self.journal_path.exists():
+            return 0
+        with self.journal_path.open("rb") as f:
+            return sum(1 for _ in f)
+
+    def _replay(self, data: Dict[str, dict], limit: int | None = None) -> None:
+        if not self.journal_path.exists():
+            return
+        with self.journal_path.open("rb") as f:
+            raw = f.read() if limit is None else f.read(limit)
+        lines: List[bytes] = raw.split(b"\n")
+        for i, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                # a torn final line from an interrupted append is ignored
+                if i == len(lines) - 1:
+                    break
+                raise
+            if rec["op"] == "put":
+                data[rec["task"]["id"]] = rec["task"]
+            elif rec["op"] == "del":
+                data.pop(rec["id"], None)
+
+
+class SqliteStorage:
+    """Stores tasks in a SQLite database; a drop-in for :class:`FileStorage`.
+
+    Tasks, dependency edges and subtask edges are rows, indexed on status,
+    parent and dependency target. ``dependents`` is derived from the
+    dependency table rather than stored. The database runs in WAL mode so
+    readers never block on a writer.
+
+    ``save`` rewrites only the rows of dirty tasks when the manager was loaded
+    from (or last saved to) this database. :meth:`get_task`,
+    :meth:`ready_task_ids` and :meth:`add_dependency` work directly on the
+    tables for callers that do not hold a manager in memory.
+
+    Every write bumps the ``meta`` version. A manager remembers the version it
+    was read at, and an incremental save raises :class:`StoreConflictError`
+    when another connection or process has written since. A write that
+    still finds the database locked after ``busy_timeout`` seconds raises it
+    too, so callers retry both the same way.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        status TEXT NOT NULL,
+        parent TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS dependencies (
+        task_id TEXT NOT NULL,
+        depends_on TEXT NOT NULL,
+        PRIMARY KEY (task_id, depends_on)
+    );
+    CREATE TABLE IF NOT EXISTS subtasks (
+        parent_id TEXT NOT NULL,
+        subtask_id TEXT NOT NULL,
+        PRIMARY KEY (parent_id, subtask_id)
+    );
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+    CREATE INDEX IF NOT EXISTS idx_tasks_parent ON tasks(parent);
+    CREATE INDEX IF NOT EXISTS idx_dependencies_target ON dependencies(depends_on);
+    INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+    """
+
+    # Task.to_dict keys that live in their own columns or tables; everything
+    # else (metadata, agent_context, ...) goes into the ``data`` JSON column
+    _COLUMNS = ("id", "title", "status", "parent", "dependencies", "dependents", "subtasks")
+
+    def __init__(self, path: Path | str | None = None, busy_timeout: float = 30.0):
+        if path is None:
+            path = Path(".todo-mcp") / "tasks.db"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        # waits up to busy_timeout for other writers before reporting "locked"
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._synced: weakref.ref[TaskManager] | None = None
+        self._version = 0
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def signature(self) -> int:
+        """Return the store version, bumped by every committed write."""
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def load(self) -> TaskManager:
+        mgr = TaskManager()
+        with self._lock:
+            # one read transaction so the rows match the version we record
+            self._conn.execute("BEGIN")
+            try:
+                version = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+                rows = self._conn.execute("SELECT id, title, status, parent, data FROM tasks ORDER BY rowid").fetchall()
+                edges = self._conn.execute("SELECT task_id, depends_on FROM dependencies").fetchall()
+                subs = self._conn.execute("SELECT parent_id, subtask_id FROM subtasks").fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+        for row in rows:
+            task = self._task_from_row(row)
+            mgr.tasks[task.id] = task
+        for task_id, depends_on in edges:
+            mgr.tasks[task_id].add_dependency(depends_on)
+            if depends_on in mgr.tasks:
+                mgr.tasks[depends_on].add_dependent(task_id)
+        for parent_id, subtask_id in subs:
+            mgr.tasks[parent_id].add_subtask(subtask_id)
+        self._synced = weakref.ref(mgr)
+        self._version = version
+        return mgr
+
+    def save(self, mgr: TaskManager) -> int:
+        """Write ``mgr`` and return the version this write committed."""
+        synced = self._synced() if self._synced is not None else None
+        full = synced is not mgr
+        ids = list(mgr.tasks) if full else sorted(mgr.dirty)
+        with self._transaction() as cur:
+            version = cur.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+            if not full and version != self._version:
+                raise StoreConflictError(f"{self.path} is at version {version}, expected {self._version}")
+            if full:
+                cur.execute("DELETE FROM dependencies")
+                cur.execute("DELETE FROM subtasks")
+                cur.execute("DELETE FROM tasks")
+            for tid in ids:
+                task = mgr.tasks.get(tid)
+                if not full:
+                    cur.execute("DELETE FROM dependencies WHERE task_id = ?", (tid,))
+                    cur.execute("DELETE FROM subtasks WHERE parent_id = ?", (tid,))
+                if task is None:
+                    cur.execute("DELETE FROM tasks WHERE id = ?", (tid,))
+                    continue
+                self._write_task(cur, task)
+        mgr.dirty.clear()
+        self._synced = weakref.ref(mgr)
+        self._version = version + 1
+        return self._version
+
+    # -- targeted operations --------------------------------------------
+
+    def get_task(self, task_id: str) -> Task | None:
+        """Fetch a single task, including its edges, without loading the store."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, status, parent, data FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            task = self._task_from_row(row)
+            task.dependencies = {
+                r[0] for r in self._conn.execute("SELECT depends_on FROM dependencies WHERE task_id = ?", (task_id,))
+            }
+            task.dependents = {
+                r[0] for r in self._conn.execute("SELECT task_id FROM dependencies WHERE depends_on = ?", (task_id,))
+            }
+            task.subtasks = {
+                r[0] for r in self._conn.execute("SELECT subtask_id FROM subtasks WHERE parent_id = ?", (task_id,))
+            }
+        return task
+
+    def ready_task_ids(self) -> List[str]:
+        """Return ids of READY tasks using the status index."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM tasks WHERE status = ? ORDER BY rowid", (Status.READY.name,))
+            return [r[0] for r in rows]
+
+    def add_dependency(self, task_id: str, depends_on: str) -> None:
+        """Insert one dependency edge and update the dependent's status row."""
+        with self._transaction() as cur:
+            for tid in (task_id, depends_on):
+                if cur.execute("SELECT 1 FROM tasks WHERE id = ?", (tid,)).fetchone() is None:
+                    raise TaskNotFoundError(tid)
+            # walk upstream from depends_on; reaching task_id means a cycle
+            cycle = cur.execute(
+                """
+                WITH RECURSIVE upstream(id) AS (
+                    SELECT ?
+                    UNION
+                    SELECT d.depends_on FROM dependencies d JOIN upstream u ON d.task_id = u.id
+                )
+                SELECT 1 FROM upstream WHERE id = ? LIMIT 1
+                """,
+                (depends_on, task_id),
+            ).fetchone()
+            if cycle:
+                raise CircularDependencyError(f"Adding dependency {task_id} -> {depends_on} would create a cycle")
+            cur.execute("INSERT OR IGNORE INTO dependencies (task_id, depends_on) VALUES (?, ?)", (task_id, depends_on))
+            cur.execute(
+                """
+                UPDATE tasks SET status = CASE WHEN EXISTS (
+                    SELECT 1 FROM dependencies d JOIN tasks t ON t.id = d.depends_on
+                    WHERE d.task_id = tasks.id AND t.status != :done
+                ) THEN :blocked ELSE :ready END
+                WHERE id = :id AND status NOT IN (:done, :claimed)
+                """,
+                {
+                    "id": task_id,
+                    "done": Status.COMPLETED.name,
+                    "claimed": Status.IN_PROGRESS.name,
+                    "blocked": Status.BLOCKED.name,
+                    "ready": Status.READY.name,
+                },
+            )
+
+    # -- helpers ----------------------------------------------------------
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        with self._lock:
+            cur = self._conn.cursor()
+            try:
+                cur.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as exc:
+                raise self._busy(exc)
+            try:
+                yield cur
+                cur.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                cur.execute("COMMIT")
+            except BaseException as exc:
+                if self._conn.in_transaction:
+                    cur.execute("ROLLBACK")
+                if isinstance(exc, sqlite3.OperationalError):
+                    raise self._busy(exc)
+                raise
+
+    def _busy(self, exc: sqlite3.OperationalError) -> Exception:
+        # another writer held the lock for longer than busy_timeout
+        code = getattr(exc, "sqlite_errorcode", 0) & 0xFF  # primary code of an extended one
+        if code in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED) or "locked" in str(exc):
+            return StoreConflictError(f"{self.path} is locked by another writer")
+        return exc
+
+    def _task_from_row(self, row: tuple) -> Task:
+        tid, title, status, parent, data = row
+        tdict = json.loads(data)
+        tdict.update(id=tid, title=title, status=status, parent=parent)
+        return Task.from_dict(tdict)
+
+    def _write_task(self, cur: sqlite3.Cursor, task: Task) -> None:
+        tdict = task.to_dict()
+        data = {k: v for k, v in tdict.items() if k not in self._COLUMNS}
+        cur.execute(
+            """
+            INSERT INTO tasks (id, title, status, parent, data) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                title = excluded.title, status = excluded.status,
+                parent = excluded.parent, data = excluded.data
+            """,
+            (task.id, task.title, task.status.name, task.parent, json.dumps(data)),
+        )
+        cur.executemany(
+            "INSERT INTO dependencies (task_id, depends_on) VALUES (?, ?)",
+            [(task.id, dep) for dep in task.dependencies],
+        )
+        cur.executemany(
+            "INSERT INTO subtasks (parent_id, subtask_id) VALUES (?, ?)",
+            [(task.id, sub) for sub in task.subtasks],
+        )
+
+
+DEFAULT_WORKSPACE = "default"
+
+
+class ShardedStorage:
+    """Keeps one file store (shard) per workspace plus a global index.
+
+    A task's workspace is ``metadata["workspace"]``; tasks without one stay in
+    the shard they were first saved to, and new ones go to
+    ``default_workspace``. Shards are forward-edge :class:`FileStorage` files
+    under ``root``. ``index.json`` maps every task id to ``[shard, status]``
+    (followed by its dependencies, if it has any) and keeps per-shard status
+    counts, so :meth:`dashboard` is answered without opening any shard and a
+    save rewrites only shards that changed.
+
+    :meth:`workspace` returns a storage that loads and saves a single shard;
+    tasks in other shards are then only visible as statuses in
+    ``mgr.external`` (so cycles spanning shards are not detected there).
+
+    Loads and saves lock ``index.json.lock``, which holds a version bumped by
+    every save; as with :class:`FileStorage`, an incremental save from a
+    stale manager raises :class:`StoreConflictError`.
+    """
+
+    def __init__(
+        self,
+        root: Path | str | None = None,
+        codec: str | None = None,
+        workspaces: Iterable[str] | None = None,
+        default_workspace: str = DEFAULT_WORKSPACE,
+    ):
+        if root is None:
+            root = Path(".todo-mcp") / "shards"
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / "index.json"
+        self.lock_path = self.root / "index.json.lock"
+        self.codec = codec
+        self.workspaces = frozenset(workspaces) if workspaces is not None else None
+        self.default_workspace = default_workspace
+        self._shards: Dict[str, FileStorage] = {}
+        self._synced: weakref.ref[TaskManager] | None = None
+        self._index: Dict[str, dict] | None = None
+        self._version = 0
+        # shard -> ids it holds, for the loaded shards of the synced manager
+        self._members: Dict[str, Dict[str, None]] = {}
+
+    def workspace(self, name: str) -> "ShardedStorage":
+        """Return a storage limited to the shard of workspace ``name``."""
+        return ShardedStorage(self.root, codec=self.codec, workspaces=[name], default_workspace=name)
+
+    def signature(self) -> Tuple[int, int, int] | None:
+        # every save rewrites the index, whichever shards it touched
+        return _stat_signature(self.path)
+
+    def dashboard(self) -> Dict[str, Dict[str, int]]:
+        """Return ``{shard: {status: count}}`` straight from the index."""
+        return {name: dict(counts) for name, counts in self._read_index()["shards"].items()}
+
+    def load(self) -> TaskManager:
+        with _locked(self.lock_path, shared=True) as fd:
+            version = _read_version(fd)
+            mgr = self._load(self._read_index())
+        self._version = version
+        return mgr
+
+    def _load(self, index: Dict[str, dict]) -> TaskManager:
+        names = self.workspaces if self.workspaces is not None else index["shards"].keys()
+        mgr = TaskManager()
+        home: Dict[str, str] = {}
+        self._members = {}
+        for name in names:
+            storage = self._shard(name)
+            storage._fragments = {}
+            data = storage._read_data() if storage.path.exists() else {}
+            self._members[name] = dict.fromkeys(data)
+            for tid, tdict in data.items():
+                mgr.tasks[tid] = Task.from_dict(tdict)
+                home[tid] = name
+        mgr.rebuild_dependents()
+        # tasks depending on another shard may have been unblocked since
+        # their own shard was written
         for tid, task in mgr.tasks.items():
-            data[tid] = task.to_dict()
-        with self.path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+            crossing = False
+            for dep in task.dependencies:
+                if dep not in mgr.tasks:
+                    entry = index["tasks"].get(dep)
+                    if entry is not None:
+                        mgr.external[dep] = Status[entry[1]]
+                    crossing = True
+                elif home[dep] != home[tid]:
+                    crossing = True
+            if crossing:
+                mgr.refresh_status(tid)
+        self._index = index
+        self._synced = weakref.ref(mgr)
+        return mgr
+
+    def save(self, mgr: TaskManager) -> Tuple[int, int, int] | None:
+        """Write ``mgr`` and return the :meth:`signature` of the new index."""
+        synced = self._synced() if self._synced is not None else None
+        full = synced is not mgr or self._index is None
+        with _locked(self.lock_path) as fd:
+            version = _read_version(fd)
+            if not full and version != self._version:
+                raise StoreConflictError(f"{self.path} is at version {version}, expected {self._version}")
+            self._save(mgr, full)
+            _write_version(fd, version + 1)
+            signature = self.signature()
+        self._version = version + 1
+        return signature
+
+    def _save(self, mgr: TaskManager, full: bool) -> None:
+        index = self._index
+        if full or index is None:
+            index = self._read_index()
+        entries, counts = index["tasks"], index["shards"]
+        if full:
+            # rewrite every shard this storage can see from scratch
+            visible = [tid for tid, entry in entries.items() if self._visible(entry[0])]
+            changed = set(mgr.tasks).union(visible)
+            self._members = {name: {} for name in counts if self._visible(name)}
+        else:
+            changed = set(mgr.dirty)
+        touched: Set[str] = set()
+        moved: Dict[str, List[Task]] = {}
+        flipped: Set[str] = set()  # tasks whose status changed
+        for tid in changed:
+            old = entries.pop(tid, None)
+            if old is not None:
+                counts[old[0]][old[1]] -= 1
+                if old[0] in self._members:
+                    self._members[old[0]].pop(tid, None)
+                touched.add(old[0])
+            task = mgr.tasks.get(tid)
+            if task is None:
+                continue
+            name = self._workspace_of(task, old)
+            entries[tid] = [name, task.status.name]
+            if task.dependencies:
+                entries[tid].append(sorted(task.dependencies))
+            if old is None or old[1] != task.status.name:
+                flipped.add(tid)
+            shard_counts = counts.setdefault(name, {})
+            shard_counts[task.status.name] = shard_counts.get(task.status.name, 0) + 1
+            if self._visible(name):
+                self._members.setdefault(name, {})[tid] = None
+                touched.add(name)
+            else:
+                moved.setdefault(name, []).append(task)
+        if flipped:
+            self._rederive_unloaded(mgr, entries, counts, flipped)
+        for name in touched:
+            if name in self._members:
+                storage = self._shard(name)
+                storage._write_tasks((mgr.tasks[tid] for tid in self._members[name]), mgr.dirty, reuse=not full)
+        for name, tasks in moved.items():
+            self._merge_into(name, tasks)
+        for name in list(counts):
+            counts[name] = {status: n for status, n in counts[name].items() if n}
+        self._write_index(index)
+        self._index = index
+        mgr.dirty.clear()
+        self._synced = weakref.ref(mgr)
+
+    def _rederive_unloaded(
+        self, mgr: TaskManager, entries: Dict[str, list], counts: Dict[str, dict], flipped: Set[str]
+    ) -> None:
+        # dependents in shards this storage did not load get READY/BLOCKED
+        # from their dependencies' entries (missing ones were archived); their
+        # shard files catch up when they are next loaded
+        for tid, entry in entries.items():
+            if len(entry) < 3 or tid in mgr.tasks or entry[1] not in ("READY", "BLOCKED"):
+                continue
+            if flipped.isdisjoint(entry[2]):
+                continue
+            blocked = any(dep in entries and entries[dep][1] != "COMPLETED" for dep in entry[2])
+            status = "BLOCKED" if blocked else "READY"
+            if status != entry[1]:
+                shard_counts = counts[entry[0]]
+                shard_counts[entry[1]] -= 1
+                shard_counts[status] = shard_counts.get(status, 0) + 1
+                entry[1] = status
+
+    def _visible(self, name: str) -> bool:
+        return self.workspaces is None or name in self.workspaces
+
+    def _workspace_of(self, task: Task, old: List[str] | None) -> str:
+        workspace = task.metadata.get("workspace")
+        if isinstance(workspace, str) and workspace:
+            return workspace
+        return old[0] if old is not None else self.default_workspace
+
+    def _shard(self, name: str) -> FileStorage:
+        storage = self._shards.get(name)
+        if storage is None:
+            # keep file names portable whatever the workspace is called
+            filename = re.sub(r"[^A-Za-z0-9_.-]", lambda m: f"%{ord(m.group()):02X}", name)
+            suffix = ".msgpack" if self.codec == MsgpackCodec.name else ".json"
+            storage = FileStorage(self.root / f"{filename}{suffix}", codec=self.codec, forward_edges=True)
+            self._shards[name] = storage
+        return storage
+
+    def _merge_into(self, name: str, tasks: List[Task]) -> None:
+        # a task moved into a shard this storage did not load
+        storage = self._shard(name)
+        data = storage._read_data() if storage.path.exists() else {}
+        for task in tasks:
+            data[task.id] = storage._task_dict(task)
+        _atomic_write(storage.path, storage._encode_all(data))
+
+    def _read_index(self) -> Dict[str, dict]:
+        if not self.path.exists():
+            return {"tasks": {}, "shards": {}}
+        return json.loads(self.path.read_bytes())
+
+    def _write_index(self, index: Dict[str, dict]) -> None:
+        _atomic_write(self.path, json.dumps(index, separators=(",", ":")).encode("utf-8"))
+
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def open_storage(
+    path: Path | str | None = None,
+    journal: bool = False,
+    codec: str | None = None,
+    forward_edges: bool = False,
+    workspace: str | None = None,
+) -> FileStorage | SqliteStorage | ShardedStorage:
+    """Return the storage backend for ``path`` (default ``.todo-mcp/tasks.json``).
+
+    Paths ending in ``.db``/``.sqlite``/``.sqlite3`` open a :class:`SqliteStorage`
+    (which always stores forward edges only). A directory, or a path without
+    an extension, opens a :class:`ShardedStorage`, limited to ``workspace``
+    when given. Anything else is a file store written with ``codec`` (chosen
+    from the extension when omitted) and journaled when ``journal`` is set.
+    """
+    if path is not None and Path(path).suffix in SQLITE_SUFFIXES:
+        if journal or codec:
+            raise ValueError("journal and codec options only apply to file stores")
+        return SqliteStorage(path)
+    if path is not None and (Path(path).is_dir() or not Path(path).suffix):
+        if journal:
+            raise ValueError("journal mode does not apply to sharded stores")
+        sharded = ShardedStorage(path, codec=codec)
+        return sharded.workspace(workspace) if workspace else sharded
+    if workspace:
+        raise ValueError("workspace selection needs a sharded (directory) store")
+    if journal:
+        return JournalStorage(path, codec=codec, forward_edges=forward_edges)
+    return FileStorage(path, codec=codec, forward_edges=forward_edges)
@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import heapq
+import time
+from collections import deque
 from enum import Enum, auto
-from typing import Dict, List, Set
+from sys import intern
+from typing import AbstractSet, Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, NoReturn, Set, Tuple
+
+from .search import SearchIndex
 
 
 class Status(Enum):
@@ -15,42 +20,206 @@ class Status(Enum):
     COMPLETED = auto()
 
 
-@dataclass
+class _EdgeSet(Set[str]):
+    """A task's edge set: read-only to callers, written by :class:`Task`.
+
+    The set methods that mutate are disabled so edges cannot change behind
+    the manager's indexes; Task's helpers write through ``set.add`` and
+    ``set.discard`` directly.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args: object) -> NoReturn:
+        raise AttributeError("task edges are read-only; use Task.add_dependency and friends, or assign a new set")
+
+    add = discard = remove = pop = clear = update = _read_only
+    difference_update = intersection_update = symmetric_difference_update = _read_only
+    __ior__ = __iand__ = __isub__ = __ixor__ = _read_only
+
+
+# shared placeholder for edge sets that were never written to
+_EMPTY = _EdgeSet()
+
+
+def _edge_set(value: Iterable[str] | None) -> _EdgeSet:
+    items = _EdgeSet(value) if value is not None else None
+    return items if items else _EMPTY
+
+
+def _lookup_key(value: object) -> tuple | None:
+    # metadata values are bucketed by type too, so 1, 1.0 and True differ;
+    # unhashable values (lists, dicts) are not indexed
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return (type(value).__name__, value)
+
+
 class Task:
-    id: str
-    title: str
-    status: Status = Status.PENDING
-    dependencies: Set[str] = field(default_factory=set)
-    dependents: Set[str] = field(default_factory=set)
-    parent: str | None = None  # optional parent task id
-    subtasks: Set[str] = field(default_factory=set)
-    metadata: Dict[str, object] = field(default_factory=dict)
-    agent_context: Dict[str, object] = field(default_factory=dict)
-
-    def to_dict(self) -> Dict[str, object]:
-        """Serialize task for JSON storage."""
-        return {
+    """A unit of work in the task graph.
+
+    Tasks are slotted and keep empty containers out of memory: the edge sets
+    (``dependencies``, ``dependents``, ``subtasks``) share one empty frozenset
+    until :meth:`add_dependency` and friends write to them, and ``metadata`` /
+    ``agent_context`` are only created when first accessed. Edge sets read
+    as sets but are read-only, empty or not: change them through the helpers
+    (or assign a new set), not with ``task.dependencies.add``.
+    """
+
+    __slots__ = (
+        "id",
+        "title",
+        "status",
+        "parent",
+        "completed_at",
+        "_dependencies",
+        "_dependents",
+        "_subtasks",
+        "_metadata",
+        "_agent_context",
+    )
+    _dependencies: _EdgeSet
+    _dependents: _EdgeSet
+    _subtasks: _EdgeSet
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        status: Status = Status.PENDING,
+        dependencies: Iterable[str] | None = None,
+        dependents: Iterable[str] | None = None,
+        parent: str | None = None,  # optional parent task id
+        subtasks: Iterable[str] | None = None,
+        metadata: Dict[str, object] | None = None,
+        agent_context: Dict[str, object] | None = None,
+        completed_at: float | None = None,  # unix time of completion
+    ):
+        self.id = id
+        self.title = title
+        self.status = status
+        self.parent = parent
+        self.completed_at = completed_at
+        self.dependencies = dependencies
+        self.dependents = dependents
+        self.subtasks = subtasks
+        self._metadata = metadata or None
+        self._agent_context = agent_context or None
+
+    # edge sets: shared empty sentinel until the first write
+
+    @property
+    def dependencies(self) -> AbstractSet[str]:
+        return self._dependencies
+
+    @dependencies.setter
+    def dependencies(self, value: Iterable[str] | None) -> None:
+        self._dependencies = _edge_set(value)
+
+    @property
+    def dependents(self) -> AbstractSet[str]:
+        return self._dependents
+
+    @dependents.setter
+    def dependents(self, value: Iterable[str] | None) -> None:
+        self._dependents = _edge_set(value)
+
+    @property
+    def subtasks(self) -> AbstractSet[str]:
+        return self._subtasks
+
+    @subtasks.setter
+    def subtasks(self, value: Iterable[str] | None) -> None:
+        self._subtasks = _edge_set(value)
+
+    def add_dependency(self, task_id: str) -> None:
+        if self._dependencies is _EMPTY:
+            self._dependencies = _EdgeSet()
+        set.add(self._dependencies, task_id)
+
+    def add_dependent(self, task_id: str) -> None:
+        if self._dependents is _EMPTY:
+            self._dependents = _EdgeSet()
+        set.add(self._dependents, task_id)
+
+    def add_subtask(self, task_id: str) -> None:
+        if self._subtasks is _EMPTY:
+            self._subtasks = _EdgeSet()
+        set.add(self._subtasks, task_id)
+
+    def discard_dependent(self, task_id: str) -> None:
+        if task_id in self._dependents:
+            set.discard(self._dependents, task_id)
+
+    # dicts are edited in place by callers, so they materialize on access
+
+    @property
+    def metadata(self) -> Dict[str, object]:
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Dict[str, object] | None) -> None:
+        self._metadata = value or None
+
+    @property
+    def agent_context(self) -> Dict[str, object]:
+        if self._agent_context is None:
+            self._agent_context = {}
+        return self._agent_context
+
+    @agent_context.setter
+    def agent_context(self, value: Dict[str, object] | None) -> None:
+        self._agent_context = value or None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Task):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Task(id={self.id!r}, title={self.title!r}, status={self.status})"
+
+    def to_dict(self, include_dependents: bool = True) -> Dict[str, object]:
+        """Serialize task for JSON storage.
+
+        ``dependents`` mirrors other tasks' ``dependencies``; stores that
+        rebuild it on load pass ``include_dependents=False`` to skip it.
+        """
+        data: Dict[str, object] = {
             "id": self.id,
             "title": self.title,
             "status": self.status.name,
-            "dependencies": list(self.dependencies),
-            "dependents": list(self.dependents),
+            "dependencies": list(self._dependencies),
+            "dependents": list(self._dependents),
             "parent": self.parent,
-            "subtasks": list(self.subtasks),
-            "metadata": self.metadata,
-            "agent_context": self.agent_context,
+            "subtasks": list(self._subtasks),
+            "metadata": self._metadata or {},
+            "agent_context": self._agent_context or {},
+            "completed_at": self.completed_at,
         }
+        if not include_dependents:
+            del data["dependents"]
+        return data
 
     @classmethod
-    def from_dict(cls, data: Dict[str, object]) -> "Task":
-        t = cls(id=data["id"], title=data.get("title", ""))
+    def from_dict(cls, data: Dict[str, Any]) -> "Task":
+        # ids recur in many edge sets; interning makes them share one string
+        t = cls(id=intern(data["id"]), title=data.get("title", ""))
         t.status = Status[data.get("status", "PENDING")]
-        t.dependencies = set(data.get("dependencies", []))
-        t.dependents = set(data.get("dependents", []))
-        t.parent = data.get("parent")
-        t.subtasks = set(data.get("subtasks", []))
-        t.metadata = data.get("metadata", {}) or {}
-        t.agent_context = data.get("agent_context", {}) or {}
+        t.dependencies = map(intern, data.get("dependencies", ()))
+        t.dependents = map(intern, data.get("dependents", ()))
+        parent = data.get("parent")
+        t.parent = intern(parent) if parent else None
+        t.subtasks = map(intern, data.get("subtasks", ()))
+        t.metadata = data.get("metadata")
+        t.agent_context = data.get("agent_context")
+        t.completed_at = data.get("completed_at")
         return t
 
 
@@ -62,40 +231,471 @@ class TaskNotFoundError(KeyError):
     pass
 
 
+# per task: status, dependencies and parent, as compared by carry_events
+FeedState = Tuple[Status, FrozenSet[str], "str | None"]
+
+
+class LeaseError(Exception):
+    """Raised when renewing or releasing a task the caller does not hold."""
+
+
 class TaskManager:
-    """Simple in-memory task manager with dependency handling."""
+    """Simple in-memory task manager with dependency handling.
+
+    Readiness is tracked incrementally: each task's number of incomplete
+    dependencies and the set of READY ids are built on first use and then
+    kept up to date by the manager's own methods, so :meth:`get_ready_tasks`
+    costs O(ready) and completing a task O(direct dependents).
+
+    Cycle checks use a topological order kept in the same lazy way
+    (Pearce–Kelly): an edge that already agrees with the order is accepted
+    with one comparison, otherwise only tasks between the two endpoints in
+    the order are searched and reordered.
+
+    :meth:`next_tasks` ranks READY tasks from a lazily invalidated heap by
+    ``metadata["priority"]`` (higher first), ``metadata["due"]`` (earlier
+    first) and critical path, the longest chain of incomplete tasks waiting
+    downstream; chain lengths are cached and updated as edges are added and
+    tasks complete.
+
+    Parents keep completed/total counters over their subtasks. Completing
+    the last open subtask completes the parent, and that cascades up the
+    ``parent`` chain; :meth:`progress` reads the counters.
+
+    :meth:`blockers` and :meth:`impact` memoize transitive walks. A cached
+    walk is dropped only when an edge or completion touches its start task or
+    a task it reached, so unrelated parts of the graph keep their entries.
+
+    Workers :meth:`claim` READY tasks, which become IN_PROGRESS with a lease
+    (``agent_context["lease"]``: holder and expiry time). Expired leases are
+    reclaimed lazily from a heap ordered by expiry on the next claim.
+
+    :meth:`query` filters through secondary indexes (status, parent, and any
+    metadata key once it has been queried), each built on first use.
+
+    Every change made through the manager is appended to a change feed of
+    events numbered by ``seq`` (``created``, ``edge_added``,
+    ``status_changed``); :meth:`events_since` reads it and
+    :meth:`carry_events` continues it on a reloaded manager.
+
+    Code that edits ``tasks``, edges or statuses directly should call
+    :meth:`reindex`, and :meth:`touch` after changing a task's title or
+    metadata.
+    """
 
     def __init__(self):
         self.tasks: Dict[str, Task] = {}
+        # ids of tasks changed since the last load/save; storage backends that
+        # write incrementally persist only these and then clear the set
+        self.dirty: Set[str] = set()
+        # statuses of tasks that edges may reference but that live outside
+        # this manager (e.g. in a storage shard that was not loaded)
+        self.external: Dict[str, Status] = {}
+        # ids of completed tasks moved to the cold archive; they count as
+        # satisfied dependencies without being loaded
+        self.archived: AbstractSet[str] = frozenset()
+        # ready index: incomplete-dependency counts per task (None until first
+        # use) and READY ids in the order they became ready
+        self._pending: Dict[str, int] | None = None
+        self._ready: Dict[str, None] = {}
+        # topological position per task, dependencies before dependents
+        # (None until first use); new tasks go after everything else
+        self._order: Dict[str, int] | None = None
+        self._next_order = 0
+        # scheduling: critical-path length per task, and a heap of
+        # (rank, id) for READY tasks where only entries matching _ranks are live
+        self._chain: Dict[str, int] | None = None
+        self._heap: List[Tuple[tuple, str]] | None = None
+        self._ranks: Dict[str, tuple] = {}
+        # parent id -> [completed, total] over its subtasks (None until first use)
+        self._rollup: Dict[str, List[int]] | None = None
+        # memoized closures: (direction, id, depth, limit) -> {id: depth},
+        # plus the keys each task appears in (as start or result); one pair,
+        # swapped as a whole, so concurrent readers never fill half of each
+        self._closure_cache: Tuple[Dict[tuple, Dict[str, int]], Dict[str, Set[tuple]]] = ({}, {})
+        # (expires, id) for leased tasks, soonest first; entries whose lease
+        # was renewed or released are skipped when popped (None until first use)
+        self._leases: List[Tuple[float, str]] | None = None
+        # secondary indexes for query(): status -> ids and parent -> ids (None
+        # until first use), and per metadata key (value -> ids, id -> value)
+        self._by_status: Dict[Status, Dict[str, None]] | None = None
+        self._by_parent: Dict[str | None, Dict[str, None]] | None = None
+        self._by_meta: Dict[str, Tuple[Dict[tuple, Dict[str, None]], Dict[str, tuple]]] = {}
+        # optional full-text index; once attached it is updated by add_task,
+        # apply_batch, touch and detach
+        self.search_index: SearchIndex | None = None
+        # change feed: the newest events, each with a "seq" one above the last
+        self.seq = 0
+        self._events: List[Dict[str, object]] = []
+
+    # events beyond this many are dropped, oldest first
+    EVENT_LOG_SIZE = 10_000
 
     def add_task(self, task: Task) -> None:
-        if task.id in self.tasks:
+        if task.id in self.tasks or task.id in self.archived:
             raise KeyError(f"Task with id '{task.id}' already exists")
         self.tasks[task.id] = task
+        self.dirty.add(task.id)
+        self._emit("created", task.id, title=task.title)
+        self._lookup_add(task)
+        if self.search_index is not None:
+            self.search_index.update(task.id, task.title, task._metadata)
+        if self._order is not None:
+            self._order[task.id] = self._next_order
+            self._next_order += 1
+        self._refresh_chain(task.id)
         self._update_status(task)
 
     def add_dependency(self, task_id: str, depends_on: str) -> None:
         task = self._get(task_id)
-        other = self._get(depends_on)
+        other = self.tasks.get(depends_on)
+        if other is None and depends_on not in self.external and depends_on not in self.archived:
+            raise TaskNotFoundError(depends_on)
         # prevent circular
         if self._creates_cycle(task_id, depends_on):
             raise CircularDependencyError(f"Adding dependency {task_id} -> {depends_on} would create a cycle")
-        task.dependencies.add(depends_on)
-        other.dependents.add(task_id)
-        self._update_status(task)
+        pending = self._index()
+        self._forget_closures((task_id, depends_on))
+        if depends_on not in task.dependencies:
+            self._emit("edge_added", task_id, depends_on=depends_on)
+            if not self._is_complete(depends_on):
+                pending[task_id] += 1
+        task.add_dependency(depends_on)
+        self.dirty.add(task_id)
+        if other is not None:
+            other.add_dependent(task_id)
+            self.dirty.add(depends_on)
+            self._refresh_chain(depends_on)
+        self._derive_status(task)
 
     def mark_complete(self, task_id: str) -> None:
         task = self._get(task_id)
-        task.status = Status.COMPLETED
-        # propagate to dependents
-        for dep_id in task.dependents:
-            self._update_status(self.tasks[dep_id])
-        # propagate to parent
-        if task.parent:
-            parent = self._get(task.parent)
-            # if all subtasks complete, mark parent complete
-            if all(self.tasks[sub].status == Status.COMPLETED for sub in parent.subtasks):
-                parent.status = Status.COMPLETED
+        if task.status == Status.COMPLETED:
+            return  # keep the first completion time, which archiving ages by
+        task.completed_at = time.time()
+        self.dirty.add(task_id)
+        self._drop_lease(task)
+        # propagates to dependents and rolls up the parent chain
+        self._set_status(task, Status.COMPLETED)
+
+    def claim(self, holder: str, lease_seconds: float, now: float | None = None) -> Task | None:
+        """Move the most urgent READY task to IN_PROGRESS under a lease for ``holder``.
+
+        Expired leases are reclaimed first. Returns ``None`` when nothing is ready.
+        """
+        now = time.time() if now is None else now
+        self.reclaim_expired(now)
+        picked = self.next_tasks(1)
+        if not picked:
+            return None
+        task = picked[0]
+        self._set_status(task, Status.IN_PROGRESS)
+        self._lease(task, holder, now + lease_seconds)
+        return task
+
+    def renew(self, task_id: str, holder: str, lease_seconds: float, now: float | None = None) -> float:
+        """Extend ``holder``'s lease on a task and return the new expiry time."""
+        task = self._held(task_id, holder)
+        expires = (time.time() if now is None else now) + lease_seconds
+        self._lease(task, holder, expires)
+        return expires
+
+    def release(self, task_id: str, holder: str) -> None:
+        """Give a claimed task back so it can be claimed again."""
+        task = self._held(task_id, holder)
+        self._drop_lease(task)
+        self._set_status(task, Status.PENDING)
+        self._update_status(task)
+
+    def reclaim_expired(self, now: float | None = None) -> List[str]:
+        """Return tasks whose lease expired to READY/BLOCKED and list their ids."""
+        now = time.time() if now is None else now
+        heap = self._lease_heap()
+        reclaimed = []
+        while heap and heap[0][0] <= now:
+            expires, tid = heapq.heappop(heap)
+            task = self.tasks.get(tid)
+            if task is None or task.status != Status.IN_PROGRESS:
+                continue  # released or completed since
+            lease = self._lease_of(task)
+            if lease is None or lease["expires"] != expires:
+                continue  # renewed since
+            self._drop_lease(task)
+            self._set_status(task, Status.PENDING)
+            self._update_status(task)
+            reclaimed.append(tid)
+        return reclaimed
+
+    def progress(self, task_id: str) -> Tuple[int, int]:
+        """Return ``(completed, total)`` over a task's direct subtasks."""
+        self._get(task_id)
+        done, total = self._rollups().get(task_id, (0, 0))
+        return done, total
+
+    def apply_batch(
+        self,
+        tasks: Iterable[Task] = (),
+        dependencies: Iterable[Tuple[str, str]] = (),
+        subtasks: Iterable[Tuple[str, str]] = (),
+    ) -> None:
+        """Add many tasks, ``(task_id, depends_on)`` edges and ``(parent, subtask)`` links at once.
+
+        The whole batch is validated before anything changes, so it either
+        applies completely or raises (``KeyError`` for duplicate ids,
+        :class:`TaskNotFoundError`, :class:`CircularDependencyError`) and
+        leaves the manager untouched. Dependencies already set on the new
+        tasks are part of the batch. Cycles are found with one Kahn pass over
+        the tasks downstream of the new edges rather than a search per edge.
+        """
+        new: Dict[str, Task] = {}
+        for task in tasks:
+            if task.id in self.tasks or task.id in self.archived or task.id in new:
+                raise KeyError(f"Task with id '{task.id}' already exists")
+            new[task.id] = task
+        edges = [(tid, dep) for tid, task in new.items() for dep in task.dependencies]
+        edges += [(tid, dep) for tid, dep in dependencies]
+        links = list(subtasks)
+
+        def known(tid: str) -> bool:
+            return tid in self.tasks or tid in new
+
+        for tid, dep in edges:
+            if not known(tid):
+                raise TaskNotFoundError(tid)
+            if not known(dep) and dep not in self.external and dep not in self.archived:
+                raise TaskNotFoundError(dep)
+        for parent_id, sub_id in links:
+            for tid in (parent_id, sub_id):
+                if not known(tid):
+                    raise TaskNotFoundError(tid)
+        self._check_batch_cycles(new, edges)
+
+        for task in new.values():
+            task.dependencies = None
+            task.dependents = None
+            self.tasks[task.id] = task
+            self.dirty.add(task.id)
+            self._emit("created", task.id, title=task.title)
+            if self.search_index is not None:
+                self.search_index.update(task.id, task.title, task._metadata)
+        for tid, dep in edges:
+            if dep not in self.tasks[tid].dependencies:
+                self._emit("edge_added", tid, depends_on=dep)
+            self.tasks[tid].add_dependency(dep)
+            if dep in self.tasks:
+                self.tasks[dep].add_dependent(tid)
+                self.dirty.add(dep)
+        for parent_id, sub_id in links:
+            if sub_id not in self.tasks[parent_id].subtasks:
+                self._emit("edge_added", sub_id, parent=parent_id)
+            self.tasks[parent_id].add_subtask(sub_id)
+            self.tasks[sub_id].parent = parent_id
+            self.dirty.update((parent_id, sub_id))
+        # cheaper to re-derive the order and schedule once than per edge
+        self._order = self._chain = self._heap = self._rollup = None
+        self._ranks = {}
+        self._closure_cache = ({}, {})
+        self._leases = None
+        self._by_status = self._by_parent = None
+        self._by_meta = {}
+        for tid in dict.fromkeys([*new, *(tid for tid, _ in edges), *(p for p, _ in links)]):
+            self._update_status(self.tasks[tid])
+
+    def _check_batch_cycles(self, new: Dict[str, Task], edges: List[Tuple[str, str]]) -> None:
+        # any cycle runs through a new edge, so every task on it is downstream
+        # of some new edge's task; Kahn over that region finds it
+        added: Dict[str, List[str]] = {}
+        for tid, dep in edges:
+            if tid == dep:
+                raise CircularDependencyError(f"Adding dependency {tid} -> {dep} would create a cycle")
+            added.setdefault(dep, []).append(tid)
+
+        def downstream(tid: str) -> List[str]:
+            task = self.tasks.get(tid)
+            return [*(task.dependents if task is not None else ()), *added.get(tid, ())]
+
+        region = {tid for tid, _ in edges}
+        stack = list(region)
+        while stack:
+            for nxt in downstream(stack.pop()):
+                if nxt not in region:
+                    region.add(nxt)
+                    stack.append(nxt)
+        waiting = dict.fromkeys(region, 0)
+        for tid in region:
+            for nxt in downstream(tid):
+                waiting[nxt] += 1
+        queue = deque(tid for tid, n in waiting.items() if not n)
+        seen = 0
+        while queue:
+            seen += 1
+            for nxt in downstream(queue.popleft()):
+                waiting[nxt] -= 1
+                if not waiting[nxt]:
+                    queue.append(nxt)
+        if seen < len(region):
+            stuck = sorted(tid for tid, n in waiting.items() if n)
+            raise CircularDependencyError(f"Batch would create a cycle through {', '.join(stuck[:5])}")
+
+    def touch(self, task_id: str) -> None:
+        """Flag a task as changed after editing it directly (e.g. its metadata).
+
+        Manager methods track their own changes; incremental storage backends
+        only persist tasks flagged here or by those methods.
+        """
+        task = self._get(task_id)
+        self.dirty.add(task_id)
+        for key in self._by_meta:
+            self._meta_move(key, task)
+        if self.search_index is not None:
+            self.search_index.update(task_id, task.title, task._metadata)
+        if task_id in self._ready:
+            self._push(task_id)  # priority or due date may have changed
+
+    def archivable(self, completed_before: float) -> List[str]:
+        """Return ids of tasks that can move to the cold archive.
+
+        A task qualifies once it was completed before ``completed_before``
+        (unix time) and its dependents and subtasks are all complete too, so
+        nothing live can still be waiting on it.
+        """
+        ids = []
+        for tid, task in self.tasks.items():
+            if task.status != Status.COMPLETED or task.completed_at is None or task.completed_at >= completed_before:
+                continue
+            if all(self._is_complete(d) for d in task.dependents) and all(
+                self._is_complete(s) for s in task.subtasks
+            ):
+                ids.append(tid)
+        return ids
+
+    def detach(self, task_ids: Iterable[str]) -> List[Task]:
+        """Remove archived tasks from the manager and return them.
+
+        Live tasks keep their edges to the removed ids, which resolve as
+        complete through ``archived``; only the reverse ``dependents``
+        entries on upstream tasks are pruned.
+        """
+        removed = [self.tasks.pop(tid) for tid in task_ids]
+        self._forget_closures(t.id for t in removed)
+        for task in removed:
+            self._lookup_remove(task)
+            if self.search_index is not None:
+                self.search_index.remove(task.id)
+        archived = set(self.archived)
+        for task in removed:
+            archived.add(task.id)
+            self.dirty.add(task.id)
+            # completed, so no live task counts it as pending
+            if self._pending is not None:
+                self._pending.pop(task.id, None)
+            if self._order is not None:
+                self._order.pop(task.id, None)
+            if self._chain is not None:
+                self._chain.pop(task.id, None)
+            if self._rollup is not None:
+                # archived subtasks keep counting as complete
+                self._rollup.pop(task.id, None)
+            self._ready.pop(task.id, None)
+            for dep in task.dependencies:
+                other = self.tasks.get(dep)
+                if other is not None:
+                    other.discard_dependent(task.id)
+                    self.dirty.add(dep)
+        self.archived = archived
+        return removed
+
+    def refresh_status(self, task_id: str) -> None:
+        """Re-derive READY/BLOCKED for a task, e.g. after ``external`` changed."""
+        self._update_status(self._get(task_id))
+
+    def reindex(self) -> None:
+        """Drop every derived index (readiness, order, schedule, rollups, search) to rebuild on next use."""
+        self._pending = None  # _ready is rebuilt along with it
+        self.search_index = None
+        self._order = self._chain = self._heap = self._rollup = None
+        self._ranks = {}
+        self._closure_cache = ({}, {})
+        self._leases = None
+        self._by_status = self._by_parent = None
+        self._by_meta = {}
+
+    def rebuild_dependents(self) -> None:
+        """Derive every ``dependents`` set from the forward ``dependencies`` in one pass."""
+        self.reindex()
+        for task in self.tasks.values():
+            task.dependents = None
+        for tid, task in self.tasks.items():
+            for dep in task.dependencies:
+                other = self.tasks.get(dep)
+                if other is not None:
+                    other.add_dependent(tid)
+
+    def check_edges(self) -> List[str]:
+        """Return a description of every edge whose two sides disagree.
+
+        Covers dependency/dependent pairs, parent/subtask pairs and edges that
+        point at tasks which do not exist.
+        """
+        problems = []
+        for tid, task in self.tasks.items():
+            for dep in sorted(task.dependencies):
+                if dep in self.external or dep in self.archived:
+                    continue
+                if dep not in self.tasks:
+                    problems.append(f"{tid} depends on missing task {dep}")
+                elif tid not in self.tasks[dep].dependents:
+                    problems.append(f"{tid} depends on {dep} but {dep} does not list it as a dependent")
+            for dep in sorted(task.dependents):
+                if dep not in self.tasks:
+                    problems.append(f"{tid} lists missing dependent {dep}")
+                elif tid not in self.tasks[dep].dependencies:
+                    problems.append(f"{tid} lists dependent {dep} but {dep} does not depend on it")
+            for sub in sorted(task.subtasks):
+                if sub in self.archived:
+                    continue
+                if sub not in self.tasks:
+                    problems.append(f"{tid} lists missing subtask {sub}")
+                elif self.tasks[sub].parent != tid:
+                    problems.append(f"{tid} lists subtask {sub} but its parent is {self.tasks[sub].parent}")
+            if task.parent is not None and task.parent not in self.archived:
+                if task.parent not in self.tasks:
+                    problems.append(f"{tid} has missing parent {task.parent}")
+                elif tid not in self.tasks[task.parent].subtasks:
+                    problems.append(f"{tid} has parent {task.parent} which does not list it as a subtask")
+        return problems
+
+    def repair_edges(self) -> List[str]:
+        """Make both sides of every edge agree and return what was wrong.
+
+        Forward edges win: ``dependencies`` rebuild ``dependents`` and each
+        task's ``parent`` rebuilds its parent's ``subtasks``. Edges to missing
+        tasks are dropped and statuses re-evaluated; changed tasks are dirty.
+        """
+        problems = self.check_edges()
+        if not problems:
+            return problems
+        def edges(t: Task) -> tuple:
+            return (set(t.dependencies), set(t.dependents), set(t.subtasks), t.parent)
+
+        before = {tid: edges(t) for tid, t in self.tasks.items()}
+        for task in self.tasks.values():
+            task.dependencies = [
+                d for d in task.dependencies if d in self.tasks or d in self.external or d in self.archived
+            ]
+            if task.parent is not None and task.parent not in self.tasks and task.parent not in self.archived:
+                task.parent = None
+            # archived children keep counting towards their parent
+            task.subtasks = [sub for sub in task.subtasks if sub in self.archived]
+        for tid, task in self.tasks.items():
+            if task.parent in self.tasks:
+                self.tasks[task.parent].add_subtask(tid)
+        self.rebuild_dependents()
+        for tid, task in self.tasks.items():
+            if before[tid] != edges(task):
+                self.dirty.add(tid)
+            self._update_status(task)
+        return problems
 
     def _get(self, task_id: str) -> Task:
         try:
@@ -103,37 +703,529 @@ class TaskManager:
         except KeyError:
             raise TaskNotFoundError(task_id)
 
+    def _is_complete(self, task_id: str) -> bool:
+        task = self.tasks.get(task_id)
+        if task is not None:
+            return task.status == Status.COMPLETED
+        return self.external.get(task_id) == Status.COMPLETED or task_id in self.archived
+
+    def _index(self) -> Dict[str, int]:
+        pending = self._pending
+        if pending is None:
+            # readers take a set _pending to mean _ready is complete too, so
+            # both are built aside and _pending is published last
+            pending = {tid: self._count_pending(t) for tid, t in self.tasks.items()}
+            self._ready = {tid: None for tid, t in self.tasks.items() if t.status == Status.READY}
+            self._pending = pending
+        return pending
+
+    def _count_pending(self, task: Task) -> int:
+        return sum(1 for d in task.dependencies if not self._is_complete(d))
+
     def _update_status(self, task: Task) -> None:
-        # if already completed, leave it
-        if task.status == Status.COMPLETED:
+        # recount from scratch, for new tasks and changed outside state
+        self._index()[task.id] = self._count_pending(task)
+        self._derive_status(task)
+
+    def _derive_status(self, task: Task) -> None:
+        # completed and claimed tasks keep their status
+        if task.status in (Status.COMPLETED, Status.IN_PROGRESS):
             return
-        if task.dependencies and any(self.tasks[d].status != Status.COMPLETED for d in task.dependencies):
-            task.status = Status.BLOCKED
-        else:
-            task.status = Status.READY
-
-    def _creates_cycle(self, start: str, depends_on: str) -> bool:
-        # DFS from depends_on to see if we can reach start
-        visited = set()
-        stack = [depends_on]
-        while stack:
-            cur = stack.pop()
-            if cur == start:
-                return True
-            if cur in visited:
-                continue
-            visited.add(cur)
-            stack.extend(self.tasks[cur].dependencies)
+        self._set_status(task, Status.BLOCKED if self._index()[task.id] else Status.READY)
+
+    def _set_status(self, task: Task, status: Status) -> None:
+        """Change a task's status, keeping the ready index and dependents in step."""
+        old = task.status
+        if old == status:
+            return
+        pending = self._index()
+        if task.parent is not None:
+            self._rollups()  # count the old status before it changes
+        task.status = status
+        self.dirty.add(task.id)
+        self._emit("status_changed", task.id, old=old.name, status=status.name)
+        if self._by_status is not None:
+            self._by_status.get(old, {}).pop(task.id, None)
+            self._by_status.setdefault(status, {})[task.id] = None
+        if status == Status.READY:
+            self._ready[task.id] = None
+            self._push(task.id)
+        elif old == Status.READY:
+            del self._ready[task.id]
+            self._ranks.pop(task.id, None)
+        if Status.COMPLETED in (old, status):
+            self._forget_closures((task.id,))
+            self._refresh_chain(task.id)
+            self._roll_up(task, 1 if status == Status.COMPLETED else -1)
+            delta = -1 if status == Status.COMPLETED else 1
+            for dep_id in task.dependents:
+                other = self.tasks.get(dep_id)
+                if other is not None:
+                    pending[dep_id] += delta
+                    self._derive_status(other)
+
+    @staticmethod
+    def _lease_of(task: Task) -> Dict[str, Any] | None:
+        lease = (task._agent_context or {}).get("lease")
+        return lease if isinstance(lease, dict) else None
+
+    def _lease_heap(self) -> List[Tuple[float, str]]:
+        if self._leases is None:
+            leases: List[Tuple[float, str]] = []
+            for tid, task in self.tasks.items():
+                lease = self._lease_of(task)
+                if lease is not None and task.status == Status.IN_PROGRESS:
+                    leases.append((lease["expires"], tid))
+            heapq.heapify(leases)
+            self._leases = leases
+        return self._leases
+
+    def _lease(self, task: Task, holder: str, expires: float) -> None:
+        task.agent_context["lease"] = {"holder": holder, "expires": expires}
+        self.dirty.add(task.id)
+        heapq.heappush(self._lease_heap(), (expires, task.id))
+
+    def _drop_lease(self, task: Task) -> None:
+        if task._agent_context and task._agent_context.pop("lease", None) is not None:
+            if not task._agent_context:
+                task.agent_context = None
+            self.dirty.add(task.id)
+
+    def _held(self, task_id: str, holder: str) -> Task:
+        task = self._get(task_id)
+        lease = self._lease_of(task)
+        if task.status != Status.IN_PROGRESS or lease is None or lease["holder"] != holder:
+            raise LeaseError(f"Task {task_id} is not leased to {holder}")
+        return task
+
+    def _rollups(self) -> Dict[str, List[int]]:
+        if self._rollup is None:
+            self._rollup = {
+                tid: [sum(1 for sub in t.subtasks if self._is_complete(sub)), len(t.subtasks)]
+                for tid, t in self.tasks.items()
+                if t.subtasks
+            }
+        return self._rollup
+
+    def _roll_up(self, task: Task, delta: int) -> None:
+        parent = self.tasks.get(task.parent) if task.parent else None
+        if parent is None or task.id not in parent.subtasks:
+            return
+        counts = self._rollups()[parent.id]
+        counts[0] += delta
+        if delta > 0 and counts[0] == counts[1] and parent.status != Status.COMPLETED:
+            parent.completed_at = task.completed_at or time.time()
+            self.dirty.add(parent.id)
+            self._set_status(parent, Status.COMPLETED)  # cascades further up
+
+    def _creates_cycle(self, task_id: str, depends_on: str) -> bool:
+        """Return whether ``task_id -> depends_on`` closes a cycle.
+
+        When it does not, the topological order is updated so the new edge
+        fits it; the caller is expected to add the edge right away.
+        """
+        if depends_on not in self.tasks:  # edges of external tasks are not visible here
+            return False
+        if task_id == depends_on:
+            return True
+        order = self._topo_order()
+        lower, upper = order[task_id], order[depends_on]
+        if upper < lower:
+            return False
+        # only tasks placed between the two endpoints can be on a cycle
+        downstream = self._reach(task_id, lambda t: t.dependents, lambda pos: pos <= upper)
+        if depends_on in downstream:
+            return True
+        upstream = self._reach(depends_on, lambda t: t.dependencies, lambda pos: pos >= lower)
+        # move depends_on and its upstream ahead of task_id and its downstream,
+        # reusing the positions the two groups held
+        moved = sorted(upstream, key=order.__getitem__) + sorted(downstream, key=order.__getitem__)
+        for tid, pos in zip(moved, sorted(order[tid] for tid in moved)):
+            order[tid] = pos
         return False
 
+    def _reach(self, start: str, edges: Callable[[Task], AbstractSet[str]], within: Callable[[int], bool]) -> Set[str]:
+        order = self._topo_order()
+        seen = {start}
+        stack = [start]
+        while stack:
+            for nxt in edges(self.tasks[stack.pop()]):
+                if nxt not in seen and nxt in order and within(order[nxt]):
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    def _topo_order(self) -> Dict[str, int]:
+        if self._order is None:
+            # Kahn's algorithm over the loaded graph
+            waiting = {tid: 0 for tid in self.tasks}
+            for tid, task in self.tasks.items():
+                waiting[tid] = sum(1 for d in task.dependencies if d in waiting)
+            queue = deque(tid for tid, n in waiting.items() if not n)
+            order: Dict[str, int] = {}
+            while queue:
+                tid = queue.popleft()
+                order[tid] = len(order)
+                for dep_id in self.tasks[tid].dependents:
+                    if dep_id in waiting:
+                        waiting[dep_id] -= 1
+                        if not waiting[dep_id]:
+                            queue.append(dep_id)
+            # tasks on a cycle from hand-edited data just go last
+            for tid in self.tasks:
+                order.setdefault(tid, len(order))
+            self._next_order = len(order)
+            self._order = order
+        return self._order
+
     # extras for parent/subtask
     def add_subtask(self, parent_id: str, subtask_id: str) -> None:
         parent = self._get(parent_id)
         sub = self._get(subtask_id)
-        parent.subtasks.add(subtask_id)
+        if subtask_id not in parent.subtasks:
+            self._emit("edge_added", subtask_id, parent=parent_id)
+            counts = self._rollups().setdefault(parent_id, [0, 0])
+            counts[0] += self._is_complete(subtask_id)
+            counts[1] += 1
+        parent.add_subtask(subtask_id)
+        if self._by_parent is not None:
+            self._by_parent.get(sub.parent, {}).pop(subtask_id, None)
+            self._by_parent.setdefault(parent_id, {})[subtask_id] = None
         sub.parent = parent_id
+        self.dirty.update((parent_id, subtask_id))
         # parent shouldn't be marked complete until subtasks done
         self._update_status(parent)
 
+    def next_tasks(self, limit: int = 5) -> List[Task]:
+        """Return up to ``limit`` READY tasks, most urgent first, in O(limit log n)."""
+        heap = self._queue()
+        picked: List[Tuple[tuple, str]] = []
+        while heap and len(picked) < limit:
+            rank, tid = heapq.heappop(heap)
+            if self._ranks.get(tid) == rank:
+                picked.append((rank, tid))
+                del self._ranks[tid]  # skip duplicates of this entry
+        for rank, tid in picked:
+            self._ranks[tid] = rank
+            heapq.heappush(heap, (rank, tid))
+        return [self.tasks[tid] for _, tid in picked]
+
+    def critical_path(self, task_id: str) -> int:
+        """Return the number of incomplete tasks on the longest chain from ``task_id`` downstream."""
+        self._get(task_id)
+        return self._chains()[task_id]
+
+    def _rank(self, task: Task) -> tuple:
+        meta = task._metadata or {}
+        priority = meta.get("priority")
+        if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+            priority = 0
+        due = meta.get("due")
+        # heapq pops the smallest: high priority, early due date, long chain
+        return (-priority, due is None, str(due) if due is not None else "", -self._chains()[task.id], task.id)
+
+    def _push(self, task_id: str) -> None:
+        if self._heap is None:
+            return
+        rank = self._rank(self.tasks[task_id])
+        if self._ranks.get(task_id) != rank:
+            self._ranks[task_id] = rank
+            heapq.heappush(self._heap, (rank, task_id))
+            if len(self._heap) > 2 * len(self._ranks) + 64:
+                # mostly stale entries; rebuild from the live ranks
+                self._heap = [(r, tid) for tid, r in self._ranks.items()]
+                heapq.heapify(self._heap)
+
+    def _queue(self) -> List[Tuple[tuple, str]]:
+        if self._heap is None:
+            self._index()
+            self._ranks = {tid: self._rank(self.tasks[tid]) for tid in self._ready}
+            heap = [(rank, tid) for tid, rank in self._ranks.items()]
+            heapq.heapify(heap)
+            self._heap = heap
+        return self._heap
+
+    def _chains(self) -> Dict[str, int]:
+        if self._chain is None:
+            order = self._topo_order()
+            chain: Dict[str, int] = {}
+            # dependents sit later in the order, so walk it backwards
+            for tid in sorted(self.tasks, key=order.__getitem__, reverse=True):
+                chain[tid] = self._chain_length(self.tasks[tid], chain)
+            self._chain = chain
+        return self._chain
+
+    def _chain_length(self, task: Task, chain: Dict[str, int]) -> int:
+        if task.status == Status.COMPLETED:
+            return 0
+        return 1 + max((chain.get(d, 0) for d in task.dependents), default=0)
+
+    def _refresh_chain(self, task_id: str) -> None:
+        # recompute a task's chain and walk upstream while lengths change
+        chain = self._chain
+        if chain is None:
+            return
+        stack = [task_id]
+        while stack:
+            task = self.tasks.get(stack.pop())
+            if task is None:
+                continue
+            length = self._chain_length(task, chain)
+            if chain.get(task.id) != length:
+                chain[task.id] = length
+                if task.id in self._ready:
+                    self._push(task.id)
+                stack.extend(task.dependencies)
+
+    def blockers(self, task_id: str, depth: int | None = None, limit: int | None = None) -> Dict[str, int]:
+        """Return incomplete tasks ``task_id`` transitively waits on, as ``{id: depth}``.
+
+        Direct dependencies have depth 1. The walk stops at completed tasks,
+        goes at most ``depth`` levels and returns at most ``limit`` ids,
+        nearest first.
+        """
+        return self._closure("blockers", task_id, depth, limit)
+
+    def impact(self, task_id: str, depth: int | None = None, limit: int | None = None) -> Dict[str, int]:
+        """Return incomplete tasks transitively waiting on ``task_id``, as ``{id: depth}``.
+
+        The downstream counterpart of :meth:`blockers`, with the same limits.
+        """
+        return self._closure("impact", task_id, depth, limit)
+
+    _CLOSURE_CACHE_SIZE = 4096
+
+    def _closure(self, direction: str, task_id: str, depth: int | None, limit: int | None) -> Dict[str, int]:
+        self._get(task_id)
+        key = (direction, task_id, depth, limit)
+        closures, refs = self._closure_cache
+        found = closures.get(key)
+        if found is not None:
+            return dict(found)
+        found = {}
+        frontier = [task_id]
+        level = 0
+        # breadth first, so a cap keeps the nearest tasks
+        while frontier and (depth is None or level < depth) and (limit is None or len(found) < limit):
+            level += 1
+            following = []
+            for tid in frontier:
+                task = self.tasks[tid]
+                for nxt in task.dependencies if direction == "blockers" else task.dependents:
+                    other = self.tasks.get(nxt)
+                    if other is None or other.status == Status.COMPLETED or nxt in found or nxt == task_id:
+                        continue
+                    found[nxt] = level
+                    following.append(nxt)
+                    if limit is not None and len(found) >= limit:
+                        break
+                if limit is not None and len(found) >= limit:
+                    break
+            frontier = following
+        if len(closures) >= self._CLOSURE_CACHE_SIZE:
+            closures, refs = self._closure_cache = ({}, {})
+        closures[key] = found
+        for tid in (task_id, *found):
+            refs.setdefault(tid, set()).add(key)
+        return dict(found)
+
+    def _forget_closures(self, task_ids: Iterable[str]) -> None:
+        # drop cached walks that started at or passed through these tasks
+        closures, refs = self._closure_cache
+        for tid in task_ids:
+            for key in refs.pop(tid, ()):
+                found = closures.pop(key, None)
+                if found is not None:
+                    for other in (key[1], *found):
+                        keys = refs.get(other)
+                        if keys is not None:
+                            keys.discard(key)
+
+    def query(
+        self,
+        status: Status | None = None,
+        parent: str | None = None,
+        metadata: Dict[str, object] | None = None,
+        dependency_of: str | None = None,
+    ) -> List[str]:
+        """Return ids of tasks matching every given filter, sorted.
+
+        ``metadata`` matches keys to equal values and ``dependency_of`` keeps
+        the direct dependencies of that task. Only the smallest indexed
+        candidate set is walked; the other filters are checked per task.
+        """
+        pools: List[Iterable[str]] = []
+        if status is not None:
+            pools.append(self._status_index().get(status, {}).keys())
+        if parent is not None:
+            pools.append(self._parent_index().get(parent, {}).keys())
+        for key, value in (metadata or {}).items():
+            lookup = _lookup_key(value)
+            if lookup is not None:
+                pools.append(self._meta_index(key)[0].get(lookup, {}).keys())
+        if dependency_of is not None:
+            pools.append(self._get(dependency_of).dependencies)
+        pool = min(pools, key=len) if pools else self.tasks.keys()  # type: ignore[arg-type]
+
+        def matches(task: Task) -> bool:
+            if status is not None and task.status != status:
+                return False
+            if parent is not None and task.parent != parent:
+                return False
+            if metadata:
+                meta = task._metadata or {}
+                for key, value in metadata.items():
+                    if key not in meta or _lookup_key(meta[key]) != _lookup_key(value) or meta[key] != value:
+                        return False
+            return dependency_of is None or task.id in self.tasks[dependency_of].dependencies
+
+        return sorted(tid for tid in pool if tid in self.tasks and matches(self.tasks[tid]))
+
+    def _status_index(self) -> Dict[Status, Dict[str, None]]:
+        if self._by_status is None:
+            # built aside and then published, for concurrent readers
+            by_status: Dict[Status, Dict[str, None]] = {}
+            for tid, task in self.tasks.items():
+                by_status.setdefault(task.status, {})[tid] = None
+            self._by_status = by_status
+        return self._by_status
+
+    def _parent_index(self) -> Dict[str | None, Dict[str, None]]:
+        if self._by_parent is None:
+            by_parent: Dict[str | None, Dict[str, None]] = {}
+            for tid, task in self.tasks.items():
+                by_parent.setdefault(task.parent, {})[tid] = None
+            self._by_parent = by_parent
+        return self._by_parent
+
+    def _meta_index(self, key: str) -> Tuple[Dict[tuple, Dict[str, None]], Dict[str, tuple]]:
+        if key not in self._by_meta:
+            index: Tuple[Dict[tuple, Dict[str, None]], Dict[str, tuple]] = ({}, {})
+            for task in self.tasks.values():
+                self._meta_move(key, task, index=index)
+            self._by_meta[key] = index
+        return self._by_meta[key]
+
+    def _meta_move(
+        self,
+        key: str,
+        task: Task,
+        remove: bool = False,
+        index: Tuple[Dict[tuple, Dict[str, None]], Dict[str, tuple]] | None = None,
+    ) -> None:
+        buckets, values = index if index is not None else self._by_meta[key]
+        old = values.pop(task.id, None)
+        if old is not None:
+            buckets[old].pop(task.id, None)
+        meta = task._metadata or {}
+        new = _lookup_key(meta[key]) if key in meta and not remove else None
+        if new is not None:
+            values[task.id] = new
+            buckets.setdefault(new, {})[task.id] = None
+
+    def _lookup_add(self, task: Task) -> None:
+        if self._by_status is not None:
+            self._by_status.setdefault(task.status, {})[task.id] = None
+        if self._by_parent is not None:
+            self._by_parent.setdefault(task.parent, {})[task.id] = None
+        for key in self._by_meta:
+            self._meta_move(key, task)
+
+    def _lookup_remove(self, task: Task) -> None:
+        if self._by_status is not None:
+            self._by_status.get(task.status, {}).pop(task.id, None)
+        if self._by_parent is not None:
+            self._by_parent.get(task.parent, {}).pop(task.id, None)
+        for key in self._by_meta:
+            self._meta_move(key, task, remove=True)
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[Task, float]]:
+        """Rank tasks by how well their title and metadata match ``query``."""
+        if self.search_index is None:
+            self.search_index = SearchIndex.build(self.tasks.values())
+        return [(self.tasks[tid], score) for tid, score in self.search_index.search(query, limit)]
+
+    def events_since(
+        self,
+        since: int,
+        task_ids: AbstractSet[str] | None = None,
+        statuses: AbstractSet[str] | None = None,
+        limit: int | None = None,
+    ) -> Tuple[List[Dict[str, object]], bool]:
+        """Return events after sequence number ``since`` and whether the feed was reset.
+
+        ``task_ids`` keeps events about those tasks and ``statuses`` keeps
+        status changes into those status names. The flag is true when events
+        after ``since`` were already dropped or ``since`` is from another
+        feed (ahead of :attr:`seq`); the events then start at the oldest kept.
+        """
+        first = self._events[0]["seq"] if self._events else self.seq + 1
+        reset = since > self.seq or since + 1 < first  # type: ignore[operator]
+        start = 0 if reset else since + 1 - first  # type: ignore[operator]
+        found = []
+        for event in self._events[start:]:
+            if task_ids is not None and event["task_id"] not in task_ids:
+                continue
+            if statuses is not None and event.get("status") not in statuses:
+                continue
+            found.append(event)
+            if limit is not None and len(found) >= limit:
+                break
+        return found, reset
+
+    def feed_state(self, ids: Iterable[str] | None = None) -> Dict[str, FeedState]:
+        """``(status, dependencies, parent)`` of each task in ``ids`` (default all).
+
+        A copy of what :meth:`carry_events` compares, so it stays valid while
+        this manager keeps changing.
+        """
+        tasks = self.tasks
+        return {
+            tid: (tasks[tid].status, frozenset(tasks[tid].dependencies), tasks[tid].parent)
+            for tid in (tasks if ids is None else ids)
+            if tid in tasks
+        }
+
+    def carry_events(
+        self,
+        previous: "TaskManager",
+        state: Mapping[str, FeedState] | None = None,
+    ) -> None:
+        """Continue ``previous``'s change feed on this freshly loaded manager.
+
+        Differences to ``state`` (by default ``previous.feed_state()``) are
+        added as events, so watchers see e.g. writes by another process like
+        local changes. Pass the state last saved or loaded when ``previous``
+        may hold changes that were thrown away.
+        """
+        self.seq, self._events = previous.seq, previous._events
+        if state is None:
+            state = previous.feed_state()
+        for tid, task in self.tasks.items():
+            before = state.get(tid)
+            if before is None:
+                self._emit("created", tid, title=task.title)
+            for dep in sorted(task.dependencies - (before[1] if before is not None else _EMPTY)):
+                self._emit("edge_added", tid, depends_on=dep)
+            if task.parent is not None and (before is None or before[2] != task.parent):
+                self._emit("edge_added", tid, parent=task.parent)
+            old = before[0] if before is not None else Status.PENDING
+            if old != task.status:
+                self._emit("status_changed", tid, old=old.name, status=task.status.name)
+
+    def rewind_events(self, seq: int) -> None:
+        """Drop events after ``seq``, e.g. those of a mutation that was thrown away."""
+        while self._events and self._events[-1]["seq"] > seq:  # type: ignore[operator]
+            self._events.pop()
+        self.seq = min(self.seq, seq)
+
+    def _emit(self, kind: str, task_id: str, **fields: object) -> None:
+        self.seq += 1
+        self._events.append({"seq": self.seq, "type": kind, "task_id": task_id, **fields})
+        if len(self._events) > 2 * self.EVENT_LOG_SIZE:
+            del self._events[: -self.EVENT_LOG_SIZE]
+
     def get_ready_tasks(self) -> List[Task]:
-        return [t for t in self.tasks.values() if t.status == Status.READY]
+        """Return READY tasks in the order they became ready."""
+        self._index()
+        return [self.tasks[tid] for tid in self._ready]